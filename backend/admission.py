@@ -0,0 +1,247 @@
+"""
+Admission control for LLM-backed routes.
+
+Every call to /api/assessment/submit or /api/mentor/chat holds a Gemini request
+for seconds, so callers are admitted through two token buckets:
+
+- a per-client bucket keyed on the client address, which rejects an abusive
+  caller immediately with 429 + Retry-After. It is not keyed on the user_id in
+  the request body: that field is unauthenticated, so a caller could rotate it
+  to dodge the limit or send someone else's to drain their quota. Clients
+  behind one NAT share a bucket (raise LLM_USER_BURST if that bites), and
+  behind a reverse proxy uvicorn must run with --proxy-headers and
+  --forwarded-allow-ips so the address is the caller's, not the proxy's;
+- a global bucket bounding total LLM traffic. When it is empty, requests wait
+  in a bounded queue for up to LLM_MAX_QUEUE_WAIT_SECONDS; once the queue is
+  full, or the expected wait is longer than that, they get a fast 429 instead.
+
+Bucket state lives in-process by default. Setting LLM_RATE_LIMIT_BACKEND=mongo
+shares it between workers through the `rate_limits` collection. Any object
+with the BucketBackend `take` (and optionally `refund`) method can be passed in
+instead, e.g. a local stand-in in tests. Backend calls run in a worker thread,
+never on the event loop.
+
+Configuration (environment):
+    LLM_USER_RATE_PER_MINUTE      per-client refill rate (default 6)
+    LLM_USER_BURST                per-client bucket size (default 3)
+    LLM_GLOBAL_RATE_PER_MINUTE    global refill rate (default 120)
+    LLM_GLOBAL_BURST              global bucket size (default 10)
+    LLM_MAX_QUEUE                 requests allowed to wait for the global bucket (default 20)
+    LLM_MAX_QUEUE_WAIT_SECONDS    longest a queued request waits (default 10)
+    LLM_RATE_LIMIT_BACKEND        "memory" (default) or "mongo"
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+GLOBAL_KEY = "llm:global"
+
+# Idle in-memory buckets are pruned once the table grows past this
+MEMORY_BACKEND_MAX_KEYS = 10000
+
+
+class BucketBackend:
+    """Token-bucket storage: take one token from `key` if available"""
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Args:
+            rate: refill rate in tokens per second
+            capacity: bucket size (a new bucket starts full)
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        raise NotImplementedError
+
+    def refund(self, key: str, capacity: float):
+        """Return a token taken for a call that was then rejected elsewhere"""
+
+
+class MemoryBucketBackend(BucketBackend):
+    """Buckets in a process-local dict"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if len(self._buckets) > MEMORY_BACKEND_MAX_KEYS:
+                self._prune(now, rate, capacity)
+            return wait
+
+    def refund(self, key: str, capacity: float):
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+    def _prune(self, now: float, rate: float, capacity: float):
+        """Drop buckets that have refilled completely (they'd be recreated full)"""
+        full_after = capacity / rate
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated >= full_after]:
+            del self._buckets[key]
+
+
+class MongoBucketBackend(BucketBackend):
+    """
+    Buckets shared between workers in MongoDB.
+
+    Refill and take happen in one atomic pipeline update, so concurrent
+    workers never hand out the same token. Idle buckets expire via TTL.
+    """
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+        self._indexes_ready = False
+
+    def _collection(self):
+        from database import get_db_connection
+        collection = get_db_connection()[self.collection_name]
+        if not self._indexes_ready:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_ready = True
+        return collection
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        from pymongo import ReturnDocument
+
+        now = time.time()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}, rate]}
+        ]}]}
+        bucket = self._collection().find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated": now,
+                          "expires_at": datetime.now() + timedelta(seconds=capacity / rate + 60)}},
+                {"$set": {"admitted": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$admitted", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if bucket["admitted"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+    def refund(self, key: str, capacity: float):
+        self._collection().update_one(
+            {"_id": key},
+            [{"$set": {"tokens": {"$min": [capacity, {"$add": ["$tokens", 1]}]}}}]
+        )
+
+
+def _default_backend() -> BucketBackend:
+    if os.getenv('LLM_RATE_LIMIT_BACKEND', 'memory').lower() == 'mongo':
+        return MongoBucketBackend()
+    return MemoryBucketBackend()
+
+
+class AdmissionController:
+    """Per-client and global token buckets with a bounded wait queue"""
+
+    def __init__(self, backend: Optional[BucketBackend] = None,
+                 user_rate_per_minute: float = None, user_burst: float = None,
+                 global_rate_per_minute: float = None, global_burst: float = None,
+                 max_queue: int = None, max_wait: float = None):
+        self.backend = backend or _default_backend()
+        self.user_rate = (user_rate_per_minute if user_rate_per_minute is not None
+                          else float(os.getenv('LLM_USER_RATE_PER_MINUTE', '6'))) / 60.0
+        self.user_burst = user_burst if user_burst is not None else float(os.getenv('LLM_USER_BURST', '3'))
+        self.global_rate = (global_rate_per_minute if global_rate_per_minute is not None
+                            else float(os.getenv('LLM_GLOBAL_RATE_PER_MINUTE', '120'))) / 60.0
+        self.global_burst = global_burst if global_burst is not None else float(os.getenv('LLM_GLOBAL_BURST', '10'))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('LLM_MAX_QUEUE', '20'))
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv('LLM_MAX_QUEUE_WAIT_SECONDS', '10'))
+        self.waiting = 0
+        self.metrics = {"admitted": 0, "queued": 0, "rejected_user": 0, "rejected_global": 0,
+                        "max_queue_depth": 0, "backend_errors": 0}
+
+    async def _take(self, key: str, rate: float, capacity: float) -> float:
+        try:
+            return await asyncio.to_thread(self.backend.take, key, rate, capacity)
+        except Exception as e:
+            # Fail open: a limiter outage must not take the AI features down with it
+            self.metrics["backend_errors"] += 1
+            print(f"⚠️ Rate limit backend error for '{key}': {e}")
+            return 0.0
+
+    async def _refund(self, key: str, capacity: float):
+        refund = getattr(self.backend, "refund", None)
+        if refund is None:
+            return
+        try:
+            await asyncio.to_thread(refund, key, capacity)
+        except Exception as e:
+            self.metrics["backend_errors"] += 1
+            print(f"⚠️ Rate limit backend error for '{key}': {e}")
+
+    def _reject(self, reason: str, retry_after: float):
+        self.metrics[f"rejected_{reason}"] += 1
+        detail = ("Too many AI requests; please slow down" if reason == "user"
+                  else "The AI service is busy; please retry shortly")
+        raise HTTPException(status_code=429, detail=detail,
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    async def admit(self, client_key: str):
+        """Admit one LLM call for client_key (the caller's address) or raise HTTPException(429) with Retry-After"""
+        user_key = f"llm:user:{client_key}"
+        wait = await self._take(user_key, self.user_rate, self.user_burst)
+        if wait:
+            self._reject("user", wait)
+
+        # The client's token is only spent on an admitted call: a global
+        # rejection gives it back
+        try:
+            await self._wait_for_global()
+        except HTTPException:
+            await self._refund(user_key, self.user_burst)
+            raise
+        self.metrics["admitted"] += 1
+
+    async def _wait_for_global(self):
+        """Take a global token, queueing for up to max_wait, or raise HTTPException(429)"""
+        wait = await self._take(GLOBAL_KEY, self.global_rate, self.global_burst)
+        if not wait:
+            return
+
+        if self.waiting >= self.max_queue or wait > self.max_wait:
+            self._reject("global", wait)
+
+        self.waiting += 1
+        self.metrics["queued"] += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.waiting)
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while wait:
+                if time.monotonic() + wait > deadline:
+                    self._reject("global", wait)
+                await asyncio.sleep(wait)
+                wait = await self._take(GLOBAL_KEY, self.global_rate, self.global_burst)
+        finally:
+            self.waiting -= 1
+
+    def status(self) -> Dict:
+        return dict(self.metrics, queue_depth=self.waiting)
+
+
+llm_admission = AdmissionController()
@@ -0,0 +1,165 @@
+"""
+Benchmark for the local job index (user_database.upsert_job_listings /
+get_job_listings).
+
+Writes synthetic listings into a scratch database (--db-name, dropped
+afterwards) on MONGODB_URI and reports:
+
+- ingest: upsert_job_listings throughput for --listings new listings, spread
+  over --careers careers and --locations locations, and for re-ingesting a
+  --reingest share of them (updates of existing documents)
+- queries: keyset pagination through --pages pages for the unfiltered, per-career
+  and per-career+location feeds (median ms per page, first vs last page), and
+  the same last page fetched with skip/limit for comparison
+- plan: documents examined for a deep keyset page, when the server supports
+  explain()
+
+Usage:
+    python benchmark_job_index.py                                 # 1M listings
+    python benchmark_job_index.py --listings 200000 --pages 50
+    python benchmark_job_index.py --db-name prism_benchmark_jobs --keep
+
+Needs a MongoDB server; never point --db-name at a database you care about.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_jobs(count: int, careers: int, locations: int, companies: int, seed: int):
+    """
+    (career_slug, normalized job record) pairs shaped like indeed_scraper output;
+    the same seed yields the same listings, so a shorter run re-ingests a prefix
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    for index in range(count):
+        career = f"career-{rng.randrange(careers)}"
+        yield career, {
+            "job_key": f"jk{index}",
+            "title": f"{career.replace('-', ' ').title()} {rng.choice(['I', 'II', 'Lead', 'Intern'])} {index}",
+            "company": f"Company {rng.randrange(companies)}",
+            "location": f"City {rng.randrange(locations)}",
+            "salary_text": "₹6,00,000 - ₹9,00,000 a year",
+            "summary": "Build and maintain services. " * 6,
+            "url": f"https://in.indeed.test/viewjob?jk=jk{index}",
+            "posted_at": (now - timedelta(minutes=rng.randrange(60 * 24 * 60))).isoformat(),
+        }
+
+
+def ingest(upsert_job_listings, pairs, chunk: int):
+    """Upsert grouped by career in chunks, like the refresh scheduler does. Returns (seconds, counts)."""
+    totals = {"inserted": 0, "updated": 0}
+    started = time.perf_counter()
+    by_career = {}
+    for career, job in pairs:
+        jobs = by_career.setdefault(career, [])
+        jobs.append(job)
+        if len(jobs) >= chunk:
+            result = upsert_job_listings(jobs, career)
+            totals["inserted"] += result["inserted"]
+            totals["updated"] += result["updated"]
+            jobs.clear()
+    for career, jobs in by_career.items():
+        if jobs:
+            result = upsert_job_listings(jobs, career)
+            totals["inserted"] += result["inserted"]
+            totals["updated"] += result["updated"]
+    return time.perf_counter() - started, totals
+
+
+def paginate(get_job_listings, pages: int, limit: int, **filters):
+    timings = []
+    cursor = None
+    for _ in range(pages):
+        started = time.perf_counter()
+        jobs, cursor = get_job_listings(limit=limit, cursor=cursor, **filters)
+        timings.append((time.perf_counter() - started) * 1000)
+        if not cursor:
+            break
+    return {
+        "pages": len(timings),
+        "median_ms": round(statistics.median(timings), 2),
+        "first_page_ms": round(timings[0], 2),
+        "last_page_ms": round(timings[-1], 2),
+    }, cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--careers", type=int, default=50)
+    parser.add_argument("--locations", type=int, default=40)
+    parser.add_argument("--reingest", type=float, default=0.1, help="share of listings ingested again")
+    parser.add_argument("--chunk", type=int, default=1000, help="listings per upsert_job_listings call")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--db-name", default="prism_benchmark_jobs", help="scratch database")
+    parser.add_argument("--keep", action="store_true", help="don't drop the scratch database")
+    args = parser.parse_args()
+
+    os.environ['DB_NAME'] = args.db_name
+    import database
+    from user_database import get_job_listings, upsert_job_listings, _normalize_field
+
+    db = database.get_db_connection()
+    db['jobs'].drop()
+    results = {"listings": args.listings}
+    companies = args.listings // 20 + 1
+
+    seconds, counts = ingest(upsert_job_listings,
+                             synthetic_jobs(args.listings, args.careers, args.locations, companies, args.seed),
+                             args.chunk)
+    results["ingest"] = dict(counts, seconds=round(seconds, 2), listings_per_second=round(args.listings / seconds))
+
+    again = int(args.listings * args.reingest)
+    if again:
+        seconds, counts = ingest(upsert_job_listings,
+                                 synthetic_jobs(again, args.careers, args.locations, companies, args.seed),
+                                 args.chunk)
+        results["reingest"] = dict(counts, seconds=round(seconds, 2), listings_per_second=round(again / seconds))
+
+    feeds = {
+        "all": {},
+        "career": {"career_slug": "career-1"},
+        "career_location": {"career_slug": "career-1", "location": "City 1"},
+    }
+    results["queries"] = {}
+    for name, filters in feeds.items():
+        stats, _ = paginate(get_job_listings, args.pages, args.limit, **filters)
+
+        # The same deep page through skip/limit, for comparison
+        query = {}
+        if filters.get("career_slug"):
+            query["career_slugs"] = filters["career_slug"]
+        if filters.get("location"):
+            query["location_key"] = _normalize_field(filters["location"])
+        sort = [("posted_at", -1), ("_id", 1)]
+        skip = (stats["pages"] - 1) * args.limit
+        started = time.perf_counter()
+        list(db['jobs'].find(query).sort(sort).skip(skip).limit(args.limit))
+        stats["skip_limit_last_page_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        try:
+            plan = db['jobs'].find(query).sort(sort).skip(skip).limit(args.limit).explain()
+            stats["skip_limit_docs_examined"] = plan["executionStats"]["totalDocsExamined"]
+        except Exception:
+            pass
+        results["queries"][name] = stats
+
+    if not args.keep:
+        database.client.drop_database(args.db_name)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark for batch job-to-career matching (job_matching.py).
+
+Builds a CareerMatcher over a career catalog and scores synthetic listings
+(titles and descriptions mixing catalog roles/skills with filler words).
+Reports:
+
+- matcher build time and vocabulary size
+- in-process matching throughput (listings/s) and the share of listings that
+  got at least one career
+- with --mongo: match_new_jobs end to end on a scratch database (--db-name,
+  dropped afterwards) on MONGODB_URI: the first pass over every listing, a
+  second pass with nothing to do, and a re-match after the catalog changed
+
+The catalog is synthetic (--careers careers shaped like the seeded ones)
+unless --catalog-from-db reads the `careers` collection of DB_NAME.
+
+Usage:
+    python benchmark_job_matching.py                          # 1M listings in process
+    python benchmark_job_matching.py --listings 200000 --catalog-from-db
+    python benchmark_job_matching.py --listings 100000 --mongo --db-name prism_benchmark
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FILLER = ("looking for motivated candidate team work fast growing company hybrid office "
+          "immediate joiner good communication bangalore pune remote startup").split()
+
+
+def synthetic_catalog(count: int, seed: int):
+    rng = random.Random(seed)
+    skills = [f"skill{i}" for i in range(count * 3)]
+    roles = [f"role{i}" for i in range(count * 2)]
+    return [{
+        "slug": f"career-{index}",
+        "job_roles": [{"role_title": f"{rng.choice(roles)} {rng.choice(['engineer', 'analyst', 'manager'])}"}
+                      for _ in range(3)],
+        "skills_required": [{"skill_name": name} for name in rng.sample(skills, 7)],
+    } for index in range(count)]
+
+
+def synthetic_listings(catalog, count: int, seed: int):
+    rng = random.Random(seed)
+    roles = [role['role_title'] for career in catalog for role in career.get('job_roles') or []]
+    skills = [skill['skill_name'] for career in catalog for skill in career.get('skills_required') or []]
+    for index in range(count):
+        title = rng.choice(roles) if rng.random() < 0.8 else " ".join(rng.sample(FILLER, 3))
+        words = rng.sample(skills, 3) + rng.sample(FILLER, 8)
+        rng.shuffle(words)
+        yield {"_id": f"job-{index}", "job_title": title, "description": " ".join(words)}
+
+
+def run_mongo(jm, catalog, listings, batch_size):
+    import database
+
+    db = database.get_db_connection()
+    for name in ("careers", "jobs"):
+        db[name].drop()
+    db['careers'].insert_many([dict(career) for career in catalog])
+    jobs = db['jobs']
+    for start in range(0, len(listings), 10000):
+        jobs.insert_many(listings[start:start + 10000], ordered=False)
+
+    def timed(matcher):
+        started = time.perf_counter()
+        processed = jm.match_new_jobs(batch_size=batch_size, matcher=matcher)
+        return processed, time.perf_counter() - started
+
+    first, first_s = timed(jm.get_career_matcher(refresh=True))
+    second, second_s = timed(jm.get_career_matcher(refresh=True))
+    db['careers'].update_one({"slug": catalog[0]['slug']},
+                             {"$push": {"skills_required": {"skill_name": "brand new skill"}}})
+    third, third_s = timed(jm.get_career_matcher(refresh=True))
+    database.client.drop_database(db.name)
+    return {
+        "mongo_first_pass": {"listings": first, "seconds": round(first_s, 2),
+                             "listings_per_second": round(first / first_s) if first_s else None},
+        "mongo_noop_pass_s": round(second_s, 3), "mongo_noop_listings": second,
+        "mongo_rematch_after_catalog_change": {"listings": third, "seconds": round(third_s, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--careers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--catalog-from-db", action="store_true", help="match against the careers in DB_NAME")
+    parser.add_argument("--mongo", action="store_true", help="also run match_new_jobs on a scratch database")
+    parser.add_argument("--db-name", default="prism_benchmark_matching", help="scratch database for --mongo")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.catalog_from_db:
+        from database import get_db_connection
+        catalog = list(get_db_connection()['careers'].find(
+            {}, {"_id": 0, "slug": 1, "job_roles.role_title": 1, "skills_required.skill_name": 1}))
+    else:
+        catalog = synthetic_catalog(args.careers, args.seed)
+    if args.mongo:
+        os.environ['DB_NAME'] = args.db_name
+    import job_matching as jm
+
+    started = time.perf_counter()
+    matcher = jm.CareerMatcher(catalog)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Listings are generated up front (a pool reused cyclically) so only matching is timed
+    pool = list(synthetic_listings(catalog, min(args.listings, 50_000), args.seed))
+    matched = 0
+    started = time.perf_counter()
+    for index in range(args.listings):
+        listing = pool[index % len(pool)]
+        if matcher.match(listing['job_title'], listing['description']):
+            matched += 1
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "careers": len(catalog),
+        "vocabulary": len(matcher.idf),
+        "build_ms": round(build_ms, 1),
+        "listings": args.listings,
+        "match_seconds": round(elapsed, 2),
+        "listings_per_second": round(args.listings / elapsed),
+        "matched_share": round(matched / args.listings, 3),
+    }
+    if args.mongo:
+        listings = list(synthetic_listings(catalog, args.listings, args.seed))
+        result.update(run_mongo(jm, catalog, listings, args.batch_size or jm.MATCH_BATCH_SIZE))
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark for prompt assembly (prompts.py).
+
+Builds assessment and mentor prompts for synthetic inputs of increasing size
+and reports, per scenario, the assembly time (median over --repeat runs),
+the estimated prompt tokens split into the static prefix and the variable
+part, how many context items the budget trimmed, and whether the static
+prefix stayed byte-identical across requests.
+
+Usage:
+    python benchmark_prompts.py
+    python benchmark_prompts.py --repeat 5000 --chat-budget 800
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import prompts  # noqa: E402
+
+
+def answers(count: int, answer_chars: int):
+    return [{"question": f"Question {i}: what do you enjoy most about subject {i}?",
+             "answer": ("I like solving problems and building things " * 40)[:answer_chars]} for i in range(count)]
+
+
+def chat_inputs(history_turns: int, response_chars: int, with_career: bool):
+    career = {
+        "career_title": "Data Scientist",
+        "career_description": "Analyzes data to find patterns and build predictive models. " * 6,
+        "avg_salary": "₹8-25 LPA",
+        "popular_exams": ["GATE", "JAM", "CAT"],
+        "skills_required": ["Python", "Statistics", "Machine Learning", "SQL", "Communication", "Cloud"],
+        "job_roles": ["Data Analyst", "ML Engineer", "Data Scientist"],
+    } if with_career else None
+    user_context = {
+        "assessment_completed": True,
+        "career_matches": [{"title": f"Career {i}", "match_percentage": 90 - i} for i in range(5)],
+        "skills_to_develop": [{"skill": f"Skill {i}"} for i in range(7)],
+        "selected_careers": ["data-scientist"],
+    }
+    history = [{"message": f"Question number {i} about my options?",
+                "response": ("Here is some detailed guidance about your options. " * 30)[:response_chars]}
+               for i in range(history_turns)]
+    return career, user_context, history
+
+
+def measure(build, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        messages = build()
+        timings.append(time.perf_counter() - started)
+    prefix, variable = messages[0].content, "".join(m.content for m in messages[1:])
+    return messages, {
+        "assembly_us": round(statistics.median(timings) * 1e6, 1),
+        "prefix_tokens": prompts.estimate_tokens(prefix),
+        "variable_tokens": prompts.estimate_tokens(variable),
+        "prefix_sha1": hashlib.sha1(prefix.encode()).hexdigest()[:12],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--chat-budget", type=int, default=prompts.PROMPT_CHAT_CONTEXT_TOKENS)
+    parser.add_argument("--answers-budget", type=int, default=prompts.PROMPT_ASSESSMENT_ANSWERS_TOKENS)
+    args = parser.parse_args()
+
+    prefixes = set()
+    for name, count, answer_chars in (("assessment: 10 short answers", 10, 80),
+                                      ("assessment: 20 long answers", 20, 2000)):
+        data = answers(count, answer_chars)
+        _, result = measure(lambda: prompts.build_assessment_messages(data, args.answers_budget), args.repeat)
+        prefixes.add(("assessment", result["prefix_sha1"]))
+        print(json.dumps({"scenario": name, **result}))
+
+    for name, turns, response_chars, with_career in (("chat: first message", 0, 0, False),
+                                                     ("chat: 2 turns, career context", 2, 600, True),
+                                                     ("chat: 5 long turns, career context", 5, 1500, True)):
+        career, user_context, history = chat_inputs(turns, response_chars, with_career)
+        sections = prompts.mentor_context_sections(career, user_context, history)
+        trimmed = prompts.fit_sections(sections, args.chat_budget)["trimmed"]
+        _, result = measure(lambda: prompts.build_mentor_messages("Should I take up data science?", career,
+                                                                  user_context, history, args.chat_budget), args.repeat)
+        prefixes.add(("chat", result["prefix_sha1"]))
+        print(json.dumps({"scenario": name, **result, "trimmed_items": trimmed}))
+
+    print(json.dumps({"stable_prefixes": len(prefixes) == 2}))
+
+
+if __name__ == "__main__":
+    main()
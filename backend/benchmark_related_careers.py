@@ -0,0 +1,157 @@
+"""
+Benchmark for the related-careers index (career_similarity.py).
+
+Generates synthetic catalogs (skills, exams and job roles drawn from
+Zipf-distributed vocabularies, ~13 tokens per career like the seeded data)
+and reports per catalog size:
+
+- build: time for build_related_index over the whole catalog
+- naive query: what /api/careers/{slug}/related would cost without the index,
+  tokenizing every career and ranking them all by Jaccard on each request
+  (median over --queries random slugs, in memory, excluding the DB read)
+- indexed query: the precomputed top-k lookup (in memory)
+- overlap_at_k: share of the naive top-k slugs the index returns, and
+  score_ratio: summed Jaccard of the index's top-k over the naive top-k's. Tokens
+  in more than --max-token-frequency careers don't generate candidates, so
+  careers related only through very common tokens can be missed; score_ratio
+  shows how close the replacements are
+
+With --mongo the catalog is also written to a scratch database (--db-name,
+dropped afterwards) on MONGODB_URI and both query paths are timed against it:
+get_related_careers (one indexed find_one) versus loading every career's
+token fields and ranking them per request.
+
+Usage:
+    python benchmark_related_careers.py
+    python benchmark_related_careers.py --sizes 1000 5000 20000 --queries 50
+    python benchmark_related_careers.py --sizes 5000 --max-token-frequency 1000
+    python benchmark_related_careers.py --sizes 2000 --mongo --db-name prism_benchmark
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def zipf_choice(rng, vocabulary, exponent, count):
+    weights = [1 / (rank ** exponent) for rank in range(1, len(vocabulary) + 1)]
+    return set(rng.choices(vocabulary, weights=weights, k=count))
+
+
+def make_catalog(size: int, seed: int):
+    rng = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(max(200, size // 4))]
+    exams = [f"Exam {i}" for i in range(60)]
+    roles = [f"Role {i}" for i in range(max(100, size // 2))]
+    return [{
+        "slug": f"career-{index}",
+        "title": f"Career {index}",
+        "skills_required": [{"skill_name": name} for name in zipf_choice(rng, skills, 1.0, 7)],
+        "entrance_exams": [{"exam_name": name} for name in zipf_choice(rng, exams, 1.1, 3)],
+        "job_roles": [{"role_title": name} for name in zipf_choice(rng, roles, 0.8, 3)],
+    } for index in range(size)]
+
+
+def naive_related(cs, career, catalog, top_k):
+    tokens = cs.career_tokens(career)
+    entry = {"slug": career['slug'], "tokens": tokens}
+    candidates = [{"slug": other['slug'], "title": other['title'], "tokens": cs.career_tokens(other)}
+                  for other in catalog]
+    return cs._rank(entry, candidates, top_k)
+
+
+def median_us(function, samples):
+    timings = []
+    for sample in samples:
+        started = time.perf_counter()
+        function(sample)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1e6, 1)
+
+
+def run_mongo(cs, catalog, slugs, top_k):
+    import database
+
+    db = database.get_db_connection()
+    db['careers'].drop()
+    db['career_related'].drop()
+    db['careers'].insert_many([dict(career) for career in catalog])
+    db['careers'].create_index("slug", unique=True)
+    started = time.perf_counter()
+    cs.rebuild_related_careers(top_k=top_k)
+    rebuild_s = time.perf_counter() - started
+
+    def naive(slug):
+        everything = list(db['careers'].find({}, cs.TOKEN_FIELDS))
+        career = next(c for c in everything if c['slug'] == slug)
+        return naive_related(cs, career, everything, top_k)
+
+    indexed_us = median_us(lambda slug: cs.get_related_careers(slug, limit=top_k), slugs)
+    naive_us = median_us(naive, slugs[:max(1, len(slugs) // 5)])
+    started = time.perf_counter()
+    cs.update_related_careers(slugs[0], top_k=top_k)
+    incremental_ms = round((time.perf_counter() - started) * 1000, 2)
+    database.client.drop_database(db.name)
+    return {"mongo_rebuild_s": round(rebuild_s, 2), "mongo_indexed_query_us": indexed_us,
+            "mongo_naive_query_us": naive_us, "mongo_incremental_update_ms": incremental_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-token-frequency", type=int, default=None,
+                        help="candidate-generation cutoff (default: career_similarity.MAX_TOKEN_FREQUENCY)")
+    parser.add_argument("--mongo", action="store_true", help="also time the MongoDB-backed paths")
+    parser.add_argument("--db-name", default="prism_benchmark_related", help="scratch database for --mongo")
+    args = parser.parse_args()
+
+    if args.mongo:
+        os.environ['DB_NAME'] = args.db_name
+    import career_similarity as cs
+    max_token_frequency = args.max_token_frequency or cs.MAX_TOKEN_FREQUENCY
+
+    for size in args.sizes:
+        catalog = make_catalog(size, args.seed)
+        by_slug = {career['slug']: career for career in catalog}
+        slugs = random.Random(args.seed).sample(list(by_slug), min(args.queries, size))
+
+        started = time.perf_counter()
+        index = cs.build_related_index(catalog, top_k=args.top_k, max_token_frequency=max_token_frequency)
+        build_s = time.perf_counter() - started
+
+        naive_us = median_us(lambda slug: naive_related(cs, by_slug[slug], catalog, args.top_k), slugs)
+        indexed_us = median_us(lambda slug: index[slug]['related'] if slug in index else None, slugs)
+        overlaps, score_ratios = [], []
+        for slug in slugs:
+            expected = naive_related(cs, by_slug[slug], catalog, args.top_k)
+            got = index.get(slug, {}).get('related', [])
+            expected_slugs = {item['slug'] for item in expected}
+            overlaps.append(len(expected_slugs & {item['slug'] for item in got}) / len(expected) if expected else 1.0)
+            expected_score = sum(item['score'] for item in expected)
+            score_ratios.append(sum(item['score'] for item in got) / expected_score if expected_score else 1.0)
+
+        result = {
+            "careers": size,
+            "max_token_frequency": max_token_frequency,
+            "build_s": round(build_s, 3),
+            "naive_query_us": naive_us,
+            "indexed_query_us": indexed_us,
+            "overlap_at_k": round(statistics.mean(overlaps), 3),
+            "score_ratio": round(statistics.mean(score_ratios), 3),
+        }
+        if args.mongo:
+            result.update(run_mongo(cs, catalog, slugs, args.top_k))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark for response serialization (responses.py).
+
+For the payloads of the hot read routes it compares, per response:
+
+- fastapi: what a plain `return {...}` costs, jsonable_encoder followed by
+  JSONResponse's stdlib json.dumps
+- dumps: responses.dumps (orjson when installed), as FastJSONResponse renders
+- dumps_gzip: dumps plus gzip on every request, what CompressionMiddleware
+  costs a client sending Accept-Encoding: gzip when nothing is cached
+- cached: serving stored variants (PrecomputedJSON for the questions,
+  encode_variants/variant_response as the career detail and anonymous explore
+  caches do) to a client accepting br
+
+and prints the encoded size. Payloads: the real assessment questions (imported
+from main), a career detail document shaped like the seeded ones, and the
+explore listing at limit=100.
+
+Usage:
+    python benchmark_serialization.py
+    python benchmark_serialization.py --repeat 5000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import responses  # noqa: E402
+from compression import compress  # noqa: E402
+
+
+def career_detail(index: int = 0) -> dict:
+    """A career document as get_career_by_slug returns it (seeded shape)"""
+    return {
+        "id": str(ObjectId()),
+        "slug": f"career-{index}",
+        "title": f"Career {index}",
+        "category": "Technology",
+        "short_description": "Designs, builds and maintains software systems. " * 2,
+        "full_description": "Software engineers apply engineering principles to software. " * 20,
+        "avg_salary_min": 600000, "avg_salary_max": 2500000, "growth_prospects": "High",
+        "entrance_exams": [{"exam_name": f"Exam {n}", "exam_level": "National",
+                            "description": "Entrance examination for admission. " * 3} for n in range(4)],
+        "educational_paths": [{"degree_name": f"Degree {n}", "duration_years": 4,
+                               "institutions": ["IIT", "NIT", "BITS"]} for n in range(3)],
+        "skills_required": [{"skill_name": f"Skill {n}", "skill_category": "Technical", "importance": "High"}
+                            for n in range(8)],
+        "roadmap": [{"stage": f"Stage {n}", "title": f"Step {n}", "timeline": "1-2 years",
+                     "description": "What to do at this stage. " * 6} for n in range(6)],
+        "job_roles": [{"role_title": f"Role {n}", "experience_level": "Entry", "avg_salary": "₹6-10 LPA"}
+                      for n in range(5)],
+        "resources": [{"title": f"Resource {n}", "url": f"https://example.test/{n}", "type": "Course"}
+                      for n in range(6)],
+        "version": 3,
+        "updated_at": datetime.now(),
+    }
+
+
+def explore_summary(index: int) -> dict:
+    return {
+        "slug": f"career-{index}", "title": f"Career {index}", "category": "Technology",
+        "short_description": "Designs, builds and maintains software systems.",
+        "avg_salary": "₹6-25 LPA", "growth_prospects": "High",
+        "popular_exams": ["JEE Main", "JEE Advanced", "GATE"], "match_percentage": 80,
+    }
+
+
+def fastapi_default(content) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def median_us(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    from main import ASSESSMENT_QUESTIONS, ASSESSMENT_QUESTIONS_PAYLOAD
+
+    payloads = {
+        "questions": {"questions": ASSESSMENT_QUESTIONS},
+        "career_detail": {"career": career_detail()},
+        "explore_limit_100": {"careers": [explore_summary(i) for i in range(100)], "next_cursor": "abc",
+                              "total": 100},
+    }
+    print(json.dumps({"orjson": responses.orjson is not None}))
+    for name, content in payloads.items():
+        result = {
+            "payload": name,
+            "bytes": len(responses.dumps(content)),
+            "fastapi_us": median_us(lambda: fastapi_default(content), args.repeat),
+            "dumps_us": median_us(lambda: responses.dumps(content), args.repeat),
+            "dumps_gzip_us": median_us(lambda: compress(responses.dumps(content), "gzip"), args.repeat),
+        }
+        if name == "questions":
+            result["cached_us"] = median_us(lambda: ASSESSMENT_QUESTIONS_PAYLOAD.response("br", None), args.repeat)
+        else:
+            variants = responses.encode_variants(content)
+            result["cached_us"] = median_us(lambda: responses.variant_response(variants, "br"), args.repeat)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
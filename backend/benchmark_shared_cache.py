@@ -0,0 +1,152 @@
+"""
+Benchmark for shared_cache across several worker processes.
+
+Each worker runs a Zipf-distributed read workload over synthetic career
+documents (~5 KB each, like /api/careers/{slug}) through a SharedCache, with a
+small fraction of writes that invalidate the key in every worker, the way
+create_or_update_career_from_assessment does. Reports per configuration:
+
+- L1 / L2 hit rates and loader calls (each one would be a MongoDB read)
+- invalidation messages received from other workers
+- L1 bytes held per worker and in total, plus the shared tier's size
+- worker RSS growth over the run
+
+Usage:
+    python benchmark_shared_cache.py --workers 4 8
+    python benchmark_shared_cache.py --redis-url redis://localhost:6379/0
+    python benchmark_shared_cache.py --standin      # in-process Redis-protocol server (needs fakeredis)
+
+Without --redis-url/--standin only the L1-only ("local") configuration runs.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import shared_cache  # noqa: E402
+
+
+def make_document(index: int, version: int) -> dict:
+    return {
+        "slug": f"career-{index}",
+        "title": f"Career {index}",
+        "version": version,
+        "full_description": "x" * 3000,
+        "roadmap": [{"stage": f"Stage {n}", "title": f"Step {n}", "description": "y" * 150} for n in range(8)],
+    }
+
+
+def zipf_keys(keys: int, exponent: float, count: int, seed: int):
+    weights = [1 / (rank ** exponent) for rank in range(1, keys + 1)]
+    return random.Random(seed).choices(range(keys), weights=weights, k=count)
+
+
+def rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(index, args, backend_url, start, results):
+    if backend_url:
+        backend = shared_cache.RedisCacheBackend(backend_url)
+        backend.subscribe(shared_cache._dispatch_invalidation)
+    else:
+        backend = None
+    cache = shared_cache.SharedCache("bench", ttl=600, l1_size=args.l1_size, l1_ttl=600, backend=backend)
+    rng = random.Random(index)
+    loads = 0
+
+    def loader(key):
+        nonlocal loads
+        loads += 1
+        time.sleep(args.load_ms / 1000)
+        return make_document(key, loads)
+
+    keys = zipf_keys(args.keys, args.zipf, args.requests, seed=index)
+    rss_before = rss_kb()
+    start.wait()
+    started = time.perf_counter()
+    for key in keys:
+        if rng.random() < args.write_ratio:
+            cache.invalidate(str(key))
+        else:
+            cache.get_or_load(str(key), lambda: loader(key))
+    elapsed = time.perf_counter() - started
+    time.sleep(0.5)  # let in-flight invalidations arrive before reporting
+    results.put(dict(cache.stats, loads=loads, seconds=elapsed, l1_entries=len(cache._l1),
+                     l1_bytes=cache.l1_bytes(), rss_growth_kb=rss_kb() - rss_before))
+
+
+def run(args, workers, backend_url):
+    if backend_url:
+        import redis
+        redis.Redis.from_url(backend_url).flushdb()
+    context = multiprocessing.get_context("fork")
+    start, results = context.Barrier(workers), context.Queue()
+    processes = [context.Process(target=worker, args=(i, args, backend_url, start, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    total = lambda field: sum(s[field] for s in stats)
+    reads = total("l1_hits") + total("l2_hits") + total("misses")
+    summary = {
+        "workers": workers,
+        "backend": "redis" if backend_url else "local",
+        "l1_hit_rate": round(total("l1_hits") / reads, 4),
+        "l2_hit_rate": round(total("l2_hits") / reads, 4),
+        "loader_calls": total("loads"),
+        "invalidations_received": total("invalidations_received"),
+        "l1_bytes_per_worker": total("l1_bytes") // workers,
+        "l1_bytes_total": total("l1_bytes"),
+        "rss_growth_kb_per_worker": total("rss_growth_kb") // workers,
+        "reads_per_second": round(reads / max(s["seconds"] for s in stats)),
+    }
+    if backend_url:
+        import redis
+        client = redis.Redis.from_url(backend_url)
+        summary["shared_bytes"] = sum(len(client.get(key) or b"") for key in client.scan_iter("bench:*"))
+    return summary
+
+
+def start_standin():
+    """Serve the Redis protocol from a thread in this process (fakeredis), for machines without Redis"""
+    import threading
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--keys", type=int, default=2000, help="distinct documents")
+    parser.add_argument("--requests", type=int, default=20000, help="operations per worker")
+    parser.add_argument("--zipf", type=float, default=1.0, help="key popularity skew")
+    parser.add_argument("--write-ratio", type=float, default=0.01, help="fraction of operations that invalidate")
+    parser.add_argument("--l1-size", type=int, default=256, help="L1 entries per worker")
+    parser.add_argument("--load-ms", type=float, default=1.0, help="simulated MongoDB read latency")
+    parser.add_argument("--redis-url")
+    parser.add_argument("--standin", action="store_true", help="start a local Redis-protocol stand-in")
+    args = parser.parse_args()
+
+    backend_url = start_standin() if args.standin else args.redis_url
+    for workers in args.workers:
+        print(json.dumps(run(args, workers, None)))
+        if backend_url:
+            print(json.dumps(run(args, workers, backend_url)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Career requests: aggregated per career, reported to the admin in a digest.
+
+POST /api/career/request is normalized to the career's slug and recorded with
+one upsert into that career's document in `career_requests` ($inc counters,
+the last few messages kept). Who asked is kept out of that document, one
+`career_requesters` document per (career, requester) whose _id makes a repeat
+insert fail, so the aggregate stays small however many users ask. Repeat
+clicks only bump `request_count`; `requester_count` counts distinct users
+(the firebase uid, else the email) and backs the most-requested listing
+through the (status, requester_count) index. Anonymous requests (neither)
+reach the digest but never count as a distinct user.
+
+Instead of an email per click, CareerRequestDigestSender sends one digest
+every CAREER_REQUEST_DIGEST_SECONDS listing the careers requested since the
+previous digest (`pending_count`), so both Mongo writes and SMTP traffic grow
+with the number of distinct careers rather than the number of requests:
+
+- one worker claims each digest through the `career_request_digest` lock
+  document, so several API workers never send duplicates;
+- a failed digest keeps its pending counts and is retried with exponential
+  backoff; requests arriving while a digest is sent carry over to the next;
+- careers that have since been added to the catalog are marked "added" when
+  they are created (or, failing that, by the digest job) and filtered out of
+  digests and listings.
+
+smtplib is blocking, so every SMTP call runs in a worker thread and never
+stalls the event loop. The SMTP connection is reused until idle.
+
+For local development point SMTP_SERVER/SMTP_PORT at a debugging server (for
+example `python -m aiosmtpd -n -l localhost:1025`) with SMTP_STARTTLS=false;
+SMTP_USER/SMTP_PASSWORD may then be left empty.
+
+Configuration (environment):
+    SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
+    SMTP_STARTTLS                    "false" to skip STARTTLS (default true)
+    SMTP_IDLE_SECONDS                close the reused connection after this idle time (default 60)
+    CAREER_REQUEST_ADMIN_EMAIL       digest recipient
+    CAREER_REQUEST_DIGEST_SECONDS    time between digests (default 86400)
+    CAREER_REQUEST_DIGEST_MAX        careers listed per digest (default 100)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from database import get_db_connection, generate_slug
+
+if TYPE_CHECKING:
+    from email.message import EmailMessage
+
+DEFAULT_ADMIN_EMAIL = "moulik.023@gmail.com"
+DIGEST_ID = "digest"
+RECENT_REQUESTS_KEPT = 5
+RETRY_BASE_SECONDS = 300
+MAX_RETRY_SECONDS = 6 * 3600
+
+_indexes_ready = False
+
+
+def admin_email() -> str:
+    return os.getenv('CAREER_REQUEST_ADMIN_EMAIL', DEFAULT_ADMIN_EMAIL)
+
+
+def smtp_settings() -> Dict:
+    return {
+        "host": os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        "port": int(os.getenv('SMTP_PORT', '587')),
+        "user": os.getenv('SMTP_USER', ''),
+        "password": os.getenv('SMTP_PASSWORD', ''),
+        "starttls": os.getenv('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+
+def smtp_configured() -> bool:
+    """Credentials are set, or a server without auth/TLS is configured explicitly (local stand-in)"""
+    settings = smtp_settings()
+    if settings["user"] and settings["password"]:
+        return True
+    return bool(os.getenv('SMTP_SERVER')) and not settings["starttls"]
+
+
+# ----- aggregation -----
+
+def _collection():
+    global _indexes_ready
+    collection = get_db_connection()['career_requests']
+    if not _indexes_ready:
+        collection.create_index([("status", ASCENDING), ("requester_count", DESCENDING)])
+        collection.create_index([("pending_count", DESCENDING)], sparse=True)
+        _migrate_requester_sets(collection)
+        _indexes_ready = True
+    return collection
+
+
+def _requesters():
+    return get_db_connection()['career_requesters']
+
+
+def _migrate_requester_sets(collection):
+    """Move `requesters` arrays stored in aggregate documents (older layout) to career_requesters"""
+    for career in collection.find({"requesters": {"$exists": True}}, {"requesters": 1}):
+        documents = [{"_id": f"{career['_id']}:{requester}", "slug": career['_id'], "requester": requester}
+                     for requester in career['requesters']]
+        if documents:
+            try:
+                _requesters().insert_many(documents, ordered=False)
+            except BulkWriteError:
+                pass  # already moved by another worker
+        collection.update_one({"_id": career['_id']}, {"$unset": {"requesters": ""}})
+
+
+def _add_requester(slug: str, requester: str, now: datetime) -> bool:
+    """Record that requester asked for slug; False if they had already"""
+    try:
+        _requesters().insert_one({"_id": f"{slug}:{requester}", "slug": slug, "requester": requester,
+                                  "requested_at": now})
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def record_career_request(firebase_uid: str, career_title: str, user_email: str = '',
+                          user_name: str = '', message: str = '') -> Dict:
+    """
+    Count a request against the career's aggregate document: one insert into
+    career_requesters (when the requester is known) and one upsert.
+
+    Returns:
+        {"slug", "request_count", "requester_count", "new_requester"}
+    """
+    slug = generate_slug(career_title)
+    if not slug:
+        raise ValueError("Career title must contain letters or digits")
+    now = datetime.now()
+    collection = _collection()
+    requester = firebase_uid or user_email or None
+    new_requester = _add_requester(slug, requester, now) if requester else False
+
+    recent = {"name": user_name, "email": user_email, "message": message, "requested_at": now}
+    increments = {"request_count": 1, "requester_count": 1 if new_requester else 0,
+                  # Repeat clicks by a known requester don't reach the digest again
+                  "pending_count": 1 if new_requester or not requester else 0}
+    career = collection.find_one_and_update(
+        {"_id": slug},
+        {
+            "$inc": increments,
+            "$set": {"last_requested_at": now},
+            "$setOnInsert": {"title": career_title.strip(), "status": "open", "first_requested_at": now},
+            "$push": {"recent_requests": {"$each": [recent], "$slice": -RECENT_REQUESTS_KEPT}},
+        },
+        projection={"request_count": 1, "requester_count": 1}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return {"slug": slug, "request_count": career['request_count'],
+            "requester_count": career['requester_count'], "new_requester": new_requester}
+
+
+def _existing_slugs(careers: List[Dict]) -> set:
+    """Slugs of requested careers that are in the catalog by now"""
+    if not careers:
+        return set()
+    slugs = [career['_id'] for career in careers]
+    return {doc['slug'] for doc in get_db_connection()['careers'].find({"slug": {"$in": slugs}}, {"slug": 1})}
+
+
+def mark_careers_added(slugs: List[str]):
+    """Close the requests for careers that now exist (career write paths and the digest job)"""
+    if slugs:
+        get_db_connection()['career_requests'].update_many(
+            {"_id": {"$in": list(slugs)}, "status": "open"},
+            {"$set": {"status": "added", "pending_count": 0}}
+        )
+
+
+def get_most_requested_careers(limit: int = 20) -> List[Dict]:
+    """Missing careers with the most distinct requesters"""
+    careers = list(_collection().find(
+        {"status": "open"},
+        {"title": 1, "request_count": 1, "requester_count": 1, "first_requested_at": 1, "last_requested_at": 1}
+    ).sort("requester_count", DESCENDING).limit(limit))
+    # Read-only: careers added since are filtered here and closed by the write paths
+    existing = _existing_slugs(careers)
+    return [{
+        "slug": career['_id'],
+        "title": career.get('title'),
+        "requester_count": career.get('requester_count', 0),
+        "request_count": career.get('request_count', 0),
+        "first_requested_at": career['first_requested_at'].isoformat() if career.get('first_requested_at') else None,
+        "last_requested_at": career['last_requested_at'].isoformat() if career.get('last_requested_at') else None,
+    } for career in careers if career['_id'] not in existing]
+
+
+def get_pending_digest_careers(limit: int) -> List[Dict]:
+    careers = list(_collection().find(
+        {"status": "open", "pending_count": {"$gt": 0}}
+    ).sort("requester_count", DESCENDING).limit(limit))
+    # Catch careers added by paths that don't close requests (e.g. seeding)
+    existing = _existing_slugs(careers)
+    mark_careers_added(existing)
+    return [career for career in careers if career['_id'] not in existing]
+
+
+def mark_digested(careers: List[Dict]):
+    """Subtract what the digest reported; requests that arrived meanwhile stay pending"""
+    now = datetime.now()
+    operations = [
+        UpdateOne({"_id": career['_id']}, {"$inc": {"pending_count": -career['pending_count']},
+                                           "$set": {"last_digest_at": now}})
+        for career in careers
+    ]
+    if operations:
+        _collection().bulk_write(operations, ordered=False)
+
+
+# ----- digest scheduling -----
+
+def _digest_collection():
+    return get_db_connection()['career_request_digest']
+
+
+def claim_digest(interval: float) -> bool:
+    """Take the digest slot if it is due (at most one worker wins)"""
+    now = datetime.now()
+    try:
+        _digest_collection().find_one_and_update(
+            {"_id": DIGEST_ID, "$or": [{"next_digest_at": {"$lte": now}}, {"next_digest_at": {"$exists": False}}]},
+            {"$set": {"next_digest_at": now + timedelta(seconds=interval), "claimed_at": now}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def record_digest_result(sent_careers: int, error: Optional[str] = None):
+    """Store the outcome; a failed digest is rescheduled with exponential backoff"""
+    collection = _digest_collection()
+    now = datetime.now()
+    if error is None:
+        collection.update_one({"_id": DIGEST_ID}, {"$set": {
+            "last_sent_at": now, "last_careers": sent_careers, "failures": 0, "last_error": None
+        }})
+        return
+    digest = collection.find_one({"_id": DIGEST_ID}, {"failures": 1}) or {}
+    failures = digest.get('failures', 0) + 1
+    delay = min(MAX_RETRY_SECONDS, RETRY_BASE_SECONDS * (2 ** (failures - 1)))
+    collection.update_one({"_id": DIGEST_ID}, {"$set": {
+        "failures": failures, "last_error": error[:500], "next_digest_at": now + timedelta(seconds=delay)
+    }})
+
+
+def get_digest_status() -> Dict:
+    digest = _digest_collection().find_one({"_id": DIGEST_ID}) or {}
+    digest.pop('_id', None)
+    for field in ("next_digest_at", "claimed_at", "last_sent_at"):
+        if isinstance(digest.get(field), datetime):
+            digest[field] = digest[field].isoformat()
+    digest["pending_careers"] = _collection().count_documents({"status": "open", "pending_count": {"$gt": 0}})
+    return digest
+
+
+# ----- email -----
+
+def build_digest_email(careers: List[Dict], sender: str, recipient: str) -> "EmailMessage":
+    # smtplib and email are imported on first send, not at app import
+    from email.message import EmailMessage
+
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = recipient
+    message['Subject'] = f"Career requests digest: {len(careers)} career{'s' if len(careers) != 1 else ''} requested"
+
+    lines = [
+        f"Hello Admin ({recipient}),",
+        "",
+        "Users have requested these careers that are not in the Prism database yet",
+        "(most requested first; counts are since the previous digest / all time):",
+        "",
+    ]
+    for career in careers:
+        lines.append(f"- {career.get('title')} (slug: {career['_id']}): "
+                     f"{career['pending_count']} new / {career.get('requester_count', 0)} users, "
+                     f"{career.get('request_count', 0)} requests")
+        for request in career.get('recent_requests', [])[-3:]:
+            who = request.get('name') or 'User'
+            if request.get('email'):
+                who += f" <{request['email']}>"
+            note = f": {request['message']}" if request.get('message') else ""
+            lines.append(f"    • {who}{note}")
+    lines += [
+        "",
+        "Please add these careers with complete information including description, roadmap steps,",
+        "entrance exams, educational paths, required skills, job roles and learning resources.",
+        "",
+        "Thank you!",
+        "Prism Career Guidance System",
+    ]
+    message.set_content("\n".join(lines))
+    return message
+
+
+class SMTPConnection:
+    """One reusable SMTP session, (re)opened on demand and closed when idle"""
+
+    def __init__(self, settings: Optional[Dict] = None, idle_seconds: float = None):
+        self.settings = settings or smtp_settings()
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(os.getenv('SMTP_IDLE_SECONDS', '60'))
+        self._smtp = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _open(self):
+        import smtplib
+        smtp = smtplib.SMTP(self.settings["host"], self.settings["port"], timeout=30)
+        if self.settings["starttls"]:
+            smtp.starttls()
+        if self.settings["user"] and self.settings["password"]:
+            smtp.login(self.settings["user"], self.settings["password"])
+        self._smtp = smtp
+        self.connects += 1
+
+    def send(self, message: "EmailMessage"):
+        """Send one message, reconnecting once if the server dropped the idle session"""
+        import smtplib
+        if self._smtp is None:
+            self._open()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._smtp = None
+            self._open()
+            self._smtp.send_message(message)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+            self.close()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except OSError:  # smtplib.SMTPException included
+                pass
+            self._smtp = None
+
+
+# ----- background sender -----
+
+class CareerRequestDigestSender:
+    """Sends the periodic career-request digest over a reused SMTP connection"""
+
+    def __init__(self, interval: float = None, max_careers: int = None,
+                 connection: Optional[SMTPConnection] = None):
+        self.interval = interval if interval is not None else float(os.getenv('CAREER_REQUEST_DIGEST_SECONDS', '86400'))
+        self.max_careers = max_careers if max_careers is not None else int(os.getenv('CAREER_REQUEST_DIGEST_MAX', '100'))
+        self.poll_interval = min(60.0, self.interval)
+        self.connection = connection or SMTPConnection()
+        self._task = None
+        self.metrics = {"digests": 0, "careers_reported": 0, "failed": 0, "last_digest_ms": 0.0}
+
+    def send_digest(self) -> int:
+        """Send the digest if due (runs in a worker thread). Returns careers reported."""
+        self.connection.close_if_idle()
+        if not claim_digest(self.interval):
+            return 0
+        careers = get_pending_digest_careers(self.max_careers)
+        if not careers:
+            record_digest_result(0)
+            return 0
+
+        started = time.perf_counter()
+        sender = self.connection.settings["user"] or f"prism@{self.connection.settings['host']}"
+        try:
+            self.connection.send(build_digest_email(careers, sender, admin_email()))
+        except OSError as e:  # smtplib.SMTPException included
+            self.metrics["failed"] += 1
+            record_digest_result(0, error=str(e))
+            print(f"⚠️ Career request digest failed: {e}")
+            return 0
+        mark_digested(careers)
+        record_digest_result(len(careers))
+        self.metrics["digests"] += 1
+        self.metrics["careers_reported"] += len(careers)
+        self.metrics["last_digest_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        print(f"✅ Career request digest sent ({len(careers)} careers)")
+        return len(careers)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.send_digest)
+            except Exception as e:
+                print(f"⚠️ Career request digest sender failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"✅ Career request digest sender started (every {int(self.interval)}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.connection.close)
+
+    def status(self) -> Dict:
+        return dict(self.metrics, running=self._task is not None, smtp_connects=self.connection.connects)
+
+
+_sender = None
+
+
+def get_career_request_sender() -> CareerRequestDigestSender:
+    global _sender
+    if _sender is None:
+        _sender = CareerRequestDigestSender()
+    return _sender
@@ -0,0 +1,246 @@
+"""
+Related-careers index using sparse Jaccard similarity over skills, entrance
+exams and job roles.
+
+Each career is reduced to a set of type-prefixed tokens ("skill:git/github",
+"exam:gate", ...). Candidates are found through an inverted token index
+instead of comparing against every career, then ranked by exact Jaccard
+similarity. Tokens shared by a large share of the catalog (e.g.
+"skill:communication") are skipped for candidate generation so posting lists
+stay short as the catalog grows.
+
+The index is built offline (seed / CLI), refreshed incrementally by the
+career write paths in database.py, and stored in the `career_related`
+collection, one document per career holding its tokens and a precomputed
+top-k list of related careers. Serving related careers is then a single
+indexed lookup by slug, independent of catalog size.
+
+Usage:
+    python career_similarity.py            # rebuild the whole index
+    python career_similarity.py slug ...   # incrementally (re)index careers
+"""
+
+import heapq
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING
+
+from database import get_db_connection
+
+TOP_K = 10
+
+# Tokens present in more than this many careers don't generate candidates
+MAX_TOKEN_FREQUENCY = 200
+
+# Fields needed to compute a career's token set
+TOKEN_FIELDS = {
+    "slug": 1, "title": 1,
+    "skills_required.skill_name": 1,
+    "entrance_exams.exam_name": 1,
+    "job_roles.role_title": 1
+}
+
+
+def career_tokens(career: Dict) -> List[str]:
+    """Normalized, type-prefixed feature tokens for a career document"""
+    tokens = set()
+    for skill in career.get('skills_required') or []:
+        if skill.get('skill_name'):
+            tokens.add("skill:" + skill['skill_name'].strip().lower())
+    for exam in career.get('entrance_exams') or []:
+        if exam.get('exam_name'):
+            tokens.add("exam:" + exam['exam_name'].strip().lower())
+    for role in career.get('job_roles') or []:
+        if role.get('role_title'):
+            tokens.add("role:" + role['role_title'].strip().lower())
+    return sorted(tokens)
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    set_a, set_b = set(a), set(b)
+    if not set_a or not set_b:
+        return 0.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+
+def _rank(entry: Dict, candidates: List[Dict], top_k: int) -> List[Dict]:
+    """Rank candidate careers by exact Jaccard similarity of their token sets"""
+    scored = []
+    for other in candidates:
+        if other['slug'] == entry['slug']:
+            continue
+        score = jaccard(entry['tokens'], other['tokens'])
+        if score > 0:
+            scored.append({"slug": other['slug'], "title": other.get('title'), "score": round(score, 4)})
+    scored.sort(key=lambda item: (-item['score'], item['slug']))
+    return scored[:top_k]
+
+
+def build_related_index(careers, top_k: int = TOP_K,
+                        max_token_frequency: int = MAX_TOKEN_FREQUENCY) -> Dict[str, Dict]:
+    """
+    Build index entries for an iterable of career documents in memory.
+
+    Returns:
+        Dict of slug -> {slug, title, tokens, related}
+    """
+    entries = {}
+    postings = {}
+    for career in careers:
+        tokens = career_tokens(career)
+        if not tokens:
+            continue
+        entries[career['slug']] = {"slug": career['slug'], "title": career.get('title'), "tokens": tokens}
+        for token in tokens:
+            postings.setdefault(token, []).append(career['slug'])
+
+    # Candidates come from the selective posting lists; each is then scored by
+    # exact Jaccard (frequent tokens still count towards the overlap, they just
+    # don't generate candidates)
+    token_sets = {slug: set(entry['tokens']) for slug, entry in entries.items()}
+    for entry in entries.values():
+        candidates = set()
+        for token in entry['tokens']:
+            posting = postings[token]
+            if len(posting) <= max_token_frequency:
+                candidates.update(posting)
+        candidates.discard(entry['slug'])
+        tokens = token_sets[entry['slug']]
+        scores = []
+        for other_slug in candidates:
+            other = token_sets[other_slug]
+            shared = len(tokens & other)
+            score = shared / (len(tokens) + len(other) - shared)
+            scores.append((-round(score, 4), other_slug))
+        entry['related'] = [
+            {"slug": other_slug, "title": entries[other_slug]['title'], "score": -neg_score}
+            for neg_score, other_slug in heapq.nsmallest(top_k, scores)
+        ]
+
+    return entries
+
+
+_indexes_ready = False
+
+def _related_collection():
+    global _indexes_ready
+    collection = get_db_connection()['career_related']
+    if not _indexes_ready:
+        collection.create_index([("slug", ASCENDING)], unique=True)
+        collection.create_index([("tokens", ASCENDING)])
+        _indexes_ready = True
+    return collection
+
+
+def rebuild_related_careers(top_k: int = TOP_K) -> int:
+    """Offline full rebuild of the related-careers index. Returns number of indexed careers."""
+    db = get_db_connection()
+    entries = build_related_index(db['careers'].find({}, TOKEN_FIELDS), top_k=top_k)
+
+    collection = _related_collection()
+    collection.delete_many({})
+    now = datetime.now()
+    documents = [dict(entry, updated_at=now) for entry in entries.values()]
+    if documents:
+        collection.insert_many(documents, ordered=False)
+    return len(documents)
+
+
+def _score_in_index(collection, entry: Dict, max_token_frequency: int):
+    """
+    Score one entry against the stored index via its selective tokens.
+
+    Returns:
+        (all similar careers ranked, the index documents that were scored)
+    """
+    selective_tokens = [
+        token for token in entry['tokens']
+        if collection.count_documents({"tokens": token}, limit=max_token_frequency + 1) <= max_token_frequency
+    ]
+    neighbours = list(collection.find(
+        {"tokens": {"$in": selective_tokens}, "slug": {"$ne": entry['slug']}},
+        {"slug": 1, "title": 1, "tokens": 1, "related": 1}
+    ))
+    return _rank(entry, neighbours, len(neighbours)), neighbours
+
+
+def _refill_related(collection, others: List[Dict], top_k: int, max_token_frequency: int) -> None:
+    """Recompute the related lists of careers whose top-k lost (or demoted) an entry"""
+    for other in others:
+        if not other.get('tokens'):
+            continue
+        scored, _ = _score_in_index(collection, other, max_token_frequency)
+        collection.update_one({"_id": other['_id']}, {"$set": {"related": scored[:top_k]}})
+
+
+def update_related_careers(slug: str, top_k: int = TOP_K,
+                           max_token_frequency: int = MAX_TOKEN_FREQUENCY) -> Optional[List[Dict]]:
+    """
+    Incrementally (re)index one career after it was added or edited.
+
+    Only careers sharing a token with it (now or before the edit) are touched:
+    their related lists get this career merged in. A list that loses this career
+    (or ranks it lower) is recomputed, since the career that now belongs in its
+    top-k was never in the list.
+    """
+    db = get_db_connection()
+    collection = _related_collection()
+    career = db['careers'].find_one({"slug": slug}, TOKEN_FIELDS)
+
+    tokens = career_tokens(career) if career else []
+    if not tokens:
+        listed_by = list(collection.find({"related.slug": slug}, {"slug": 1, "title": 1, "tokens": 1}))
+        collection.delete_one({"slug": slug})
+        _refill_related(collection, listed_by, top_k, max_token_frequency)
+        return None
+
+    entry = {"slug": slug, "title": career.get('title'), "tokens": tokens}
+    scored, neighbours = _score_in_index(collection, entry, max_token_frequency)
+    entry['related'] = scored[:top_k]
+    entry['updated_at'] = datetime.now()
+    collection.replace_one({"slug": slug}, entry, upsert=True)
+
+    # Refresh this career's position in every neighbour's top-k, including
+    # careers that listed it before the edit but no longer share a token
+    scores = {item['slug']: item['score'] for item in scored}
+    seen = {other['slug'] for other in neighbours}
+    neighbours += list(collection.find(
+        {"related.slug": slug, "slug": {"$nin": list(seen | {slug})}},
+        {"slug": 1, "title": 1, "tokens": 1, "related": 1}
+    ))
+    refill = []
+    for other in neighbours:
+        previous = next((item['score'] for item in other.get('related', []) if item['slug'] == slug), None)
+        score = scores.get(other['slug'])
+        if previous is not None and (score is None or score < previous):
+            refill.append(other)
+            continue
+        related = [item for item in other.get('related', []) if item['slug'] != slug]
+        if score is not None:
+            related.append({"slug": slug, "title": entry['title'], "score": score})
+            related.sort(key=lambda item: (-item['score'], item['slug']))
+        collection.update_one({"_id": other['_id']}, {"$set": {"related": related[:top_k]}})
+    _refill_related(collection, refill, top_k, max_token_frequency)
+
+    return entry['related']
+
+
+def get_related_careers(slug: str, limit: int = 5) -> Optional[List[Dict]]:
+    """Precomputed related careers for a slug (None if the career isn't indexed)"""
+    db = get_db_connection()
+    entry = db['career_related'].find_one({"slug": slug}, {"related": {"$slice": limit}})
+    if not entry:
+        return None
+    return entry.get('related', [])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for career_slug in sys.argv[1:]:
+            related = update_related_careers(career_slug)
+            print(f"✅ Indexed {career_slug}: {len(related or [])} related careers")
+    else:
+        count = rebuild_related_careers()
+        print(f"✅ Related-careers index rebuilt for {count} careers")
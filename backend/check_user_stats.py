@@ -0,0 +1,41 @@
+"""
+Consistency check and backfill for the dashboard counters on user documents.
+
+Recounts assessments, chat messages and selected careers per user from the
+source collections and compares them with `users.stats` (see
+user_database.check_user_stats). Run with --repair once after deploying the
+counters to backfill existing users, and periodically to catch drift (e.g.
+a write-behind batch whose counter update failed).
+
+Usage:
+    python check_user_stats.py                     # report mismatches
+    python check_user_stats.py --repair            # report and fix them
+    python check_user_stats.py --user <firebase_uid>
+
+Exits with status 1 if mismatches were found and not repaired.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from user_database import check_user_stats  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="overwrite mismatched counters with recounted values")
+    parser.add_argument("--user", help="only check this firebase_uid")
+    args = parser.parse_args()
+
+    report = check_user_stats(firebase_uid=args.user, repair=args.repair)
+    print(json.dumps(report, indent=2, default=str))
+    if report["mismatched"] and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
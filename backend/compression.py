@@ -0,0 +1,192 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses responses with brotli (when the optional
+`brotli` package is installed) or gzip, whichever the client's Accept-Encoding
+prefers. Only bodies whose content type is in COMPRESSIBLE_TYPES and that reach
+COMPRESSION_MIN_SIZE bytes are compressed; small payloads aren't worth the CPU
+or the framing overhead. Streaming responses are compressed chunk by chunk.
+
+Responses that already carry a Content-Encoding pass through untouched, which
+lets pre-serialized payloads (responses.PrecomputedJSON) be compressed once and
+served as stored bytes.
+
+Configuration (environment):
+    COMPRESSION_MIN_SIZE   smallest body to compress, in bytes (default 1024)
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+}
+
+# Per-request compression favours speed; payloads compressed once use the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+GZIP_LEVEL_STATIC = 9
+BROTLI_QUALITY_STATIC = 11
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported encoding the client accepts ("br" over "gzip"), or None"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+    for encoding in supported_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a complete body"""
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY_STATIC if static else BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL_STATIC if static else GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _StreamCompressor:
+    """Incremental compressor with one interface for gzip and brotli"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 content_types=COMPRESSIBLE_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = set(content_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self.minimum_size, self.content_types)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingResponder:
+    """Wraps `send`: holds the response start until the first body chunk decides eligibility"""
+
+    def __init__(self, send, encoding: str, minimum_size: int, content_types):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.start_message = None
+        self.mode = None  # None (undecided), "passthrough" or "stream"
+        self.compressor = None
+
+    def _eligible(self) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+        if "content-encoding" in headers:
+            return False
+        if self.start_message["status"] < 200 or self.start_message["status"] in (204, 304):
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in self.content_types
+
+    def _set_encoding_headers(self, content_length: Optional[int]):
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode is None:
+            if not self._eligible() or (not more_body and len(body) < self.minimum_size):
+                self.mode = "passthrough"
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            if not more_body:
+                compressed = compress(body, self.encoding)
+                self._set_encoding_headers(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.mode = "stream"
+            self.compressor = _StreamCompressor(self.encoding)
+            self._set_encoding_headers(None)
+            await self.send(self.start_message)
+
+        if self.mode == "passthrough":
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
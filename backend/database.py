@@ -1,7 +1,12 @@
 import os
-from pymongo import MongoClient
+import json
+import base64
+from datetime import datetime, timezone
+from typing import List, Optional
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
 from dotenv import load_dotenv
 from bson.objectid import ObjectId
+from shared_cache import career_cache, catalog_cache
 
 load_dotenv()
 
@@ -42,44 +47,326 @@ def get_career_by_slug(slug: str):
     
     return career
 
+def get_career_version(slug: str):
+    """
+    Version info for conditional GETs, read without loading the document.
+
+    Returns:
+        {"id", "version", "updated_at"} or None if the career doesn't exist.
+        Careers never written since seeding fall back to their ObjectId
+        creation time for updated_at.
+    """
+    ensure_career_indexes()
+    db = get_db_connection()
+    career = db['careers'].find_one({"slug": slug}, {"version": 1, "updated_at": 1})
+    if not career:
+        return None
+    updated_at = career.get('updated_at')
+    if not isinstance(updated_at, datetime):
+        updated_at = career['_id'].generation_time if isinstance(career['_id'], ObjectId) else None
+    return {"id": str(career['_id']), "version": career.get('version', 0), "updated_at": as_utc(updated_at)}
+
+# Projection used by every catalog listing (explore, filters, pagination)
+CAREER_SUMMARY_FIELDS = {
+    "slug": 1, "title": 1, "category": 1, "short_description": 1,
+    "avg_salary_min": 1, "avg_salary_max": 1, "popular_exams": 1,
+    "entrance_exams.exam_name": 1
+}
+
+# Supported sort orders for the explore catalog: name -> (field, direction).
+# Every sort is tie-broken on slug so keyset cursors are stable.
+CAREER_SORTS = {
+    "title": ("title", ASCENDING),
+    "salary_asc": ("avg_salary_min", ASCENDING),
+    "salary_desc": ("avg_salary_max", DESCENDING),
+}
+
+FACETS_ID = "careers"
+
+_indexes_ready = False
+
+def ensure_career_indexes():
+    """Create the indexes backing slug lookups and catalog filtering (idempotent)"""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    db = get_db_connection()
+    careers_collection = db['careers']
+    careers_collection.create_index([("slug", ASCENDING)])
+    careers_collection.create_index([("title", ASCENDING), ("slug", ASCENDING)])
+    careers_collection.create_index([("category", ASCENDING), ("title", ASCENDING), ("slug", ASCENDING)])
+    careers_collection.create_index([("avg_salary_min", ASCENDING), ("slug", ASCENDING)])
+    careers_collection.create_index([("avg_salary_max", DESCENDING), ("slug", ASCENDING)])
+    careers_collection.create_index([("entrance_exams.exam_name", ASCENDING)])
+    careers_collection.create_index([("popular_exams", ASCENDING)])
+    _indexes_ready = True
+
+def _format_career_summary(career):
+    """Shape a projected career document for catalog responses"""
+    # Format salary
+    if career.get('avg_salary_min') and career.get('avg_salary_max'):
+        min_lpa = career['avg_salary_min'] // 100000
+        max_lpa = career['avg_salary_max'] // 100000
+        career['avg_salary'] = f"₹{min_lpa}-{max_lpa} LPA"
+    else:
+        career['avg_salary'] = "Varies"
+
+    # Ensure popular_exams is a list of strings
+    entrance_exams = career.pop('entrance_exams', None)
+    if 'popular_exams' not in career:
+        # Fall back to embedded entrance_exams if popular_exams not explicitly set
+        if entrance_exams:
+            career['popular_exams'] = [exam['exam_name'] for exam in entrance_exams[:5] if exam.get('exam_name')]
+        else:
+            career['popular_exams'] = []
+
+    if '_id' in career:
+        del career['_id']
+
+    return career
+
+def _career_exam_names(career):
+    """All exam names attached to a career document"""
+    if career.get('popular_exams'):
+        return list(career['popular_exams'])
+    return [exam['exam_name'] for exam in career.get('entrance_exams') or [] if exam.get('exam_name')]
+
+def as_utc(value):
+    """Mark a datetime read from MongoDB (naive, in UTC) as UTC; cached values must be aware
+    because the shared cache decodes every datetime as aware UTC"""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _facet_key(name):
+    """Make a facet value safe to use as a MongoDB field name"""
+    return str(name).replace('.', '\uff0e').replace('$', '\uff04')
+
+def _facet_name(key):
+    """Inverse of _facet_key"""
+    return key.replace('\uff0e', '.').replace('\uff04', '$')
+
+def get_career_slug_by_id(career_id: str):
+    """Resolve a career's string id (as returned by get_career_by_slug) to its slug"""
+    try:
+        object_id = ObjectId(career_id)
+    except Exception:
+        return None
+    db = get_db_connection()
+    career = db['careers'].find_one({"_id": object_id}, {"slug": 1})
+    return career['slug'] if career else None
+
 def get_all_careers():
     """Fetch all careers with basic info"""
     db = get_db_connection()
     careers_collection = db['careers']
     
     # Fetch all careers, projecting only necessary fields
-    cursor = careers_collection.find(
-        {}, 
-        {
-            "slug": 1, "title": 1, "category": 1, "short_description": 1,
-            "avg_salary_min": 1, "avg_salary_max": 1, "popular_exams": 1
-        }
-    ).sort("title", 1)
+    cursor = careers_collection.find({}, CAREER_SUMMARY_FIELDS).sort("title", 1)
     
+    return [_format_career_summary(career) for career in cursor]
+
+def get_career_summaries(slugs: List[str]):
+    """Catalog summaries for the given slugs, in the order given (unknown slugs are skipped)"""
+    db = get_db_connection()
+    found = {career['slug']: _format_career_summary(career)
+             for career in db['careers'].find({"slug": {"$in": list(slugs)}}, CAREER_SUMMARY_FIELDS)}
+    return [found[slug] for slug in slugs if slug in found]
+
+def encode_career_cursor(sort_value, slug):
+    """Encode the last (sort value, slug) pair of a page as an opaque cursor"""
+    raw = json.dumps([sort_value, slug], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_career_cursor(cursor: str):
+    """Decode a cursor produced by encode_career_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, slug = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(slug, str):
+        raise ValueError("Invalid cursor")
+    return sort_value, slug
+
+def _keyset_condition(field, direction, last_value, last_slug):
+    """Filter selecting documents strictly after (last_value, last_slug) in sort order.
+
+    Missing/null values sort before numbers ascending and after them descending,
+    so they need their own branch.
+    """
+    after_tie = {field: last_value, "slug": {"$gt": last_slug}}
+    if last_value is None:
+        if direction == ASCENDING:
+            return {"$or": [after_tie, {field: {"$ne": None}}]}
+        return after_tie
+    op = "$gt" if direction == ASCENDING else "$lt"
+    branches = [{field: {op: last_value}}, after_tie]
+    if direction == DESCENDING:
+        branches.append({field: None})
+    return {"$or": branches}
+
+def query_careers(category: Optional[str] = None, salary_min: Optional[int] = None,
+                  salary_max: Optional[int] = None, exam: Optional[str] = None,
+                  sort: str = "title", limit: Optional[int] = None,
+                  cursor: Optional[str] = None):
+    """
+    Filter, sort and keyset-paginate the career catalog in MongoDB.
+
+    Salary filters select careers whose [avg_salary_min, avg_salary_max] band
+    overlaps the requested range (values in INR per annum).
+
+    Returns:
+        (careers, next_cursor) - next_cursor is None on the last page
+    """
+    if sort not in CAREER_SORTS:
+        raise ValueError(f"Unsupported sort '{sort}'. Use one of: {', '.join(CAREER_SORTS)}")
+    field, direction = CAREER_SORTS[sort]
+
+    ensure_career_indexes()
+    db = get_db_connection()
+    careers_collection = db['careers']
+
+    clauses = []
+    if category:
+        clauses.append({"category": category})
+    if salary_min is not None:
+        clauses.append({"avg_salary_max": {"$gte": salary_min}})
+    if salary_max is not None:
+        clauses.append({"avg_salary_min": {"$lte": salary_max}})
+    if exam:
+        clauses.append({"$or": [{"popular_exams": exam}, {"entrance_exams.exam_name": exam}]})
+    if cursor:
+        last_value, last_slug = decode_career_cursor(cursor)
+        clauses.append(_keyset_condition(field, direction, last_value, last_slug))
+
+    query = {"$and": clauses} if clauses else {}
+    find_cursor = careers_collection.find(query, CAREER_SUMMARY_FIELDS).sort(
+        [(field, direction), ("slug", ASCENDING)]
+    )
+    if limit:
+        # Fetch one extra document to know whether another page exists
+        find_cursor = find_cursor.limit(limit + 1)
+
     careers = []
-    for career in cursor:
-        # Format salary
-        if career.get('avg_salary_min') and career.get('avg_salary_max'):
-            min_lpa = career['avg_salary_min'] // 100000
-            max_lpa = career['avg_salary_max'] // 100000
-            career['avg_salary'] = f"₹{min_lpa}-{max_lpa} LPA"
-        else:
-            career['avg_salary'] = "Varies"
-            
-        # Ensure popular_exams is a list of strings
-        if 'popular_exams' not in career:
-             # Try to fetch from embedded entrance_exams if popular_exams not explicitly set
-             if 'entrance_exams' in career:
-                 career['popular_exams'] = [exam['exam_name'] for exam in career['entrance_exams'][:5]]
-             else:
-                 career['popular_exams'] = []
-        
-        if '_id' in career:
-            del career['_id']
-            
+    next_cursor = None
+    for career in find_cursor:
+        if limit and len(careers) == limit:
+            last = careers[-1]
+            next_cursor = encode_career_cursor(last['_sort_value'], last['slug'])
+            break
+        career['_sort_value'] = career.get(field)
         careers.append(career)
-            
-    return careers
+
+    for career in careers:
+        del career['_sort_value']
+        _format_career_summary(career)
+
+    return careers, next_cursor
+
+def iter_careers_for_export(fields: Optional[List[str]] = None, batch_size: int = 100):
+    """
+    Stream full career documents (embedded roadmap, skills, exams...) from a
+    MongoDB cursor without materializing the catalog.
+
+    Args:
+        fields: Optional list of top-level/dotted fields to include (slug is always included)
+        batch_size: Documents fetched from MongoDB per round trip
+
+    Yields:
+        Career documents with '_id' replaced by a string 'id'
+    """
+    db = get_db_connection()
+    careers_collection = db['careers']
+
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection["slug"] = 1
+
+    cursor = careers_collection.find({}, projection).sort("slug", ASCENDING).batch_size(batch_size)
+    try:
+        for career in cursor:
+            if '_id' in career:
+                career['id'] = str(career.pop('_id'))
+            yield career
+    finally:
+        cursor.close()
+
+def rebuild_career_facets():
+    """Recompute the catalog facet document from scratch (seeding / repair)"""
+    db = get_db_connection()
+    careers_collection = db['careers']
+
+    categories = {}
+    exams = {}
+    total_careers = 0
+    total_exams = 0
+    for career in careers_collection.find({}, {"category": 1, "popular_exams": 1, "entrance_exams.exam_name": 1}):
+        total_careers += 1
+        if career.get('category'):
+            key = _facet_key(career['category'])
+            categories[key] = categories.get(key, 0) + 1
+        exam_names = _career_exam_names(career)
+        total_exams += len(exam_names)
+        for name in exam_names:
+            key = _facet_key(name)
+            exams[key] = exams.get(key, 0) + 1
+
+    facets = {
+        "total_careers": total_careers,
+        "total_exams": total_exams,
+        "categories": categories,
+        "exams": exams,
+        "updated_at": datetime.now(timezone.utc)
+    }
+    # `version` counts catalog changes; explore ETags are derived from it
+    facets = db['catalog_facets'].find_one_and_update(
+        {"_id": FACETS_ID},
+        {"$set": facets, "$inc": {"version": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    catalog_cache.invalidate("facets")
+    return facets
+
+def _load_career_facets():
+    db = get_db_connection()
+    facets = db['catalog_facets'].find_one({"_id": FACETS_ID})
+    if not facets:
+        facets = rebuild_career_facets()
+    facets.pop('_id', None)
+    for field in ('categories', 'exams'):
+        facets[field] = {_facet_name(key): count for key, count in (facets.get(field) or {}).items()}
+    facets['updated_at'] = as_utc(facets.get('updated_at'))
+    return facets
+
+def get_career_facets():
+    """Read the precomputed catalog facets (shared cache), building them once if missing"""
+    return catalog_cache.get_or_load("facets", _load_career_facets)
+
+def _update_career_facets(old_category: Optional[str], new_category: Optional[str], is_new: bool):
+    """Incrementally adjust facet counts and bump the catalog version after a career write"""
+    _update_career_facets_batch([(old_category, new_category, is_new)])
+
+def _update_career_facets_batch(changes):
+    """Apply several (old_category, new_category, is_new) changes in one update"""
+    inc = {"version": 1}
+    def add(field, amount):
+        inc[field] = inc.get(field, 0) + amount
+    for old_category, new_category, is_new in changes:
+        if is_new:
+            add("total_careers", 1)
+        if old_category != new_category or is_new:
+            if old_category and not is_new:
+                add(f"categories.{_facet_key(old_category)}", -1)
+            if new_category:
+                add(f"categories.{_facet_key(new_category)}", 1)
+    db = get_db_connection()
+    db['catalog_facets'].update_one(
+        {"_id": FACETS_ID},
+        {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    catalog_cache.invalidate("facets")
 
 def generate_slug(title: str) -> str:
     """Generate URL-friendly slug from career title"""
@@ -89,71 +376,104 @@ def generate_slug(title: str) -> str:
     slug = re.sub(r'^-+|-+$', '', slug)  # Remove leading/trailing hyphens
     return slug
 
+def career_doc_from_assessment(career_data: dict):
+    """Build the career fields ($set on upsert) for an assessment recommendation, or None without a title"""
+    # Generate slug from title
+    title = career_data.get('title', '').strip()
+    if not title:
+        return None
+        
+    slug = generate_slug(title)
+    
+    # Extract salary range
+    salary_min = None
+    salary_max = None
+    salary_range = career_data.get('salary_range', '')
+    if salary_range:
+        import re
+        numbers = re.findall(r'\d+', salary_range.replace(',', ''))
+        if len(numbers) >= 2:
+            try:
+                salary_min = int(numbers[0]) * 100000
+                salary_max = int(numbers[1]) * 100000
+            except:
+                pass
+        elif len(numbers) == 1:
+            try:
+                salary_min = int(numbers[0]) * 100000
+                salary_max = int(numbers[0]) * 150000
+            except:
+                pass
+    
+    # Determine category
+    description = career_data.get('description', '').lower()
+    title_lower = title.lower()
+    category = 'Technology'
+    if any(word in title_lower or word in description for word in ['business', 'manager', 'analyst', 'consultant', 'marketing', 'sales', 'finance', 'accounting']):
+        category = 'Business'
+    elif any(word in title_lower or word in description for word in ['doctor', 'medical', 'health', 'nurse', 'pharmacy']):
+        category = 'Healthcare'
+    elif any(word in title_lower or word in description for word in ['engineer', 'mechanical', 'civil', 'electrical']):
+        category = 'Engineering'
+    elif any(word in title_lower or word in description for word in ['teacher', 'professor', 'education', 'academic']):
+        category = 'Education'
+    elif any(word in title_lower or word in description for word in ['art', 'design', 'creative', 'writer']):
+        category = 'Arts'
+    
+    short_desc = career_data.get('description', title)[:200]
+    full_desc = career_data.get('description', title)
+    
+    return {
+        "slug": slug,
+        "title": title,
+        "category": category,
+        "short_description": short_desc,
+        "full_description": full_desc,
+        "avg_salary_min": salary_min,
+        "avg_salary_max": salary_max,
+        "growth_prospects": career_data.get('growth_prospects'),
+        "updated_at": datetime.now(timezone.utc)
+    }
+
+# Default empty lists for the embedded structures of a newly created career
+EMPTY_CAREER_SECTIONS = {
+    "entrance_exams": [],
+    "educational_paths": [],
+    "skills_required": [],
+    "roadmap": [],
+    "job_roles": [],
+    "resources": []
+}
+
+def refresh_related_careers(slugs):
+    """Re-index written careers in the related-careers index (failures are logged, not raised)"""
+    from career_similarity import update_related_careers
+    for slug in slugs:
+        try:
+            update_related_careers(slug)
+        except Exception as e:
+            print(f"⚠️ Could not refresh related careers for '{slug}': {e}")
+
+def _close_career_requests(slugs):
+    """Requests for careers that now exist are no longer pending"""
+    from career_requests import mark_careers_added
+    mark_careers_added(slugs)
+
 def create_or_update_career_from_assessment(career_data: dict):
     """
     Automatically create or update a career in the database from assessment recommendations.
     """
     db = get_db_connection()
     careers_collection = db['careers']
+    title = career_data.get('title', '')
     
     try:
-        # Generate slug from title
-        title = career_data.get('title', '').strip()
-        if not title:
+        career_doc = career_doc_from_assessment(career_data)
+        if not career_doc:
             return None
-            
-        slug = generate_slug(title)
-        
-        # Extract salary range
-        salary_min = None
-        salary_max = None
-        salary_range = career_data.get('salary_range', '')
-        if salary_range:
-            import re
-            numbers = re.findall(r'\d+', salary_range.replace(',', ''))
-            if len(numbers) >= 2:
-                try:
-                    salary_min = int(numbers[0]) * 100000
-                    salary_max = int(numbers[1]) * 100000
-                except:
-                    pass
-            elif len(numbers) == 1:
-                try:
-                    salary_min = int(numbers[0]) * 100000
-                    salary_max = int(numbers[0]) * 150000
-                except:
-                    pass
-        
-        # Determine category
-        description = career_data.get('description', '').lower()
-        title_lower = title.lower()
-        category = 'Technology'
-        if any(word in title_lower or word in description for word in ['business', 'manager', 'analyst', 'consultant', 'marketing', 'sales', 'finance', 'accounting']):
-            category = 'Business'
-        elif any(word in title_lower or word in description for word in ['doctor', 'medical', 'health', 'nurse', 'pharmacy']):
-            category = 'Healthcare'
-        elif any(word in title_lower or word in description for word in ['engineer', 'mechanical', 'civil', 'electrical']):
-            category = 'Engineering'
-        elif any(word in title_lower or word in description for word in ['teacher', 'professor', 'education', 'academic']):
-            category = 'Education'
-        elif any(word in title_lower or word in description for word in ['art', 'design', 'creative', 'writer']):
-            category = 'Arts'
-        
-        short_desc = career_data.get('description', title)[:200]
-        full_desc = career_data.get('description', title)
-        
-        # Prepare document
-        career_doc = {
-            "slug": slug,
-            "title": title,
-            "category": category,
-            "short_description": short_desc,
-            "full_description": full_desc,
-            "avg_salary_min": salary_min,
-            "avg_salary_max": salary_max,
-            "growth_prospects": career_data.get('growth_prospects'),
-            "updated_at": "CURRENT_TIMESTAMP" # In real app use datetime.now()
-        }
+        slug = career_doc['slug']
+        title = career_doc['title']
+        category = career_doc['category']
         
         # Check if exists
         existing = careers_collection.find_one({"slug": slug})
@@ -162,31 +482,23 @@ def create_or_update_career_from_assessment(career_data: dict):
             # Update
             careers_collection.update_one(
                 {"slug": slug},
-                {"$set": career_doc}
+                {"$set": career_doc, "$inc": {"version": 1}}
             )
             career_id = str(existing['_id'])
+            _update_career_facets(existing.get('category'), category, is_new=False)
             print(f"✅ Updated existing career: {title} (slug: {slug})")
         else:
             # Insert
-            # Add default empty lists for embedded structures
-            career_doc.update({
-                "entrance_exams": [],
-                "educational_paths": [],
-                "skills_required": [],
-                "roadmap": [],
-                "job_roles": [],
-                "resources": []
-            })
+            career_doc.update(EMPTY_CAREER_SECTIONS, version=1)
             result = careers_collection.insert_one(career_doc)
             career_id = str(result.inserted_id)
+            _update_career_facets(None, category, is_new=True)
             print(f"✅ Created new career: {title} (slug: {slug})")
+            _close_career_requests([slug])
         
-        # If new or updated, we should ideally generate the roadmap etc.
-        # For MongoDB, we'll just ensure the structure exists
-        if not existing:
-             # We could call a helper to populate default roadmap here
-             pass
-             
+        # Every worker drops its cached copy (including a cached "not found")
+        career_cache.invalidate(slug)
+        refresh_related_careers([slug])
         return career_id
             
     except Exception as e:
@@ -194,3 +506,47 @@ def create_or_update_career_from_assessment(career_data: dict):
         import traceback
         traceback.print_exc()
         return None
+
+def upsert_careers_from_assessment(careers_data: list) -> int:
+    """
+    Create or update every career recommended by one assessment with a single
+    bulk write and one facet update (the write-behind path for submissions).
+
+    Returns:
+        Number of careers written
+    """
+    career_docs = {}
+    for career_data in careers_data:
+        try:
+            career_doc = career_doc_from_assessment(career_data)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not auto-add career '{career_data.get('title', 'Unknown')}': {e}")
+            continue
+        if career_doc:
+            career_docs[career_doc['slug']] = career_doc
+    if not career_docs:
+        return 0
+    
+    db = get_db_connection()
+    careers_collection = db['careers']
+    existing = {
+        career['slug']: career
+        for career in careers_collection.find({"slug": {"$in": list(career_docs)}}, {"slug": 1, "category": 1})
+    }
+    
+    operations = []
+    facet_changes = []
+    for slug, career_doc in career_docs.items():
+        update = {"$set": career_doc, "$inc": {"version": 1}}
+        if slug not in existing:
+            update["$setOnInsert"] = EMPTY_CAREER_SECTIONS
+        operations.append(UpdateOne({"slug": slug}, update, upsert=True))
+        facet_changes.append((existing.get(slug, {}).get('category'), career_doc['category'], slug not in existing))
+    
+    careers_collection.bulk_write(operations, ordered=False)
+    _update_career_facets_batch(facet_changes)
+    _close_career_requests([slug for slug in career_docs if slug not in existing])
+    career_cache.invalidate(*career_docs)
+    refresh_related_careers(career_docs)
+    print(f"✅ Upserted {len(operations)} careers from assessment ({len(operations) - len(existing)} new)")
+    return len(operations)
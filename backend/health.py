@@ -0,0 +1,152 @@
+"""
+Liveness and readiness checks.
+
+/api/health/live only says the process is serving requests. /api/health/ready probes
+the dependencies a request needs: MongoDB (`ping` on the connection from
+get_db_connection) and the Gemini API (a metadata lookup of the configured
+model, which checks reachability and the API key without spending tokens).
+Both are also served at /health/live and /health/ready for probes that reach
+the process directly rather than through the Vercel /api rewrite.
+
+Probe results, failures included, are cached for a short interval and
+concurrent readiness checks share one in-flight probe. Load balancers polling
+every instance every second therefore cost at most one ping per dependency
+per interval. An instance is not ready when a required dependency fails, times
+out, or answers slower than its latency threshold.
+
+Configuration (environment):
+    HEALTH_MONGO_MAX_LATENCY_MS    slowest acceptable Mongo ping (default 250)
+    HEALTH_LLM_MAX_LATENCY_MS      slowest acceptable Gemini probe (default 2000)
+    HEALTH_MONGO_CACHE_SECONDS     how long a Mongo result is reused (default 5)
+    HEALTH_LLM_CACHE_SECONDS       how long a Gemini result is reused (default 30)
+    HEALTH_PROBE_TIMEOUT_SECONDS   give up on a probe after this long (default 3)
+    HEALTH_READY_REQUIRES          comma-separated dependencies that gate readiness
+                                   (default "mongo,llm"; drop "llm" to keep serving
+                                   non-AI routes through a provider outage)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from database import get_db_connection
+from llm_client import LLM_MODEL, LLM_PROVIDER
+
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '3'))
+
+GEMINI_MODELS_URL = "https://generativelanguage.googleapis.com/v1beta/models/"
+
+STARTED_AT = time.time()
+
+
+class DependencyProbe:
+    """A cached, coalesced health probe for one dependency"""
+
+    def __init__(self, name: str, check: Callable[[], Awaitable[None]], max_latency_ms: float,
+                 cache_seconds: float, timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS):
+        self.name = name
+        self.check = check
+        self.max_latency_ms = max_latency_ms
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self._result = None
+        self._expires = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self.stats = {"probes": 0, "cached": 0, "failures": 0}
+
+    async def result(self) -> Dict:
+        """Latest probe result, probing again once the cached one expires"""
+        if self._result is not None and time.monotonic() < self._expires:
+            self.stats["cached"] += 1
+            return self._result
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._probe())
+        try:
+            return await asyncio.shield(self._inflight)
+        finally:
+            if self._inflight is not None and self._inflight.done():
+                self._inflight = None
+
+    async def _probe(self) -> Dict:
+        self.stats["probes"] += 1
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(self.check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if error:
+            status = "down"
+        elif latency_ms > self.max_latency_ms:
+            status = "slow"
+        else:
+            status = "ok"
+        if status != "ok":
+            self.stats["failures"] += 1
+        result = {"status": status, "latency_ms": latency_ms, "max_latency_ms": self.max_latency_ms,
+                  "checked_at": datetime.now().isoformat()}
+        if error:
+            result["error"] = error
+        self._result = result
+        self._expires = time.monotonic() + self.cache_seconds
+        return result
+
+
+async def check_mongo():
+    # The ping blocks on server selection; keep it off the event loop
+    await asyncio.to_thread(lambda: get_db_connection().command("ping"))
+
+
+async def check_llm():
+    if LLM_PROVIDER == "fake":
+        return
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY not configured")
+    import httpx
+
+    async with httpx.AsyncClient(timeout=HEALTH_PROBE_TIMEOUT_SECONDS) as client:
+        response = await client.get(GEMINI_MODELS_URL + LLM_MODEL, headers={"x-goog-api-key": api_key})
+        response.raise_for_status()
+
+
+class HealthChecker:
+    """Readiness from the required dependency probes"""
+
+    def __init__(self, probes: Dict[str, DependencyProbe], required=None):
+        self.probes = probes
+        if required is None:
+            required = os.getenv('HEALTH_READY_REQUIRES', 'mongo,llm')
+        if isinstance(required, str):
+            required = [name.strip() for name in required.split(",") if name.strip()]
+        self.required = [name for name in required if name in probes]
+
+    def live(self) -> Dict:
+        return {"status": "alive", "uptime_seconds": round(time.time() - STARTED_AT, 1)}
+
+    async def ready(self):
+        """Returns (is_ready, report) with every probe's cached result"""
+        names = list(self.probes)
+        results = await asyncio.gather(*(self.probes[name].result() for name in names))
+        checks = {name: dict(result, required=name in self.required) for name, result in zip(names, results)}
+        failing = [name for name in self.required if checks[name]["status"] != "ok"]
+        report = {"status": "ready" if not failing else "not_ready", "checks": checks}
+        if failing:
+            report["failing"] = failing
+        return not failing, report
+
+
+health_checker = HealthChecker({
+    "mongo": DependencyProbe("mongo", check_mongo,
+                             max_latency_ms=float(os.getenv('HEALTH_MONGO_MAX_LATENCY_MS', '250')),
+                             cache_seconds=float(os.getenv('HEALTH_MONGO_CACHE_SECONDS', '5'))),
+    "llm": DependencyProbe("llm", check_llm,
+                           max_latency_ms=float(os.getenv('HEALTH_LLM_MAX_LATENCY_MS', '2000')),
+                           cache_seconds=float(os.getenv('HEALTH_LLM_CACHE_SECONDS', '30'))),
+})
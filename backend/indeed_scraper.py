@@ -1,42 +1,445 @@
 """
-Stub implementation for Indeed job scraper.
-This module provides placeholder functions to maintain API compatibility.
-For production, implement actual Indeed scraping or use Indeed API.
+Indeed job ingestion.
+
+Search result pages are fetched through an async HTTP client pool with bounded
+per-host concurrency and streamed into a SearchPageParser, which turns them
+into normalized job records.
+
+Indeed embeds its job cards as JSON (`window.mosaic.providerData[...]`) inside
+the search page; the parser scans the stream for that blob, decodes it in place
+without building a DOM as soon as its <script> closes, and stops reading the
+response there, so the rest of the page is never downloaded. Pages without the
+blob are buffered and fall back to parsing only the job-card elements of the
+HTML. JSON responses (`{"results": [...]}` or `{"jobs": [...]}`) are accepted
+as well (buffered, then decoded), so a local stand-in server can replace
+Indeed entirely; tests/test_indeed_scraper.py runs against one.
+
+Configuration (environment):
+    INDEED_BASE_URL                 default https://in.indeed.com
+    INDEED_MAX_CONNECTIONS          total pooled connections (default 10)
+    INDEED_MAX_CONCURRENCY_PER_HOST concurrent requests per host (default 2)
+    INDEED_TIMEOUT_SECONDS          per-request timeout (default 10)
 """
 
-from typing import List, Dict, Optional
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+PAGE_SIZE = 10
+
+MOSAIC_MARKER = 'window.mosaic.providerData["mosaic-provider-jobcards"]='
+SCRIPT_END = '</script>'
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+# Ingestion counters (pages/sec and parse cost per listing)
+_stats = {
+    "pages_fetched": 0,
+    "fetch_errors": 0,
+    "parse_errors": 0,
+    "fetch_seconds": 0.0,
+    "fetch_wall_seconds": 0.0,
+    "listings_parsed": 0,
+    "parse_seconds": 0.0,
+}
+
+
+def get_ingestion_stats() -> Dict:
+    """Snapshot of fetch/parse counters with derived throughput figures"""
+    stats = dict(_stats)
+    stats["pages_per_second"] = (round(stats["pages_fetched"] / stats["fetch_wall_seconds"], 2)
+                                 if stats["fetch_wall_seconds"] else None)
+    stats["avg_fetch_ms"] = (round(stats["fetch_seconds"] * 1000 / stats["pages_fetched"], 2)
+                             if stats["pages_fetched"] else None)
+    stats["parse_ms_per_listing"] = (round(stats["parse_seconds"] * 1000 / stats["listings_parsed"], 4)
+                                     if stats["listings_parsed"] else None)
+    return stats
+
+
+# =====================================================
+# Parsing
+# =====================================================
+
+def _clean_text(value) -> str:
+    if not value:
+        return ""
+    return re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', str(value))).strip()
+
+
+def _normalize_job(raw: Dict, base_url: str) -> Optional[Dict]:
+    """Map one Indeed job card (mosaic JSON or stand-in JSON) to our record shape"""
+    job_key = raw.get('jobkey') or raw.get('job_key') or raw.get('id')
+    title = _clean_text(raw.get('displayTitle') or raw.get('title'))
+    if not job_key or not title:
+        return None
+
+    salary = raw.get('extractedSalary') or {}
+    salary_text = (raw.get('salarySnippet') or {}).get('text') or raw.get('salary') or ""
+
+    posted_at = None
+    pub_date = raw.get('pubDate')
+    if isinstance(pub_date, (int, float)):
+        posted_at = datetime.fromtimestamp(pub_date / 1000, tz=timezone.utc).isoformat()
+    elif isinstance(pub_date, str):
+        posted_at = pub_date
+
+    url = raw.get('url') or raw.get('viewJobLink') or f"/viewjob?jk={job_key}"
+
+    return {
+        "job_key": str(job_key),
+        "title": title,
+        "company": _clean_text(raw.get('company') or raw.get('company_name')),
+        "location": _clean_text(raw.get('formattedLocation') or raw.get('location')),
+        "salary_text": _clean_text(salary_text),
+        "salary_min": salary.get('min'),
+        "salary_max": salary.get('max'),
+        "summary": _clean_text(raw.get('snippet') or raw.get('description')),
+        "url": urljoin(base_url, url),
+        "posted_at": posted_at,
+        "posted_text": _clean_text(raw.get('formattedRelativeTime')),
+        "source": "Indeed",
+    }
+
+
+def iter_jobs_from_json(payload, base_url: str) -> Iterator[Dict]:
+    """Yield normalized jobs from a mosaic provider blob or a plain JSON job list"""
+    if isinstance(payload, list):
+        results = payload
+    else:
+        model = (payload.get('metaData') or {}).get('mosaicProviderJobCardsModel') or {}
+        results = model.get('results') or payload.get('results') or payload.get('jobs') or []
+    for raw in results:
+        job = _normalize_job(raw, base_url)
+        if job:
+            yield job
+
+
+def _iter_jobs_from_cards(html: str, base_url: str) -> Iterator[Dict]:
+    """Fallback: parse only the job-card elements of a search page"""
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    cards = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("div", class_="job_seen_beacon"))
+    for card in cards.find_all("div", class_="job_seen_beacon"):
+        link = card.select_one("h2.jobTitle a") or card.find("a", attrs={"data-jk": True})
+        if not link:
+            continue
+        company = card.find(attrs={"data-testid": "company-name"})
+        location = card.find(attrs={"data-testid": "text-location"})
+        salary = card.select_one(".salary-snippet-container") or card.select_one(".estimated-salary")
+        snippet = card.select_one(".job-snippet")
+        posted = card.select_one("span.date")
+        raw = {
+            "jobkey": link.get("data-jk"),
+            "title": link.get_text(" ", strip=True),
+            "company": company.get_text(" ", strip=True) if company else "",
+            "location": location.get_text(" ", strip=True) if location else "",
+            "salary": salary.get_text(" ", strip=True) if salary else "",
+            "snippet": snippet.get_text(" ", strip=True) if snippet else "",
+            "formattedRelativeTime": posted.get_text(" ", strip=True) if posted else "",
+            "url": link.get("href"),
+        }
+        job = _normalize_job(raw, base_url)
+        if job:
+            yield job
+
+
+def parse_search_page(body: str, base_url: str, content_type: str = "text/html") -> Iterator[Dict]:
+    """
+    Incrementally parse one search results page into normalized job records.
+
+    Args:
+        body: Response body (HTML search page or JSON)
+        base_url: Used to resolve relative job links
+        content_type: Response content type
+
+    Yields:
+        Normalized job dictionaries
+    """
+    if "json" in content_type:
+        yield from iter_jobs_from_json(json.loads(body), base_url)
+        return
+
+    start = body.find(MOSAIC_MARKER)
+    if start != -1:
+        # Decode just the embedded JSON object, leaving the rest of the page untouched
+        try:
+            payload, _ = json.JSONDecoder().raw_decode(body, start + len(MOSAIC_MARKER))
+            yield from iter_jobs_from_json(payload, base_url)
+            return
+        except json.JSONDecodeError:
+            pass
+
+    yield from _iter_jobs_from_cards(body, base_url)
+
+
+class SearchPageParser:
+    """
+    Incremental parser for one streamed search results page.
+
+    feed() chunks of the body as they arrive; `done` turns true once the
+    mosaic blob has been decoded and the rest of the body is not needed.
+    close() returns the parsed jobs, falling back to a full parse of the
+    buffered body when the blob never completed.
+    """
+
+    def __init__(self, base_url: str, content_type: str = "text/html"):
+        self.base_url = base_url
+        self.content_type = content_type
+        self.done = False
+        self.jobs = []
+        self._chunks = []
+        self._tail = ""
+        self._marker_at = None
+        self._size = 0
+        self._scanning = True
+
+    def feed(self, chunk: str):
+        if self.done:
+            return
+        self._chunks.append(chunk)
+        if "json" in self.content_type or not self._scanning:
+            return
+        # Only the last few characters of the previous chunk can hold a split marker
+        window = self._tail + chunk
+        offset = self._size - len(self._tail)
+        self._size += len(chunk)
+        self._tail = window[-len(MOSAIC_MARKER):]
+        if self._marker_at is None:
+            found = window.find(MOSAIC_MARKER)
+            if found == -1:
+                return
+            self._marker_at = offset + found
+        if SCRIPT_END in window:
+            body = "".join(self._chunks)
+            if body.find(SCRIPT_END, self._marker_at) != -1:
+                self._chunks = [body]
+                self._decode_mosaic(body)
+
+    def _decode_mosaic(self, body: str):
+        try:
+            payload, _ = json.JSONDecoder().raw_decode(body, self._marker_at + len(MOSAIC_MARKER))
+        except json.JSONDecodeError:
+            # Malformed blob: read the whole page and let close() fall back to the cards
+            self._scanning = False
+            return
+        self.jobs = list(iter_jobs_from_json(payload, self.base_url))
+        self.done = True
+
+    def close(self) -> List[Dict]:
+        if not self.done:
+            self.jobs = list(parse_search_page("".join(self._chunks), self.base_url, self.content_type))
+            self.done = True
+        self._chunks = []
+        return self.jobs
+
+
+# =====================================================
+# Fetching
+# =====================================================
+
+# What a malformed page (truncated JSON, unexpected shapes) raises while parsing
+PARSE_ERRORS = (ValueError, TypeError, KeyError, AttributeError)
+
+
+class JobFetchPool:
+    """Pooled async HTTP client with bounded concurrency per host"""
+
+    def __init__(self, max_connections: int = None, per_host: int = None, timeout: float = None):
+        self.max_connections = max_connections or int(os.getenv('INDEED_MAX_CONNECTIONS', '10'))
+        self.per_host = per_host or int(os.getenv('INDEED_MAX_CONCURRENCY_PER_HOST', '2'))
+        self.timeout = timeout or float(os.getenv('INDEED_TIMEOUT_SECONDS', '10'))
+        self._client = None
+        self._host_limits = {}
+
+    def _get_client(self):
+        import httpx
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def fetch_jobs(self, url: str, base_url: str, params: Optional[Dict] = None) -> List[Dict]:
+        """
+        Stream a search page through a SearchPageParser.
+
+        Returns the page's normalized jobs ([] when the page can't be parsed);
+        raises httpx.HTTPError on failure.
+        """
+        import httpx
+        async with self._host_limit(url):
+            started = time.perf_counter()
+            parse_seconds = 0.0
+            try:
+                async with self._get_client().stream("GET", url, params=params) as response:
+                    response.raise_for_status()
+                    parser = SearchPageParser(base_url, response.headers.get("content-type", "text/html"))
+                    async for chunk in response.aiter_text():
+                        parse_started = time.perf_counter()
+                        parser.feed(chunk)
+                        parse_seconds += time.perf_counter() - parse_started
+                        if parser.done:
+                            break
+            except httpx.HTTPError:
+                _stats["fetch_errors"] += 1
+                raise
+            except PARSE_ERRORS as e:
+                return self._parse_failed(url, params, e)
+            finally:
+                _stats["fetch_seconds"] += time.perf_counter() - started - parse_seconds
+            parse_started = time.perf_counter()
+            try:
+                jobs = parser.close()
+            except PARSE_ERRORS as e:
+                return self._parse_failed(url, params, e)
+            finally:
+                _stats["parse_seconds"] += parse_seconds + time.perf_counter() - parse_started
+            _stats["listings_parsed"] += len(jobs)
+            _stats["pages_fetched"] += 1
+            return jobs
+
+    @staticmethod
+    def _parse_failed(url: str, params: Optional[Dict], error: Exception) -> List[Dict]:
+        """A malformed page yields no jobs instead of failing the whole search"""
+        _stats["parse_errors"] += 1
+        print(f"⚠️ Could not parse Indeed page {url} {params or ''}: {type(error).__name__}: {error}")
+        return []
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits = {}
+
+
+# Shared pool for the API process (one event loop)
+_pool = None
+
+
+def get_fetch_pool() -> JobFetchPool:
+    global _pool
+    if _pool is None:
+        _pool = JobFetchPool()
+    return _pool
+
+
+async def fetch_indeed_jobs(job_title: str, location: str = "India", limit: int = 10,
+                            pool: Optional[JobFetchPool] = None,
+                            base_url: Optional[str] = None, strict: bool = False) -> List[Dict]:
+    """
+    Fetch and parse as many result pages as needed for `limit` jobs, concurrently.
+
+    Failed pages are logged and skipped; with strict=True an httpx.HTTPError is
+    raised instead when every page failed (so callers can back off).
+
+    Returns:
+        De-duplicated list of normalized job records (at most `limit`)
+    """
+    pool = pool or get_fetch_pool()
+    base_url = base_url or os.getenv('INDEED_BASE_URL', 'https://in.indeed.com')
+    search_url = base_url.rstrip('/') + '/jobs'
+    pages = max(1, -(-limit // PAGE_SIZE))
+
+    import httpx
+    errors = []
+
+    async def fetch_page(page: int):
+        params = {"q": job_title, "l": location, "start": page * PAGE_SIZE}
+        try:
+            return await pool.fetch_jobs(search_url, base_url, params=params)
+        except httpx.HTTPError as e:
+            print(f"⚠️ Indeed fetch failed for page {page} of '{job_title}': {e}")
+            errors.append(e)
+            return None
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(fetch_page(page) for page in range(pages)))
+    _stats["fetch_wall_seconds"] += time.perf_counter() - started
+    if strict and len(errors) == pages:
+        raise errors[0]
+
+    jobs = []
+    seen = set()
+    for page_jobs in responses:
+        for job in page_jobs or []:
+            if job['job_key'] in seen:
+                continue
+            seen.add(job['job_key'])
+            jobs.append(job)
+
+    return jobs[:limit]
+
+
+async def search_indeed_jobs_async(job_title: str, location: str = "India", limit: int = 10) -> List[Dict]:
+    """Async entry point used by the API"""
+    return await fetch_indeed_jobs(job_title, location=location, limit=limit)
 
 
 def search_indeed_jobs(job_title: str, location: str = "India", limit: int = 10) -> List[Dict]:
     """
-    Stub function for Indeed job search.
-    
+    Search Indeed for jobs (blocking; for scripts and background jobs outside an event loop).
+
     Args:
         job_title: The job title or keywords to search for
         location: Location to search in
         limit: Maximum number of jobs to return
-    
+
     Returns:
-        Empty list (stub implementation)
+        List of normalized job dictionaries
     """
-    # Stub implementation - returns empty list
-    # In production, implement actual Indeed scraping or use Indeed API
-    print(f"⚠️ Indeed scraper not implemented. Search requested: '{job_title}' in '{location}'")
-    return []
+    async def run():
+        pool = JobFetchPool()
+        try:
+            return await fetch_indeed_jobs(job_title, location=location, limit=limit, pool=pool)
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(run())
 
 
 def format_indeed_jobs_for_api(jobs: List[Dict], career_title: Optional[str] = None) -> List[Dict]:
     """
     Format job listings for API response.
-    
+
     Args:
-        jobs: List of job dictionaries
+        jobs: List of normalized job dictionaries
         career_title: Optional career title for context
-    
+
     Returns:
         Formatted list of job dictionaries
     """
-    # Stub implementation - returns empty list
-    return []
-
-
+    formatted = []
+    for job in jobs:
+        formatted.append({
+            "id": job['job_key'],
+            "job_title": job['title'],
+            "company_name": job.get('company') or "Company not specified",
+            "job_location": job.get('location') or "",
+            "salary_range": job.get('salary_text') or "Salary not specified",
+            "description": job.get('summary') or "No description available",
+            "posted_at": job.get('posted_text') or job.get('posted_at') or "Date not specified",
+            "job_url": job.get('url'),
+            "source": job.get('source', 'Indeed'),
+            "career_title": career_title,
+        })
+    return formatted
@@ -0,0 +1,198 @@
+"""
+Batch job-to-career matching.
+
+A vocabulary is precomputed from the career catalog: tokens from each career's
+`job_roles.role_title` (weighted higher) and `skills_required.skill_name`,
+IDF-weighted and L2-normalized into one sparse vector per career. The vectors
+are stored as an inverted index (token -> [(career, weight)]), so scoring a
+listing only touches the careers that share a token with it instead of scanning
+the catalog.
+
+Ingested listings are matched incrementally: every job stores the vocabulary
+version it was matched against, and only jobs without the current version are
+scored. A job's `career_slugs` is rewritten on every match as the careers
+whose search ingested it (`search_career_slugs`) plus its current matches, so
+careers that stop matching are dropped.
+
+Listings fetched by user searches (/api/jobs/indeed-search) are stored and
+matched with ingest_search_results, which the API runs on the write-behind
+queue. It matches only those listings, against the process-wide matcher.
+
+Usage:
+    python job_matching.py    # match all unmatched / outdated listings
+"""
+
+import hashlib
+import math
+import re
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from database import generate_slug, get_db_connection
+from user_database import ensure_job_indexes, upsert_job_listings
+
+ROLE_WEIGHT = 2.0
+SKILL_WEIGHT = 1.0
+TITLE_WEIGHT = 2.0
+MATCH_THRESHOLD = 0.2
+MAX_MATCHES = 3
+MATCH_BATCH_SIZE = 1000
+
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "at", "or",
+    "by", "as", "is", "are", "be", "we", "our", "you", "your", "job", "jobs",
+    "role", "roles", "senior", "junior", "lead", "level", "years", "year", "i", "ii", "iii",
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased word tokens ("Python/Java/C++" -> python, java, c++)"""
+    if not text:
+        return []
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS and len(token) > 1]
+
+
+class CareerMatcher:
+    """Sparse career vectors over a fixed vocabulary with inverted-index scoring"""
+
+    def __init__(self, careers: Iterable[Dict]):
+        raw_vectors = {}
+        for career in careers:
+            weights = {}
+            for role in career.get('job_roles') or []:
+                for token in tokenize(role.get('role_title')):
+                    weights[token] = max(weights.get(token, 0.0), ROLE_WEIGHT)
+            for skill in career.get('skills_required') or []:
+                for token in tokenize(skill.get('skill_name')):
+                    weights[token] = max(weights.get(token, 0.0), SKILL_WEIGHT)
+            if weights:
+                raw_vectors[career['slug']] = weights
+
+        document_frequency = {}
+        for weights in raw_vectors.values():
+            for token in weights:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        total = len(raw_vectors)
+        self.idf = {token: math.log((1 + total) / (1 + df)) + 1.0 for token, df in document_frequency.items()}
+
+        self.postings = {}
+        for slug, weights in raw_vectors.items():
+            vector = {token: weight * self.idf[token] for token, weight in weights.items()}
+            norm = math.sqrt(sum(value * value for value in vector.values()))
+            for token, value in vector.items():
+                self.postings.setdefault(token, []).append((slug, value / norm))
+
+        signature = repr(sorted((token, sorted(entries)) for token, entries in self.postings.items()))
+        self.version = hashlib.sha1(signature.encode('utf-8')).hexdigest()[:12]
+
+    def job_vector(self, title: Optional[str], description: Optional[str] = None) -> Dict[str, float]:
+        """Normalized sparse vector of a listing, restricted to the vocabulary"""
+        counts = {}
+        for token in tokenize(title):
+            if token in self.idf:
+                counts[token] = counts.get(token, 0.0) + TITLE_WEIGHT
+        for token in tokenize(description):
+            if token in self.idf:
+                counts[token] = counts.get(token, 0.0) + 1.0
+        vector = {token: count * self.idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {token: value / norm for token, value in vector.items()} if norm else {}
+
+    def match(self, title: Optional[str], description: Optional[str] = None,
+              threshold: float = MATCH_THRESHOLD, max_matches: int = MAX_MATCHES) -> List[Dict]:
+        """Careers whose cosine similarity with the listing reaches `threshold`, best first"""
+        scores = {}
+        for token, value in self.job_vector(title, description).items():
+            for slug, weight in self.postings[token]:
+                scores[slug] = scores.get(slug, 0.0) + value * weight
+        ranked = sorted((item for item in scores.items() if item[1] >= threshold),
+                        key=lambda item: (-item[1], item[0]))
+        return [{"slug": slug, "score": round(score, 4)} for slug, score in ranked[:max_matches]]
+
+
+_matcher = None
+
+
+def get_career_matcher(refresh: bool = False) -> CareerMatcher:
+    """Process-wide matcher built from the current catalog"""
+    global _matcher
+    if _matcher is None or refresh:
+        db = get_db_connection()
+        _matcher = CareerMatcher(db['careers'].find(
+            {}, {"slug": 1, "job_roles.role_title": 1, "skills_required.skill_name": 1}
+        ))
+    return _matcher
+
+
+def _search_slugs(job: Dict) -> List[str]:
+    """Careers whose search ingested the job (for listings stored before that was recorded:
+    its career_slugs minus the previous matches)"""
+    if 'search_career_slugs' in job:
+        return job['search_career_slugs']
+    matched = {m['slug'] for m in job.get('career_matches') or []}
+    return [slug for slug in job.get('career_slugs') or [] if slug not in matched]
+
+
+def match_new_jobs(batch_size: int = MATCH_BATCH_SIZE, matcher: Optional[CareerMatcher] = None,
+                   job_ids: Optional[List[str]] = None) -> int:
+    """
+    Match every listing (or only those in job_ids) not yet matched against the
+    current vocabulary version.
+
+    Returns:
+        Number of listings processed
+    """
+    matcher = matcher or get_career_matcher(refresh=True)
+    ensure_job_indexes()
+    collection = get_db_connection()['jobs']
+
+    query = {"match_version": {"$ne": matcher.version}}
+    if job_ids is not None:
+        query["_id"] = {"$in": list(job_ids)}
+    processed = 0
+    while True:
+        batch = list(collection.find(
+            query,
+            {"job_title": 1, "description": 1, "search_career_slugs": 1,
+             "career_slugs": 1, "career_matches.slug": 1}
+        ).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for job in batch:
+            matches = matcher.match(job.get('job_title'), job.get('description'))
+            slugs = list(_search_slugs(job))
+            slugs += [m['slug'] for m in matches if m['slug'] not in slugs]
+            operations.append(UpdateOne({"_id": job['_id']}, {"$set": {
+                "match_version": matcher.version, "career_matches": matches, "career_slugs": slugs
+            }}))
+        collection.bulk_write(operations, ordered=False)
+        processed += len(batch)
+
+    return processed
+
+
+def ingest_search_results(jobs: List[Dict], search_title: str) -> Dict:
+    """
+    Store listings fetched for a user's search in the job index and match them
+    to careers. Listings are filed under the career the search title names, if
+    there is one; the matcher links them to every career they fit.
+
+    Returns:
+        upsert_job_listings' result
+    """
+    slug = generate_slug(search_title)
+    career = get_db_connection()['careers'].find_one({"slug": slug}, {"_id": 1}) if slug else None
+    result = upsert_job_listings(jobs, slug if career else None)
+    if result['ids']:
+        match_new_jobs(matcher=get_career_matcher(), job_ids=result['ids'])
+    return result
+
+
+if __name__ == "__main__":
+    count = match_new_jobs()
+    print(f"✅ Matched {count} job listings to careers")
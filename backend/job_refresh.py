@@ -0,0 +1,212 @@
+"""
+Background job-refresh scheduler.
+
+Periodically prefetches Indeed listings for the most viewed/selected careers
+(see user_database.get_top_careers) and writes them into the local job index
+and the job search cache, so user-facing job queries are served from local data
+instead of waiting on an upstream fetch.
+
+New listings are matched to careers (job_matching) right after ingestion,
+with one career matcher built per scheduling round.
+
+Upstream traffic is bounded by a global token-bucket rate limit; every fetch is
+preceded by random jitter, and careers whose fetches fail are retried with
+exponential backoff.
+
+Configuration (environment):
+    JOB_REFRESH_ENABLED           "true" to start the scheduler with the API
+    JOB_REFRESH_INTERVAL_SECONDS  time between scheduling rounds (default 3600)
+    JOB_REFRESH_TOP_CAREERS       careers refreshed per round (default 20)
+    JOB_REFRESH_RATE_PER_MINUTE   global upstream fetch budget (default 6)
+    JOB_REFRESH_JITTER_SECONDS    max random delay before each fetch (default 5)
+    JOB_REFRESH_LOCATION          search location (default "India")
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Optional
+
+from database import get_career_by_slug
+from indeed_scraper import JobFetchPool, fetch_indeed_jobs
+from job_matching import get_career_matcher, match_new_jobs
+from job_search_cache import job_search_cache
+from user_database import get_top_careers, upsert_job_listings
+
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+
+class RateLimiter:
+    """Async token bucket: `rate` tokens per `per` seconds, bursting up to `burst`"""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: Optional[float] = None):
+        self.fill_rate = rate / per
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class JobRefreshScheduler:
+    """Schedules refreshes for top careers and drains them through rate-limited workers"""
+
+    def __init__(self, interval: float = None, top_n: int = None, rate_per_minute: float = None,
+                 jitter: float = None, location: str = None, workers: int = 1,
+                 backoff_base: float = 60.0, pool: Optional[JobFetchPool] = None,
+                 base_url: Optional[str] = None):
+        self.interval = interval if interval is not None else float(os.getenv('JOB_REFRESH_INTERVAL_SECONDS', '3600'))
+        self.top_n = top_n if top_n is not None else int(os.getenv('JOB_REFRESH_TOP_CAREERS', '20'))
+        rate = rate_per_minute if rate_per_minute is not None else float(os.getenv('JOB_REFRESH_RATE_PER_MINUTE', '6'))
+        self.jitter = jitter if jitter is not None else float(os.getenv('JOB_REFRESH_JITTER_SECONDS', '5'))
+        self.location = location or os.getenv('JOB_REFRESH_LOCATION', 'India')
+        self.workers = workers
+        self.backoff_base = backoff_base
+        # Upstream connection pool and search host (default: the shared pool, INDEED_BASE_URL)
+        self.pool = pool
+        self.base_url = base_url
+        self.limiter = RateLimiter(rate)
+        self.queue = asyncio.Queue()
+        self._queued = set()
+        self._failures = {}
+        self._retry_at = {}
+        self._tasks = []
+        # Career matcher for the current round, built on first use and shared by its refreshes
+        self._matcher = None
+        self.metrics = {
+            "rounds": 0,
+            "refreshed": 0,
+            "failed": 0,
+            "skipped_backoff": 0,
+            "jobs_ingested": 0,
+            "last_round_at": None,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+        }
+
+    # ----- scheduling -----
+
+    async def schedule_round(self):
+        """Enqueue the current top careers (skipping queued ones and those backing off)"""
+        slugs = await asyncio.to_thread(get_top_careers, self.top_n)
+        self._matcher = None
+        now = time.monotonic()
+        for slug in slugs:
+            if slug in self._queued:
+                continue
+            if self._retry_at.get(slug, 0) > now:
+                self.metrics["skipped_backoff"] += 1
+                continue
+            self._queued.add(slug)
+            self.queue.put_nowait(slug)
+        self.metrics["rounds"] += 1
+        self.metrics["last_round_at"] = time.time()
+
+    async def _ticker(self):
+        next_run = time.monotonic()
+        while True:
+            # Lag: how late this round started relative to its schedule
+            lag = max(0.0, time.monotonic() - next_run)
+            self.metrics["last_lag_seconds"] = round(lag, 3)
+            self.metrics["max_lag_seconds"] = max(self.metrics["max_lag_seconds"], round(lag, 3))
+            try:
+                await self.schedule_round()
+            except Exception as e:
+                print(f"⚠️ Job refresh scheduling failed: {e}")
+            next_run += self.interval
+            await asyncio.sleep(max(0.0, next_run - time.monotonic()))
+
+    # ----- refreshing -----
+
+    async def _get_matcher(self):
+        if self._matcher is None:
+            self._matcher = await asyncio.to_thread(get_career_matcher, True)
+        return self._matcher
+
+    async def refresh_career(self, slug: str) -> int:
+        """Fetch listings for one career and store them locally. Returns jobs fetched."""
+        career = await asyncio.to_thread(get_career_by_slug, slug)
+        if not career:
+            return 0
+        title = career['title']
+
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+        await self.limiter.acquire()
+
+        jobs = await fetch_indeed_jobs(title, location=self.location, limit=25, pool=self.pool,
+                                       base_url=self.base_url, strict=True)
+        if jobs:
+            await asyncio.to_thread(upsert_job_listings, jobs, slug)
+            # Link the new listings to every other career they fit as well
+            await asyncio.to_thread(match_new_jobs, matcher=await self._get_matcher())
+        await job_search_cache.store(title, self.location, jobs)
+        return len(jobs)
+
+    async def _worker(self):
+        while True:
+            slug = await self.queue.get()
+            try:
+                count = await self.refresh_career(slug)
+                self._failures.pop(slug, None)
+                self._retry_at.pop(slug, None)
+                self.metrics["refreshed"] += 1
+                self.metrics["jobs_ingested"] += count
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures = self._failures.get(slug, 0) + 1
+                self._failures[slug] = failures
+                delay = min(MAX_BACKOFF_SECONDS, self.backoff_base * (2 ** (failures - 1)))
+                self._retry_at[slug] = time.monotonic() + delay * random.uniform(0.8, 1.2)
+                self.metrics["failed"] += 1
+                print(f"⚠️ Job refresh failed for '{slug}' (attempt {failures}, retry in ~{int(delay)}s): {e}")
+            finally:
+                self._queued.discard(slug)
+                self.queue.task_done()
+
+    # ----- lifecycle -----
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._ticker())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"✅ Job refresh scheduler started (top {self.top_n} careers every {int(self.interval)}s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> Dict:
+        return dict(self.metrics, running=bool(self._tasks), queue_depth=self.queue.qsize(),
+                    backing_off=len(self._retry_at))
+
+
+_scheduler = None
+
+
+def get_job_refresh_scheduler() -> JobRefreshScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobRefreshScheduler()
+    return _scheduler
+
+
+def job_refresh_enabled() -> bool:
+    return os.getenv('JOB_REFRESH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,190 @@
+"""
+Stale-while-revalidate cache for job searches.
+
+Results are keyed by normalized (job title, location) and kept in two tiers:
+an in-process LRU (L1) and the `job_search_cache` MongoDB collection (L2, shared
+between workers and restarts).
+
+- Fresh entries (younger than JOB_CACHE_TTL_SECONDS) are served directly.
+- Stale entries (up to JOB_CACHE_MAX_STALE_SECONDS) are served immediately while
+  a single background refresh runs for that key.
+- Concurrent misses for the same key share one upstream fetch.
+"""
+
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING
+
+from database import get_db_connection
+
+JOB_CACHE_TTL_SECONDS = int(os.getenv('JOB_CACHE_TTL_SECONDS', '1800'))
+JOB_CACHE_MAX_STALE_SECONDS = int(os.getenv('JOB_CACHE_MAX_STALE_SECONDS', '86400'))
+JOB_CACHE_L1_SIZE = int(os.getenv('JOB_CACHE_L1_SIZE', '256'))
+
+# Empty results are usually a transient upstream failure; don't keep them long
+EMPTY_RESULT_TTL_SECONDS = 60
+
+
+def normalize_search_key(job_title: str, location: str) -> str:
+    """Cache key: lower-cased, whitespace-collapsed title and location"""
+    def norm(value):
+        return re.sub(r'\s+', ' ', (value or '').strip().lower())
+    return f"{norm(job_title)}|{norm(location)}"
+
+
+class JobSearchCache:
+    """Two-tier stale-while-revalidate cache with request coalescing"""
+
+    def __init__(self, ttl: int = JOB_CACHE_TTL_SECONDS, max_stale: int = JOB_CACHE_MAX_STALE_SECONDS,
+                 l1_size: int = JOB_CACHE_L1_SIZE, use_mongo: bool = True):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.l1_size = l1_size
+        self.use_mongo = use_mongo
+        self._l1 = OrderedDict()
+        self._inflight = {}
+        self._indexes_ready = False
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0, "coalesced": 0}
+
+    # ----- tiers -----
+
+    def _collection(self):
+        collection = get_db_connection()['job_search_cache']
+        if not self._indexes_ready:
+            # Let MongoDB drop entries that are too stale to serve
+            collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+            self._indexes_ready = True
+        return collection
+
+    def _l1_get(self, key: str) -> Optional[Dict]:
+        entry = self._l1.get(key)
+        if entry is not None:
+            self._l1.move_to_end(key)
+        return entry
+
+    def _l1_put(self, key: str, entry: Dict):
+        self._l1[key] = entry
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def _l2_get(self, key: str) -> Optional[Dict]:
+        document = self._collection().find_one({"_id": key})
+        if not document:
+            return None
+        return {"jobs": document['jobs'], "fetched_at": document['fetched_at']}
+
+    def _l2_put(self, key: str, entry: Dict):
+        self._collection().replace_one(
+            {"_id": key},
+            {"jobs": entry['jobs'], "fetched_at": entry['fetched_at'],
+             "expires_at": entry['fetched_at'] + timedelta(seconds=self.max_stale)},
+            upsert=True
+        )
+
+    async def _lookup(self, key: str) -> Optional[Dict]:
+        entry = self._l1_get(key)
+        if entry is None and self.use_mongo:
+            try:
+                entry = await asyncio.to_thread(self._l2_get, key)
+            except Exception as e:
+                print(f"⚠️ Job cache read failed for '{key}': {e}")
+                entry = None
+            if entry is not None:
+                self._l1_put(key, entry)
+        return entry
+
+    # ----- freshness -----
+
+    def _age(self, entry: Dict) -> float:
+        return (datetime.now() - entry['fetched_at']).total_seconds()
+
+    def _fresh_for(self, entry: Dict) -> int:
+        return self.ttl if entry['jobs'] else min(self.ttl, EMPTY_RESULT_TTL_SECONDS)
+
+    # ----- fetching -----
+
+    async def _fetch_and_store(self, key: str, fetcher: Callable[[], Awaitable[List[Dict]]]) -> Dict:
+        jobs = await fetcher()
+        entry = {"jobs": jobs, "fetched_at": datetime.now()}
+        self._l1_put(key, entry)
+        if self.use_mongo:
+            try:
+                await asyncio.to_thread(self._l2_put, key, entry)
+            except Exception as e:
+                print(f"⚠️ Job cache write failed for '{key}': {e}")
+        return entry
+
+    def _start_fetch(self, key: str, fetcher) -> asyncio.Task:
+        """One upstream fetch per key; later callers join the running task"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetcher))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        return task
+
+    def _describe(self, entry: Dict, status: str) -> Dict:
+        return {
+            "status": status,
+            "age_seconds": int(self._age(entry)),
+            "fetched_at": entry['fetched_at'].isoformat()
+        }
+
+    async def get_or_fetch(self, job_title: str, location: str,
+                           fetcher: Callable[[], Awaitable[List[Dict]]]):
+        """
+        Serve cached results for (job_title, location), fetching only when needed.
+
+        Returns:
+            (jobs, cache_info) where cache_info = {status, age_seconds, fetched_at}
+        """
+        key = normalize_search_key(job_title, location)
+        entry = await self._lookup(key)
+
+        if entry is not None:
+            age = self._age(entry)
+            if age < self._fresh_for(entry):
+                self.stats["fresh"] += 1
+                return entry['jobs'], self._describe(entry, "fresh")
+            if age < self.max_stale:
+                self.stats["stale"] += 1
+                if key not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    task = self._start_fetch(key, fetcher)
+                    # Background refresh errors are logged, never raised to a caller
+                    task.add_done_callback(_log_refresh_failure)
+                return entry['jobs'], self._describe(entry, "stale")
+
+        self.stats["miss"] += 1
+        entry = await asyncio.shield(self._start_fetch(key, fetcher))
+        return entry['jobs'], self._describe(entry, "miss")
+
+    async def store(self, job_title: str, location: str, jobs: List[Dict]):
+        """Prime the cache with results fetched elsewhere (e.g. the refresh scheduler)"""
+        key = normalize_search_key(job_title, location)
+        await self._fetch_and_store(key, _constant(jobs))
+
+    def clear(self):
+        self._l1.clear()
+
+
+def _constant(value):
+    async def fetcher():
+        return value
+    return fetcher
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Background job search refresh failed: {task.exception()}")
+
+
+job_search_cache = JobSearchCache()
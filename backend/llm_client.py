@@ -0,0 +1,451 @@
+"""
+Lazily constructed LLM clients, model tiers and a resilience layer.
+
+langchain and langchain_google_genai take most of the API's import time, so
+they are imported and the Gemini client is built on first use instead of at
+module import. Routes that never call the model (career pages, jobs, ...) don't
+pay for them on a cold start.
+
+Calls go through `llm_router`, which picks a model tier per call site and
+prompt size: short mentor chat turns use the "fast" tier (a cheaper, quicker
+model with a capped output), assessments use the "heavy" tier. A prompt for a
+fast call site that is larger than LLM_FAST_MAX_PROMPT_CHARS is promoted to
+heavy. Per-tier latency percentiles and token usage are kept for tuning.
+
+Each tier has its own ResilientLLM, since one model can be overloaded while
+the other is fine:
+
+- every call has a deadline covering all of its attempts;
+- transient failures (timeouts, 429/5xx, connection errors) are retried with
+  full-jitter backoff, at most LLM_MAX_ATTEMPTS times and only while the
+  retry budget (a fraction of recent calls) allows, so retries can't
+  multiply load during an outage;
+- a circuit breaker opens when the failure rate over the recent window
+  crosses the threshold. While open, calls fail immediately with
+  LLMUnavailableError and the routes answer in degraded mode; after the
+  cool-down a single probe call decides whether it closes again.
+
+The client's own retries are disabled so this layer owns the retry policy.
+LLM_PROVIDER=fake swaps Gemini for a local fake with configurable latency and
+error rate, for exercising the breaker and degraded paths without the API.
+
+Configuration (environment):
+    LLM_PROVIDER                     "gemini" (default) or "fake"
+    LLM_ROUTES                       call site -> tier (default "chat=fast,assessment=heavy")
+    LLM_FAST_MAX_PROMPT_CHARS        larger fast-tier prompts go to heavy (default 6000)
+    LLM_<TIER>_MODEL                 model name (fast: gemini-2.5-flash-lite, heavy: gemini-2.5-flash)
+    LLM_<TIER>_TEMPERATURE           sampling temperature (default 0.7)
+    LLM_<TIER>_MAX_OUTPUT_TOKENS     output cap (fast: 2048, heavy: provider default)
+    LLM_<TIER>_FAKE_LATENCY_SECONDS  fake provider latency for the tier (default LLM_FAKE_LATENCY_SECONDS)
+    LLM_ASSESSMENT_DEADLINE_SECONDS  deadline for an assessment analysis (default 60)
+    LLM_CHAT_DEADLINE_SECONDS        deadline for a mentor chat reply (default 20)
+    LLM_MAX_ATTEMPTS                 attempts per call, first one included (default 3)
+    LLM_RETRY_BUDGET_RATIO           retries allowed per call made (default 0.2)
+    LLM_BREAKER_FAILURE_RATE         failure rate that opens the breaker (default 0.5)
+    LLM_BREAKER_MIN_CALLS            calls in the window before it can open (default 10)
+    LLM_BREAKER_WINDOW_SECONDS       window the failure rate is computed over (default 60)
+    LLM_BREAKER_OPEN_SECONDS         cool-down before a probe call (default 30)
+    LLM_FAKE_LATENCY_SECONDS         fake provider response time (default 0.2)
+    LLM_FAKE_ERROR_RATE              fraction of fake calls that fail (default 0)
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini').lower()
+
+LLM_ASSESSMENT_DEADLINE_SECONDS = float(os.getenv('LLM_ASSESSMENT_DEADLINE_SECONDS', '60'))
+LLM_CHAT_DEADLINE_SECONDS = float(os.getenv('LLM_CHAT_DEADLINE_SECONDS', '20'))
+
+LLM_FAST_MAX_PROMPT_CHARS = int(os.getenv('LLM_FAST_MAX_PROMPT_CHARS', '6000'))
+
+
+class ModelTier:
+    """A named model configuration that calls can be routed to"""
+
+    def __init__(self, name: str, model: str, temperature: float = 0.7,
+                 max_output_tokens: Optional[int] = None, fake_latency: float = 0.2):
+        self.name = name
+        self.model = model
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.fake_latency = fake_latency
+
+    @classmethod
+    def from_env(cls, name: str, model: str, max_output_tokens: Optional[int] = None) -> "ModelTier":
+        prefix = f"LLM_{name.upper()}_"
+        max_output = os.getenv(prefix + 'MAX_OUTPUT_TOKENS')
+        return cls(
+            name,
+            model=os.getenv(prefix + 'MODEL', model),
+            temperature=float(os.getenv(prefix + 'TEMPERATURE', '0.7')),
+            max_output_tokens=int(max_output) if max_output else max_output_tokens,
+            fake_latency=float(os.getenv(prefix + 'FAKE_LATENCY_SECONDS', os.getenv('LLM_FAKE_LATENCY_SECONDS', '0.2')))
+        )
+
+    def describe(self) -> Dict:
+        return {"model": self.model, "temperature": self.temperature, "max_output_tokens": self.max_output_tokens}
+
+
+LLM_TIERS = {
+    "fast": ModelTier.from_env("fast", "gemini-2.5-flash-lite", max_output_tokens=2048),
+    "heavy": ModelTier.from_env("heavy", "gemini-2.5-flash"),
+}
+
+# Model checked by the readiness probe
+LLM_MODEL = LLM_TIERS["heavy"].model
+
+_llms = {}
+
+
+def get_llm(tier: str = "heavy"):
+    """Shared chat model for a tier, created on first call"""
+    if tier not in _llms:
+        config = LLM_TIERS[tier]
+        if LLM_PROVIDER == "fake":
+            _llms[tier] = FakeChatModel(latency=config.fake_latency,
+                                        error_rate=float(os.getenv('LLM_FAKE_ERROR_RATE', '0')))
+            return _llms[tier]
+        google_api_key = os.getenv("GOOGLE_API_KEY")
+        if not google_api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        _llms[tier] = ChatGoogleGenerativeAI(
+            model=config.model,
+            google_api_key=google_api_key,
+            temperature=config.temperature,
+            max_output_tokens=config.max_output_tokens,
+            max_retries=0
+        )
+    return _llms[tier]
+
+
+class LLMUnavailableError(Exception):
+    """The LLM call failed or was refused; callers should answer in degraded mode"""
+
+    def __init__(self, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# Substrings (of the exception type and message) that mark a failure worth retrying
+RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "resourceexhausted", "resource exhausted",
+                     "unavailable", "deadline", "internal", "timeout", "timed out", "connection",
+                     "temporarily", "overloaded")
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RETRYABLE_MARKERS)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a sliding time window"""
+
+    def __init__(self, failure_rate: float = None, min_calls: int = None,
+                 window_seconds: float = None, open_seconds: float = None, clock=time.monotonic):
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5'))
+        self.min_calls = min_calls if min_calls is not None else int(os.getenv('LLM_BREAKER_MIN_CALLS', '10'))
+        self.window_seconds = window_seconds if window_seconds is not None else float(os.getenv('LLM_BREAKER_WINDOW_SECONDS', '60'))
+        self.open_seconds = open_seconds if open_seconds is not None else float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))
+        self.clock = clock
+        self.state = "closed"
+        self.opened_at = None
+        self._outcomes = deque()  # (time, succeeded)
+        self._probing = False
+        self.transitions = {"opened": 0, "closed": 0}
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (in half-open state only one probe at a time)"""
+        if self.state == "open":
+            if self.clock() - self.opened_at < self.open_seconds:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def abandon(self):
+        """A call that was let through never reported back (e.g. the request was cancelled)"""
+        self._probing = False
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.open_seconds - (self.clock() - self.opened_at))
+
+    def record(self, succeeded: bool):
+        now = self.clock()
+        if self.state == "half_open":
+            self._probing = False
+            if succeeded:
+                self.state = "closed"
+                self._outcomes.clear()
+                self.transitions["closed"] += 1
+            else:
+                self._open(now)
+            return
+        self._outcomes.append((now, succeeded))
+        self._trim(now)
+        if self.state == "closed" and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self._probing = False
+        self.transitions["opened"] += 1
+
+    def status(self) -> Dict:
+        self._trim(self.clock())
+        calls = len(self._outcomes)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            **self.transitions
+        }
+
+
+class RetryBudget:
+    """Each call deposits `ratio` tokens and each retry spends one, capped at `max_tokens`"""
+
+    def __init__(self, ratio: float = None, max_tokens: float = 10):
+        self.ratio = ratio if ratio is not None else float(os.getenv('LLM_RETRY_BUDGET_RATIO', '0.2'))
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ResilientLLM:
+    """Deadlines, budgeted retries with jitter and a circuit breaker around a chat model"""
+
+    def __init__(self, get_model: Callable, breaker: CircuitBreaker = None,
+                 budget: RetryBudget = None, max_attempts: int = None,
+                 base_backoff: float = 0.5, max_backoff: float = 4.0):
+        self.get_model = get_model
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RetryBudget()
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv('LLM_MAX_ATTEMPTS', '3'))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.metrics = {"calls": 0, "succeeded": 0, "failed": 0, "timeouts": 0, "retries": 0,
+                        "retry_budget_exhausted": 0, "short_circuited": 0}
+
+    async def ainvoke(self, messages, deadline: float, model=None):
+        """
+        Invoke the model within `deadline` seconds.
+
+        Raises:
+            LLMUnavailableError: breaker open, deadline exceeded, or the call failed
+                                 and couldn't be retried
+        """
+        model = model if model is not None else self.get_model()
+        if not self.breaker.allow():
+            self.metrics["short_circuited"] += 1
+            raise LLMUnavailableError("circuit_open", self.breaker.retry_after())
+
+        self.metrics["calls"] += 1
+        self.budget.deposit()
+        expires = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await asyncio.wait_for(model.ainvoke(messages), timeout=max(0.0, expires - time.monotonic()))
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError)
+                self.metrics["timeouts" if timed_out else "failed"] += 1
+                self.breaker.record(False)
+                print(f"⚠️ LLM call failed (attempt {attempt}): {type(e).__name__}: {e}")
+                await self._before_retry(e, attempt, expires)
+                continue
+            self.breaker.record(True)
+            self.metrics["succeeded"] += 1
+            return response
+
+    async def _before_retry(self, error: Exception, attempt: int, expires: float):
+        """Sleep before the next attempt, or raise LLMUnavailableError if there shouldn't be one"""
+        reason = "deadline_exceeded" if isinstance(error, asyncio.TimeoutError) else "error"
+        if attempt >= self.max_attempts or not is_retryable(error):
+            raise LLMUnavailableError(reason) from error
+        if self.breaker.state != "closed":
+            raise LLMUnavailableError("circuit_open", self.breaker.retry_after()) from error
+        backoff = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+        if time.monotonic() + backoff >= expires:
+            raise LLMUnavailableError(reason) from error
+        if not self.budget.withdraw():
+            self.metrics["retry_budget_exhausted"] += 1
+            raise LLMUnavailableError(reason) from error
+        self.metrics["retries"] += 1
+        await asyncio.sleep(backoff)
+
+    def status(self) -> Dict:
+        return {
+            "breaker": self.breaker.status(),
+            "retry_budget_tokens": round(self.budget.tokens, 2),
+            **self.metrics
+        }
+
+
+class FakeChatModel:
+    """
+    Local stand-in for the Gemini chat model (LLM_PROVIDER=fake).
+
+    Answers after `latency` seconds; a `error_rate` fraction of calls raise a
+    503-style error. Prompts asking for JSON get a minimal valid assessment.
+    """
+
+    ASSESSMENT = ('{"career_paths": [{"title": "Software Engineer", "description": "Builds software systems.", '
+                  '"match_percentage": 80, "required_education": "B.Tech", "salary_range": "6-20 LPA", '
+                  '"growth_prospects": "High"}], "skills_gap": [], "learning_resources": [], '
+                  '"personalized_advice": "Practice programming every day."}')
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+
+    async def ainvoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise ConnectionError("503 fake provider unavailable")
+        text = " ".join(str(getattr(message, "content", message)) for message in messages)
+        content = self.ASSESSMENT if "JSON" in text else "Focus on fundamentals and build small projects to explore your interests."
+        # Roughly four characters per token, like the real usage metadata
+        input_tokens, output_tokens = len(text) // 4, len(content) // 4
+        return AIMessage(content=content, usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                                          "total_tokens": input_tokens + output_tokens})
+
+
+def prompt_chars(messages) -> int:
+    return sum(len(str(getattr(message, "content", message))) for message in messages)
+
+
+class TierMetrics:
+    """Latency percentiles (over the last `window` calls) and token totals for one tier"""
+
+    def __init__(self, window: int = 500):
+        self.latencies = deque(maxlen=window)
+        self.counts = {"calls": 0, "succeeded": 0, "unavailable": 0, "promoted": 0,
+                       "input_tokens": 0, "output_tokens": 0}
+
+    def record(self, seconds: float, response=None):
+        self.counts["calls"] += 1
+        if response is None:
+            self.counts["unavailable"] += 1
+            return
+        self.counts["succeeded"] += 1
+        self.latencies.append(seconds)
+        usage = getattr(response, "usage_metadata", None) or {}
+        self.counts["input_tokens"] += usage.get("input_tokens", 0)
+        self.counts["output_tokens"] += usage.get("output_tokens", 0)
+
+    def status(self) -> Dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000) if ordered else None
+
+        succeeded = self.counts["succeeded"]
+        return dict(
+            self.counts,
+            latency_ms={"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+            avg_input_tokens=round(self.counts["input_tokens"] / succeeded) if succeeded else None,
+            avg_output_tokens=round(self.counts["output_tokens"] / succeeded) if succeeded else None,
+        )
+
+
+def _parse_routes(value: str) -> Dict[str, str]:
+    routes = {}
+    for rule in value.split(","):
+        call_site, _, tier = rule.partition("=")
+        if call_site.strip() and tier.strip() in LLM_TIERS:
+            routes[call_site.strip()] = tier.strip()
+    return routes
+
+
+class LLMRouter:
+    """Routes each call to a model tier by call site and prompt size"""
+
+    def __init__(self, tiers: Dict[str, ModelTier] = LLM_TIERS, routes: Dict[str, str] = None,
+                 fast_max_prompt_chars: int = LLM_FAST_MAX_PROMPT_CHARS, default_tier: str = "heavy"):
+        self.tiers = tiers
+        self.routes = routes if routes is not None else _parse_routes(
+            os.getenv('LLM_ROUTES', 'chat=fast,assessment=heavy'))
+        self.fast_max_prompt_chars = fast_max_prompt_chars
+        self.default_tier = default_tier
+        self.resilience = {name: ResilientLLM(lambda name=name: get_llm(name)) for name in tiers}
+        self.metrics = {name: TierMetrics() for name in tiers}
+        self.degraded = 0
+
+    def choose(self, call_site: str, messages) -> str:
+        tier = self.routes.get(call_site, self.default_tier)
+        if tier == "fast" and prompt_chars(messages) > self.fast_max_prompt_chars:
+            self.metrics["heavy"].counts["promoted"] += 1
+            tier = "heavy"
+        return tier
+
+    async def ainvoke(self, call_site: str, messages, deadline: float):
+        """
+        Invoke the tier chosen for this call through its resilience layer.
+
+        Raises:
+            LLMUnavailableError: see ResilientLLM.ainvoke
+        """
+        tier = self.choose(call_site, messages)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.resilience[tier].ainvoke(messages, deadline=deadline)
+            return response
+        finally:
+            self.metrics[tier].record(time.perf_counter() - started, response)
+
+    def record_degraded(self):
+        """Count an answer served without the model"""
+        self.degraded += 1
+
+    def status(self) -> Dict:
+        return {
+            "routes": self.routes,
+            "fast_max_prompt_chars": self.fast_max_prompt_chars,
+            "degraded": self.degraded,
+            "tiers": {
+                name: dict(config=tier.describe(), **self.metrics[name].status(),
+                           resilience=self.resilience[name].status())
+                for name, tier in self.tiers.items()
+            }
+        }
+
+
+llm_router = LLMRouter()
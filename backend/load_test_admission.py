@@ -0,0 +1,110 @@
+"""
+Load test for LLM admission control.
+
+One abusive client floods /api/mentor/chat with concurrent requests while a
+set of well-behaved users each send a message every few seconds. Reports
+status codes and latency percentiles per client class, plus the server's
+admission metrics, so you can check that well-behaved users keep bounded
+tail latency while the abuser gets fast 429s.
+
+Usage:
+    python load_test_admission.py --base-url http://localhost:8000
+    python load_test_admission.py --duration 60 --abuse-concurrency 50 --users 10
+
+Runs against a live server (with a real or sandboxed GOOGLE_API_KEY); every
+admitted request is a real LLM call. Admission is keyed on the client address,
+so each simulated client sends its own X-Forwarded-For; uvicorn honours it for
+connections from 127.0.0.1 by default (other hosts: --forwarded-allow-ips).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+
+    def record(self, status, seconds):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.append(seconds)
+
+    def summary(self):
+        return {
+            "requests": len(self.latencies),
+            "statuses": dict(sorted(self.statuses.items(), key=lambda item: str(item[0]))),
+            "p50_ms": round(percentile(self.latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(self.latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(self.latencies, 0.99) * 1000, 1),
+            "max_ms": round(max(self.latencies, default=0) * 1000, 1),
+        }
+
+
+async def send(client, user_id, address, recorder):
+    started = time.perf_counter()
+    try:
+        response = await client.post("/api/mentor/chat", json={"user_id": user_id, "message": "What should I study?"},
+                                     headers={"X-Forwarded-For": address})
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    recorder.record(status, time.perf_counter() - started)
+
+
+async def abuser(client, deadline, recorder):
+    while time.monotonic() < deadline:
+        await send(client, "load-test-abuser", "10.0.0.1", recorder)
+
+
+async def normal_user(client, index, interval, deadline, recorder):
+    # Stagger users so they don't arrive in lockstep
+    await asyncio.sleep(interval * index / 10)
+    while time.monotonic() < deadline:
+        await send(client, f"load-test-user-{index}", f"10.0.1.{index + 1}", recorder)
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    deadline = time.monotonic() + args.duration
+    abusive, normal = Recorder(), Recorder()
+    limits = httpx.Limits(max_connections=args.abuse_concurrency + args.users + 5)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        tasks = [abuser(client, deadline, abusive) for _ in range(args.abuse_concurrency)]
+        tasks += [normal_user(client, i, args.interval, deadline, normal) for i in range(args.users)]
+        await asyncio.gather(*tasks)
+        try:
+            admission = (await client.get("/api/llm/admission-status")).json()
+        except (httpx.HTTPError, ValueError):
+            admission = None
+
+    print(f"🔥 Abusive client ({args.abuse_concurrency} concurrent): {json.dumps(abusive.summary())}")
+    print(f"🙂 Normal users ({args.users}, one request / {args.interval}s): {json.dumps(normal.summary())}")
+    if admission:
+        print(f"📊 Server admission metrics: {json.dumps(admission)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--abuse-concurrency", type=int, default=20, help="parallel requests from the abuser")
+    parser.add_argument("--users", type=int, default=5, help="well-behaved users")
+    parser.add_argument("--interval", type=float, default=15, help="seconds between a normal user's messages")
+    parser.add_argument("--timeout", type=float, default=60)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
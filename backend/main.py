@@ -1,27 +1,54 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
 import os
+import re
+import asyncio
 import json
+import zlib
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from database import get_career_by_slug, get_all_careers, create_or_update_career_from_assessment
-from user_database import (create_or_update_user_profile, save_assessment_data,
+from database import (get_career_by_slug, get_all_careers,
+                      query_careers, get_career_facets, iter_careers_for_export,
+                      get_career_slug_by_id, get_career_version, upsert_careers_from_assessment,
+                      get_career_summaries)
+from career_similarity import get_related_careers, TOP_K
+from job_search_cache import job_search_cache
+from job_refresh import get_job_refresh_scheduler, job_refresh_enabled
+from job_matching import ingest_search_results
+from write_behind import write_behind
+from prompts import build_assessment_messages, build_mentor_messages
+from llm_client import (llm_router, LLMUnavailableError,
+                        LLM_ASSESSMENT_DEADLINE_SECONDS, LLM_CHAT_DEADLINE_SECONDS)
+from admission import llm_admission
+from shared_cache import career_cache, catalog_cache, get_cache_status
+from health import health_checker
+from request_profiler import ProfilingMiddleware, profiling_enabled
+from career_requests import (record_career_request, get_most_requested_careers, get_digest_status,
+                             smtp_configured, admin_email, get_career_request_sender)
+from compression import CompressionMiddleware
+from responses import (FastJSONResponse, PrecomputedJSON, dumps, encode_variants, make_etag,
+                       validator_headers, variant_response, is_not_modified, not_modified)
+from user_database import (create_or_update_user_profile,
                             get_user_progress, get_user_recent_activity,
-                            save_chat_message, track_career_exploration,
-                            get_latest_assessment_results, get_chat_history,
+                            career_view_update, get_top_careers,
+                            assessment_document, chat_message_document,
+                            format_chat_message,
+                            get_latest_assessment_results, get_latest_assessment_version,
+                            remember_latest_assessment, assessment_stats_update, chat_stats_update,
+                            get_chat_history, get_chat_history_version,
                             get_user_context, save_selected_career_journey,
-                            get_selected_career_journey, update_roadmap_progress,
-                            get_roadmap_progress, get_job_listings, apply_to_job,
-                            get_user_job_applications, get_selected_careers)
+                            get_selected_career_journey, apply_roadmap_progress,
+                            get_roadmap_progress, get_job_listings, apply_to_job, job_application_exists,
+                            get_user_job_applications, get_selected_careers,
+                            format_job_application, ensure_application_indexes)
 try:
-    from indeed_scraper import search_indeed_jobs, format_indeed_jobs_for_api
+    from indeed_scraper import search_indeed_jobs_async, format_indeed_jobs_for_api
 except ImportError:
     # Fallback stub functions if indeed_scraper is not available
-    def search_indeed_jobs(job_title: str, location: str = "India", limit: int = 10):
+    async def search_indeed_jobs_async(job_title: str, location: str = "India", limit: int = 10):
         return []
     
     def format_indeed_jobs_for_api(jobs, career_title=None):
@@ -33,7 +60,30 @@ from pathlib import Path
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-app = FastAPI(title="Career Guidance API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop in-process background workers"""
+    write_behind.start()
+    scheduler = None
+    if job_refresh_enabled():
+        scheduler = get_job_refresh_scheduler()
+        scheduler.start()
+    request_sender = None
+    if smtp_configured():
+        request_sender = get_career_request_sender()
+        request_sender.start()
+    yield
+    if scheduler:
+        await scheduler.stop()
+    if request_sender:
+        await request_sender.stop()
+    # Drain queued writes before the process exits
+    await write_behind.stop()
+
+app = FastAPI(title="Career Guidance API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+
+write_behind.on_flush("job_applications", ensure_application_indexes)
 
 # CORS configuration - Allow all origins for development
 app.add_middleware(
@@ -45,16 +95,25 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Initialize Gemini AI
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not found in environment variables")
+# gzip/brotli for catalog and career payloads above the size threshold
+app.add_middleware(CompressionMiddleware)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=GOOGLE_API_KEY,
-    temperature=0.7
-)
+# Per-request profiles on demand (X-Profile header or sampling); not installed unless configured
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Gemini AI client is created lazily on first use (see llm_client.py)
+if not os.getenv("GOOGLE_API_KEY"):
+    print("⚠️ GOOGLE_API_KEY not found in environment variables; AI routes will fail")
+
+# Largest page the explore catalog will return when a limit is requested
+EXPLORE_MAX_PAGE_SIZE = 100
+
+# Field names accepted by the catalog export projection
+EXPORT_FIELD_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+# Most Indeed results returned (and cached) per search
+INDEED_MAX_RESULTS = 25
 
 # Pydantic models
 class AssessmentAnswer(BaseModel):
@@ -169,27 +228,55 @@ ASSESSMENT_QUESTIONS = [
     }
 ]
 
+# Static payloads, encoded once at startup
+ASSESSMENT_QUESTIONS_PAYLOAD = PrecomputedJSON({"questions": ASSESSMENT_QUESTIONS})
+
+def _client_key(request: Request) -> str:
+    """LLM rate-limit key: the client address (user ids in request bodies are unauthenticated)"""
+    return f"ip:{request.client.host}" if request.client else "anonymous"
+
 # API Routes
 @app.get("/")
 async def root():
     return {"message": "Career Guidance API", "version": "1.0.0", "status": "active"}
 
+# Mounted under /api so Vercel (which only routes /api/* to the backend) reaches them;
+# the bare /health paths stay for probes that hit the process directly
+@app.get("/api/health/live")
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process is up and serving (no dependency checks)"""
+    return FastJSONResponse(health_checker.live(), headers={"Cache-Control": "no-store"})
+
+@app.get("/api/health/ready")
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 503 while MongoDB or the LLM provider is down or slower than its threshold"""
+    ready, report = await health_checker.ready()
+    return FastJSONResponse(report, status_code=200 if ready else 503, headers={"Cache-Control": "no-store"})
+
 @app.get("/api/assessment/questions")
-async def get_assessment_questions():
+async def get_assessment_questions(accept_encoding: Optional[str] = Header(default=None),
+                                   if_none_match: Optional[str] = Header(default=None)):
     """Fetch career assessment questions"""
-    return {"questions": ASSESSMENT_QUESTIONS}
+    return ASSESSMENT_QUESTIONS_PAYLOAD.response(accept_encoding, if_none_match)
 
 @app.post("/api/assessment/submit")
-async def submit_assessment(submission: AssessmentSubmission):
+async def submit_assessment(submission: AssessmentSubmission, request: Request):
     """Process assessment answers and return AI-generated career recommendations"""
+    # Per-client / global LLM rate limits (429 + Retry-After when exceeded)
+    await llm_admission.admit(_client_key(request))
     try:
         print(f"📝 Assessment submission received for user: {submission.user_id}")
         print(f"📝 Number of answers: {len(submission.answers) if submission.answers else 0}")
         
-        # Ensure user profile exists
+        # Ensure user profile exists. Written before responding, not behind it: the
+        # assessment is what creates the user document, and the career-journey and
+        # roadmap routes the frontend calls next need it to be there
         try:
             if submission.user_profile:
-                create_or_update_user_profile(
+                await asyncio.to_thread(
+                    create_or_update_user_profile,
                     firebase_uid=submission.user_id,
                     email=submission.user_profile.get('email', ''),
                     display_name=submission.user_profile.get('displayName')
@@ -203,60 +290,18 @@ async def submit_assessment(submission: AssessmentSubmission):
         if not submission.answers or len(submission.answers) == 0:
             raise HTTPException(status_code=400, detail="No answers provided in assessment")
         
-        answers_text = "\n".join([
-            f"Q: {ans.question}\nA: {ans.answer}" 
-            for ans in submission.answers
-        ])
-        
         print(f"🤖 Invoking AI model for career analysis...")
         
-        # Create prompt template for career analysis
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert career counselor specializing in guiding Indian students. 
-            Analyze the student's assessment responses and provide comprehensive career guidance.
-            
-            Your response must be in valid JSON format with the following structure:
-            {{
-                "career_paths": [
-                    {{
-                        "title": "Career Title",
-                        "description": "Detailed description",
-                        "match_percentage": 85,
-                        "required_education": "Educational requirements",
-                        "salary_range": "Expected salary in INR",
-                        "growth_prospects": "Career growth outlook"
-                    }}
-                ],
-                "skills_gap": [
-                    {{
-                        "skill": "Skill name",
-                        "current_level": "Beginner/Intermediate/Advanced",
-                        "required_level": "Required proficiency",
-                        "priority": "High/Medium/Low",
-                        "learning_path": "How to acquire this skill"
-                    }}
-                ],
-                "learning_resources": [
-                    {{
-                        "resource_name": "Course/Resource name",
-                        "type": "Course/Book/Certification",
-                        "provider": "Platform or institution",
-                        "relevance": "Why this is recommended"
-                    }}
-                ],
-                "personalized_advice": "Detailed personalized career advice including next steps, entrance exams to consider, and strategic guidance for Indian students"
-            }}
-            
-            Provide at least 3-5 career paths, identify 5-7 key skills gaps, recommend 5-8 learning resources, 
-            and give comprehensive personalized advice tailored to the Indian education and job market."""),
-            ("human", "Student Assessment Responses:\n\n{answers}\n\nProvide comprehensive career guidance in JSON format.")
-        ])
-        
-        # Invoke AI model
+        # Invoke AI model (tier routing, deadline, budgeted retries and circuit breaker in llm_client)
         try:
-            chain = prompt_template | llm
-            response = chain.invoke({"answers": answers_text})
+            messages = build_assessment_messages([
+                {"question": ans.question, "answer": ans.answer} for ans in submission.answers
+            ])
+            response = await llm_router.ainvoke("assessment", messages, deadline=LLM_ASSESSMENT_DEADLINE_SECONDS)
             print(f"✅ AI model response received")
+        except LLMUnavailableError as unavailable:
+            print(f"⚠️ AI model unavailable ({unavailable.reason}); answering from stored recommendations")
+            return _degraded_assessment_response(submission.user_id, unavailable)
         except Exception as ai_error:
             print(f"❌ AI model error: {ai_error}")
             import traceback
@@ -375,11 +420,10 @@ async def submit_assessment(submission: AssessmentSubmission):
         if not isinstance(career_paths, list):
             career_paths = []
         
-        for career in career_paths:
-            try:
-                create_or_update_career_from_assessment(career)
-            except Exception as e:
-                print(f"⚠️ Warning: Could not auto-add career '{career.get('title', 'Unknown')}': {e}")
+        # Database writes below go through the write-behind queue, so the
+        # recommendations are returned as soon as the AI result is parsed
+        if career_paths:
+            write_behind.defer(upsert_careers_from_assessment, career_paths)
         
         # Save assessment data to database
         try:
@@ -395,9 +439,13 @@ async def submit_assessment(submission: AssessmentSubmission):
                 'personalizedAdvice': result.get('personalized_advice', '')
             }
             
-            save_assessment_data(submission.user_id, answers_list, results_dict)
-            print(f"✅ Assessment data saved for user {submission.user_id}")
-            print(f"✅ Auto-added {len(career_paths)} careers to Explore Careers section")
+            assessment = assessment_document(submission.user_id, answers_list, results_dict)
+            write_behind.enqueue("assessments", assessment)
+            write_behind.enqueue("users", assessment_stats_update(submission.user_id))
+            # Other workers see the new results (explore match percentages, ETags) before the write lands
+            remember_latest_assessment(assessment)
+            print(f"✅ Assessment data queued for user {submission.user_id}")
+            print(f"✅ Queued {len(career_paths)} careers for the Explore Careers section")
         except Exception as db_error:
             print(f"⚠️ Warning: Could not save assessment data: {db_error}")
             import traceback
@@ -418,102 +466,96 @@ async def submit_assessment(submission: AssessmentSubmission):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing assessment: {str(e)}")
 
+def _degraded_notice(unavailable: LLMUnavailableError) -> Dict:
+    notice = {"reason": unavailable.reason}
+    if unavailable.retry_after:
+        notice["retry_after_seconds"] = round(unavailable.retry_after)
+    return notice
+
+def _degraded_assessment_response(user_id: str, unavailable: LLMUnavailableError):
+    """Recommendations without the AI model: the user's previous results, else popular careers.
+    Nothing is saved, so the next successful submission replaces them."""
+    llm_router.record_degraded()
+    previous = get_latest_assessment_results(user_id) if user_id else None
+    if previous and previous.get('careerPaths'):
+        recommendations = {
+            "career_paths": previous['careerPaths'],
+            "skills_gap": previous.get('skillsGap', []),
+            "learning_resources": previous.get('learningResources', []),
+            "personalized_advice": previous.get('personalizedAdvice', ''),
+        }
+        source = "previous_assessment"
+    else:
+        careers = get_career_summaries(get_top_careers(limit=5)) or query_careers(limit=5)[0]
+        recommendations = {
+            "career_paths": [{
+                "title": career.get('title'),
+                "description": career.get('short_description', ''),
+                "salary_range": career.get('avg_salary'),
+            } for career in careers],
+            "skills_gap": [],
+            "learning_resources": [],
+            "personalized_advice": ("Our AI counselor is temporarily unavailable, so these are the careers students "
+                                    "explore most. Please submit your assessment again shortly for personalized guidance."),
+        }
+        source = "popular_careers"
+    return {
+        "status": "degraded",
+        "user_id": user_id,
+        "recommendations": recommendations,
+        "degraded": dict(_degraded_notice(unavailable), source=source)
+    }
+
+def _degraded_chat_reply(user_context: Dict) -> str:
+    """Mentor reply built from the user's stored assessment when the AI model is unavailable"""
+    reply = "I'm having trouble reaching my AI service right now, so I can't give you a full answer. Please try again in a minute."
+    matches = [career.get('title') for career in user_context.get('career_matches', [])[:3] if career.get('title')]
+    if matches:
+        reply += f" Meanwhile, your assessment's top matches were {', '.join(matches)}; their roadmaps in Explore Careers are a good next step."
+    return reply
+
+def _pending_chat_messages(firebase_uid: str):
+    """Chat messages still waiting in the write-behind queue, oldest first"""
+    return write_behind.pending("chat_history", lambda doc: doc['firebase_uid'] == firebase_uid)
+
+def _chat_history_with_pending(firebase_uid: str, limit: int, pending=None):
+    """Stored chat history plus queued messages, chronological, last `limit` entries"""
+    if pending is None:
+        pending = _pending_chat_messages(firebase_uid)
+    history = get_chat_history(firebase_uid, limit=limit)
+    history += [format_chat_message(chat) for chat in pending]
+    return history[-limit:] if limit > 0 else history
+
 @app.post("/api/mentor/chat")
-async def chat_with_mentor(chat: ChatMessage):
+async def chat_with_mentor(chat: ChatMessage, request: Request):
     """AI Mentor chatbot for real-time career guidance with context awareness"""
+    await llm_admission.admit(_client_key(request))
     try:
         # Get user context (career matches, skills, assessment results)
         user_context = get_user_context(chat.user_id)
         
         # Get recent chat history (last 5 conversations for context)
-        chat_history = get_chat_history(chat.user_id, limit=5)
+        chat_history = _chat_history_with_pending(chat.user_id, limit=5)
         
-        # Build context-aware system message
-        context_parts = []
+        # Static system prompt first (cacheable prefix); context is fitted to a token budget
+        career_context = chat.context if isinstance(chat.context, dict) else None
+        messages = build_mentor_messages(chat.message, career_context, user_context, chat_history)
         
-        # Add career context from Explore/Detail page if provided
-        if chat.context and isinstance(chat.context, dict):
-            if 'career_title' in chat.context:
-                context_parts.append("CURRENT CAREER OF INTEREST (User clicked from Explore/Detail page):")
-                context_parts.append(f"- Career: {chat.context.get('career_title')}")
-                if chat.context.get('career_description'):
-                    context_parts.append(f"- Description: {chat.context.get('career_description')[:300]}")
-                if chat.context.get('avg_salary'):
-                    context_parts.append(f"- Average Salary: {chat.context.get('avg_salary')}")
-                if chat.context.get('popular_exams'):
-                    exams = ', '.join(chat.context.get('popular_exams', [])[:5])
-                    context_parts.append(f"- Entrance Exams: {exams}")
-                if chat.context.get('skills_required'):
-                    skills = ', '.join(chat.context.get('skills_required', [])[:5])
-                    context_parts.append(f"- Required Skills: {skills}")
-                if chat.context.get('job_roles'):
-                    roles = ', '.join(chat.context.get('job_roles', [])[:3])
-                    context_parts.append(f"- Job Roles: {roles}")
-                context_parts.append("\nIMPORTANT: The user is specifically asking about THIS career. Reference it directly in your responses.")
-                context_parts.append("")
-        
-        if user_context['assessment_completed']:
-            context_parts.append("USER'S CAREER ASSESSMENT RESULTS:")
-            
-            if user_context['career_matches']:
-                career_list = ", ".join([f"{c.get('title', 'Career')} ({c.get('match_percentage', 0)}% match)" 
-                                        for c in user_context['career_matches'][:3]])
-                context_parts.append(f"- Career Matches: {career_list}")
-            
-            if user_context['skills_to_develop']:
-                skills_list = ", ".join([s.get('skill', 'Skill') for s in user_context['skills_to_develop'][:5]])
-                context_parts.append(f"- Skills to Develop: {skills_list}")
-            
-            if user_context['selected_careers']:
-                context_parts.append(f"- Selected Career Interests: {', '.join(user_context['selected_careers'])}")
-        
-        # Add chat history context if available
-        if chat_history:
-            context_parts.append("\nRECENT CONVERSATION HISTORY:")
-            for i, hist in enumerate(chat_history[-3:], 1):  # Last 3 conversations
-                context_parts.append(f"\nPrevious exchange {i}:")
-                context_parts.append(f"User: {hist['message']}")
-                context_parts.append(f"Your response: {hist['response'][:200]}...")  # First 200 chars
-        
-        context_info = "\n".join(context_parts) if context_parts else ""
-        
-        # Build messages array with system context and chat history
-        messages = [
-            SystemMessage(content=f"""You are Prism AI Mentor, a friendly and knowledgeable career guidance counselor 
-            specializing in helping Indian students make informed career decisions. 
-            
-            IMPORTANT: You have access to the user's personal information:
-            {context_info}
-            
-            Use this information to provide personalized advice. Reference their career matches, skills, and previous 
-            conversations naturally. If they ask about careers, skills, or topics mentioned in their assessment, 
-            use that context to give more relevant answers.
-            
-            Provide conversational, empathetic, and practical career advice. Consider:
-            - Indian education system (10th, 12th, graduation paths)
-            - Entrance exams (JEE, NEET, CAT, UPSC, etc.)
-            - Career opportunities in India and abroad
-            - Current job market trends
-            - Skill development and certifications
-            
-            Keep responses concise (2-4 paragraphs), friendly, and actionable. Reference their specific career matches 
-            and skills when relevant.""")
-        ]
-        
-        # Add recent chat history as conversation context (last 2-3 exchanges)
-        if chat_history:
-            for hist in chat_history[-2:]:  # Last 2 conversations
-                messages.append(HumanMessage(content=hist['message']))
-                messages.append(AIMessage(content=hist['response'][:500]))  # Truncated for context
-        
-        # Add current user message
-        messages.append(HumanMessage(content=chat.message))
-        
-        # Invoke AI with full context
-        response = llm.invoke(messages)
+        # Invoke AI with full context; answer in degraded mode (not saved) when it's unavailable
+        try:
+            response = await llm_router.ainvoke("chat", messages, deadline=LLM_CHAT_DEADLINE_SECONDS)
+        except LLMUnavailableError as unavailable:
+            llm_router.record_degraded()
+            return {
+                "status": "degraded",
+                "response": _degraded_chat_reply(user_context),
+                "user_id": chat.user_id,
+                "degraded": _degraded_notice(unavailable)
+            }
         
-        # Save chat history
-        save_chat_message(chat.user_id, chat.message, response.content)
+        # Save chat history (written behind the response)
+        write_behind.enqueue("chat_history", chat_message_document(chat.user_id, chat.message, response.content))
+        write_behind.enqueue("users", chat_stats_update(chat.user_id))
         
         return {
             "status": "success",
@@ -526,68 +568,136 @@ async def chat_with_mentor(chat: ChatMessage):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error in chat: {str(e)}")
 
+@app.get("/api/write-behind/status")
+async def get_write_behind_status():
+    """Write-behind queue metrics (queue depth, writes, duplicates, failures)"""
+    return write_behind.status()
+
+@app.get("/api/cache/status")
+async def get_cache_status_api():
+    """Shared cache metrics per namespace (L1/L2 hits, misses, invalidations received)"""
+    return get_cache_status()
+
+@app.get("/api/llm/status")
+async def get_llm_status():
+    """LLM routing and resilience metrics per model tier: latency, tokens, breaker state, retries"""
+    return llm_router.status()
+
+@app.get("/api/llm/admission-status")
+async def get_llm_admission_status():
+    """LLM admission control metrics (admitted, queued, rejected, queue depth)"""
+    return llm_admission.status()
+
+def _explore_payload(facets: dict, user_id: Optional[str], category: Optional[str], salary_min: Optional[int],
+                     salary_max: Optional[int], exam: Optional[str], sort: str, limit: Optional[int],
+                     cursor: Optional[str]) -> dict:
+    """One page of /api/careers/explore (with match percentages when user_id is given)"""
+    try:
+        careers, next_cursor = query_careers(
+            category=category, salary_min=salary_min, salary_max=salary_max,
+            exam=exam, sort=sort, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # If user_id provided, add match percentages from their assessment results
+    if user_id:
+        try:
+            latest_results = get_latest_assessment_results(user_id)
+            recommended = (latest_results or {}).get('careerPaths') or (latest_results or {}).get('career_paths')
+            if recommended:
+                # Create a map of career titles to match percentages
+                match_map = {}
+                for career in recommended:
+                    title = career.get('title', '').strip()
+                    match_percentage = career.get('match_percentage')
+                    if title and match_percentage is not None:
+                        match_map[title.lower()] = match_percentage
+                
+                # Add match percentages to careers
+                for career in careers:
+                    career_title = career.get('title', '').strip().lower()
+                    if career_title in match_map:
+                        career['match_percentage'] = match_map[career_title]
+                        career['is_recommended'] = True
+        except Exception as e:
+            print(f"⚠️ Could not fetch match percentages for user {user_id}: {e}")
+    
+    # Add default careers if database is empty
+    if not careers and not facets.get('total_careers'):
+        careers = [
+            {
+                "slug": "engineering",
+                "title": "Engineering",
+                "short_description": "Various engineering disciplines including Computer Science, Mechanical, Electrical, Civil, etc.",
+                "popular_exams": ["JEE Main", "JEE Advanced", "State Engineering Entrance Exams"],
+                "avg_salary": "₹4-15 LPA"
+            }
+        ]
+        facets = {"total_careers": 1, "total_exams": 3, "categories": {}, "exams": {}}
+    
+    categories = [name for name, count in facets.get('categories', {}).items() if count > 0]
+    
+    return {
+        "careers": careers,
+        "next_cursor": next_cursor,
+        "statistics": {
+            "total_careers": facets.get('total_careers', 0),
+            "total_categories": len(categories),
+            "total_exams": facets.get('total_exams', 0),
+            "categories": categories
+        },
+        "facets": {
+            "categories": facets.get('categories', {}),
+            "exams": facets.get('exams', {})
+        }
+    }
+
 @app.get("/api/careers/explore")
-async def explore_careers(user_id: Optional[str] = None):
+async def explore_careers(request: Request, user_id: Optional[str] = None, category: Optional[str] = None,
+                          salary_min: Optional[int] = None, salary_max: Optional[int] = None,
+                          exam: Optional[str] = None, sort: str = "title",
+                          limit: Optional[int] = None, cursor: Optional[str] = None):
     """Get popular career paths for Indian students from database.
     If user_id is provided, includes match percentages from user's latest assessment.
-    Returns real statistics about careers.
+
+    Filtering (category, salary_min/salary_max in INR, exam), sorting
+    (title, salary_asc, salary_desc) and keyset pagination (limit + cursor)
+    happen in MongoDB. Statistics and facet counts come from the precomputed
+    catalog facets document rather than being recomputed per request.
+
+    The ETag combines the catalog version (bumped on every career write), the
+    query and the user's latest assessment, so unchanged pages get a 304
+    without running the catalog query (pages with a user_id carry no
+    Last-Modified and are validated by ETag only). Anonymous pages are cached encoded
+    (with gzip/br variants) in the catalog cache under that ETag; pages with
+    match percentages are rendered per request.
     """
+    if limit is not None:
+        limit = max(1, min(limit, EXPLORE_MAX_PAGE_SIZE))
     try:
-        careers = get_all_careers()
-        
-        # Calculate real statistics
-        total_careers = len(careers)
-        categories = set(career.get('category', 'Unknown') for career in careers)
-        total_exams = sum(len(career.get('popular_exams', [])) for career in careers)
-        
-        # If user_id provided, add match percentages from their assessment results
+        facets = get_career_facets()
+        assessment_version = get_latest_assessment_version(user_id) if user_id else None
+        etag = make_etag(facets.get('version', 0), category, salary_min, salary_max, exam, sort,
+                         limit, cursor, user_id, assessment_version)
+        # Personalised pages also change with the user's assessment, which the catalog's
+        # update time doesn't cover: only the ETag validates them
+        last_modified = None if user_id else facets.get('updated_at')
+        validators = validator_headers(etag, last_modified,
+                                       cache_control="private, no-cache" if user_id else "no-cache")
+        if is_not_modified(request.headers, etag, last_modified):
+            return not_modified(validators)
+
         if user_id:
-            try:
-                latest_results = get_latest_assessment_results(user_id)
-                if latest_results and latest_results.get('career_paths'):
-                    # Create a map of career titles to match percentages
-                    match_map = {}
-                    for career in latest_results['career_paths']:
-                        title = career.get('title', '').strip()
-                        match_percentage = career.get('match_percentage')
-                        if title and match_percentage is not None:
-                            match_map[title.lower()] = match_percentage
-                    
-                    # Add match percentages to careers
-                    for career in careers:
-                        career_title = career.get('title', '').strip().lower()
-                        if career_title in match_map:
-                            career['match_percentage'] = match_map[career_title]
-                            career['is_recommended'] = True
-            except Exception as e:
-                print(f"⚠️ Could not fetch match percentages for user {user_id}: {e}")
-        
-        # Add default careers if database is empty
-        if not careers:
-            careers = [
-                {
-                    "slug": "engineering",
-                    "title": "Engineering",
-                    "short_description": "Various engineering disciplines including Computer Science, Mechanical, Electrical, Civil, etc.",
-                    "popular_exams": ["JEE Main", "JEE Advanced", "State Engineering Entrance Exams"],
-                    "avg_salary": "₹4-15 LPA"
-                }
-            ]
-        
-        # Calculate real statistics (moved after default careers check)
-        total_careers = len(careers)
-        categories = set(career.get('category', 'Unknown') for career in careers if career.get('category'))
-        total_exams = sum(len(career.get('popular_exams', [])) for career in careers if career.get('popular_exams'))
-        
-        return {
-            "careers": careers,
-            "statistics": {
-                "total_careers": total_careers,
-                "total_categories": len(categories),
-                "total_exams": total_exams,
-                "categories": list(categories) if categories else []
-            }
-        }
+            return FastJSONResponse(_explore_payload(facets, user_id, category, salary_min, salary_max,
+                                                     exam, sort, limit, cursor), headers=validators)
+        # Anonymous pages are the same for everyone: cache the encoded body and its compressed
+        # variants under the ETag (which carries the catalog version, so career writes retire them)
+        variants = catalog_cache.get_or_load(f"explore:{etag}", lambda: encode_variants(_explore_payload(
+            facets, None, category, salary_min, salary_max, exam, sort, limit, cursor)))
+        return variant_response(variants, request.headers.get('accept-encoding'), validators)
+    except HTTPException:
+        raise
     except Exception as e:
         # Fallback to static data if database fails
         print(f"Database error: {e}")
@@ -597,6 +707,7 @@ async def explore_careers(user_id: Optional[str] = None):
         ]
         return {
             "careers": fallback_careers,
+            "next_cursor": None,
             "statistics": {
                 "total_careers": len(fallback_careers),
                 "total_categories": 1,
@@ -605,24 +716,108 @@ async def explore_careers(user_id: Optional[str] = None):
             }
         }
 
+def _ndjson_lines(documents, compress: bool = False):
+    """Encode documents as NDJSON chunks, optionally as one incremental gzip stream"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    for document in documents:
+        line = dumps(document) + b"\n"
+        if compressor:
+            chunk = compressor.compress(line)
+            if chunk:
+                yield chunk
+        else:
+            yield line
+    if compressor:
+        yield compressor.flush()
+
+@app.get("/api/careers/export")
+async def export_careers(fields: Optional[str] = None, gzip: bool = False, batch_size: int = 100):
+    """Stream the full career catalog as NDJSON (one career document per line).
+
+    Args:
+        fields: Comma-separated fields to include, e.g. "title,roadmap,skills_required" (default: all)
+        gzip: Send a gzip file (careers.ndjson.gz, application/gzip) instead of plain NDJSON
+        batch_size: MongoDB cursor batch size (1-1000)
+    """
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        if any(not EXPORT_FIELD_PATTERN.match(f) for f in field_list):
+            raise HTTPException(status_code=400, detail="Invalid field name in 'fields'")
+    batch_size = max(1, min(batch_size, 1000))
+    
+    # gzip=true downloads a careers.ndjson.gz file (application/gzip), not a
+    # gzip-encoded NDJSON body, so clients keep the compressed bytes as-is
+    headers = {"Content-Disposition": 'attachment; filename="careers.ndjson' + ('.gz"' if gzip else '"')}
+    
+    # Sync generator: Starlette iterates it in a threadpool so cursor round trips
+    # don't block the event loop
+    documents = iter_careers_for_export(fields=field_list, batch_size=batch_size)
+    return StreamingResponse(
+        _ndjson_lines(documents, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers=headers
+    )
+
 @app.get("/api/careers/{slug}")
-async def get_career_details(slug: str, user_id: Optional[str] = None):
-    """Get detailed information about a specific career"""
+async def get_career_details(request: Request, slug: str, user_id: Optional[str] = None):
+    """Get detailed information about a specific career.
+
+    Served from the shared career cache (invalidated on every career write), which
+    holds the encoded body and its gzip/br variants; honours If-None-Match / If-Modified-Since against the cached validators.
+    """
     try:
-        career = get_career_by_slug(slug)
-        if not career:
+        cached = career_cache.get_or_load(slug, lambda: _load_career_details(slug))
+        if not cached:
             raise HTTPException(status_code=404, detail="Career not found")
         
-        # Track career exploration if user_id provided
+        # Track career exploration if user_id provided (written behind the response)
         if user_id:
-            track_career_exploration(user_id, slug)
+            write_behind.enqueue("career_stats", career_view_update(slug))
         
-        return {"career": career}
+        validators = validator_headers(cached['etag'], cached['updated_at'])
+        if is_not_modified(request.headers, cached['etag'], cached['updated_at']):
+            return not_modified(validators)
+        return variant_response(cached['variants'], request.headers.get('accept-encoding'), validators)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching career details: {str(e)}")
 
+def _load_career_details(slug: str):
+    """
+    The encoded career response (plus gzip/br variants), its conditional-GET validators and
+    the roadmap, as stored in the career cache
+    """
+    version = get_career_version(slug)
+    if not version:
+        return None
+    career = get_career_by_slug(slug)
+    if not career:
+        return None
+    return {
+        "variants": encode_variants({"career": career}),
+        "roadmap": career.get('roadmap') or [],
+        "etag": make_etag(version['id'], version['version'], version['updated_at']),
+        "updated_at": version['updated_at']
+    }
+
+@app.get("/api/careers/{slug}/related")
+async def get_related_careers_api(slug: str, limit: int = 5):
+    """Get careers similar to this one (shared skills, entrance exams and job roles)"""
+    try:
+        limit = max(1, min(limit, TOP_K))
+        related = get_related_careers(slug, limit=limit)
+        if related is None:
+            if not get_career_by_slug(slug):
+                raise HTTPException(status_code=404, detail="Career not found")
+            related = []
+        return FastJSONResponse({"slug": slug, "related_careers": related})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching related careers: {str(e)}")
+
 @app.get("/api/user/{firebase_uid}/progress")
 async def get_user_dashboard_data(firebase_uid: str):
     """Get user progress and dashboard data"""
@@ -681,14 +876,21 @@ async def get_user_selected_careers(firebase_uid: str):
         raise HTTPException(status_code=500, detail=f"Error fetching selected careers: {str(e)}")
 
 @app.get("/api/mentor/chat/history/{firebase_uid}")
-async def get_mentor_chat_history(firebase_uid: str, limit: int = 20):
-    """Get user's chat history with AI mentor"""
+async def get_mentor_chat_history(request: Request, firebase_uid: str, limit: int = 20):
+    """Get user's chat history with AI mentor (304 when no message was added since)"""
     try:
-        history = get_chat_history(firebase_uid, limit=limit)
-        return {
+        pending = _pending_chat_messages(firebase_uid)
+        latest = pending[-1]['timestamp'] if pending else get_chat_history_version(firebase_uid)
+        etag = make_etag(firebase_uid, limit, latest)
+        validators = validator_headers(etag, latest, cache_control="private, no-cache")
+        if is_not_modified(request.headers, etag, latest):
+            return not_modified(validators)
+        
+        history = _chat_history_with_pending(firebase_uid, limit=limit, pending=pending)
+        return FastJSONResponse({
             "status": "success",
             "history": history
-        }
+        }, headers=validators)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching chat history: {str(e)}")
 
@@ -746,14 +948,13 @@ async def select_career_journey(data: Dict):
 
 @app.post("/api/career/request")
 async def request_career_addition(data: Dict):
-    """Request admin to add a career that is not in the database"""
+    """Request admin to add a career that is not in the database.
+
+    Requests are aggregated per career slug (one upsert) and reported to the
+    admin in a periodic digest instead of one email per click.
+    """
     try:
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
         career_title = data.get('career_title', '')
-        career_slug = data.get('career_slug', '')
         user_email = data.get('user_email', '')
         user_name = data.get('user_name', 'User')
         firebase_uid = data.get('firebase_uid', '')
@@ -762,156 +963,104 @@ async def request_career_addition(data: Dict):
         if not career_title:
             raise HTTPException(status_code=400, detail="Career title is required")
         
-        # Save request to database for tracking
-        try:
-            from database import get_db_connection
-            connection = get_db_connection()
-            try:
-                with connection.cursor() as cursor:
-                    cursor.execute("""
-                        INSERT INTO career_requests (firebase_uid, career_title, career_slug, user_email, user_name, message, status)
-                        VALUES (%s, %s, %s, %s, %s, %s, 'pending')
-                    """, (firebase_uid, career_title, career_slug, user_email, user_name, user_message))
-                    connection.commit()
-                    print(f"✅ Career request saved to database: {career_title}")
-            except Exception as db_error:
-                print(f"⚠️ Could not save career request to database: {db_error}")
-                # Continue even if DB save fails - try to create table
-                try:
-                    with connection.cursor() as cursor:
-                        cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS career_requests (
-                                id INT AUTO_INCREMENT PRIMARY KEY,
-                                firebase_uid VARCHAR(255) NOT NULL,
-                                career_title VARCHAR(255) NOT NULL,
-                                career_slug VARCHAR(255),
-                                user_email VARCHAR(255),
-                                user_name VARCHAR(255),
-                                message TEXT,
-                                status VARCHAR(50) DEFAULT 'pending',
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                                INDEX idx_firebase_uid (firebase_uid),
-                                INDEX idx_status (status)
-                            )
-                        """)
-                        connection.commit()
-                        # Retry insert
-                        cursor.execute("""
-                            INSERT INTO career_requests (firebase_uid, career_title, career_slug, user_email, user_name, message, status)
-                            VALUES (%s, %s, %s, %s, %s, %s, 'pending')
-                        """, (firebase_uid, career_title, career_slug, user_email, user_name, user_message))
-                        connection.commit()
-                        print(f"✅ Career request saved after table creation: {career_title}")
-                except:
-                    pass
-            finally:
-                connection.close()
-        except Exception as db_init_error:
-            print(f"⚠️ Database connection error: {db_init_error}")
-            # Continue with email sending even if DB fails
-        
-        # Prepare email
-        admin_email = "moulik.023@gmail.com"
-        subject = f"New Career Request: {career_title}"
-        
-        # Email body
-        email_body = f"""
-Hello Admin (moulik.023@gmail.com),
-
-A user has requested to add a new career to the Prism database.
-
-Career Details:
-- Career Title: {career_title}
-- Career Slug: {career_slug}
-
-User Details:
-- Name: {user_name}
-- Email: {user_email}
-- User ID: {firebase_uid}
-
-User Message:
-{user_message if user_message else 'No additional message provided.'}
-
-Please add this career to the database with complete information including:
-- Career description
-- Roadmap steps (4 detailed steps like Data Science)
-- Entrance exams (3-4 relevant exams)
-- Educational paths (UG, PG, Certifications)
-- Required skills (6-8 skills)
-- Job roles (4 levels: Junior → Mid → Senior → Lead)
-- Learning resources (courses, books, platforms)
-
-You can use the insert_product_manager_careers.sql file as a template.
-
-Thank you!
-Prism Career Guidance System
-
-Note: This email was automatically generated when user attempted to select a career 
-that doesn't exist in the database. Career will be automatically added with roadmap 
-once you insert the data using the SQL template.
-        """
-        
-        # Send email
         try:
-            # Use Gmail SMTP (you may need to configure this based on your email provider)
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', '587'))
-            smtp_user = os.getenv('SMTP_USER', '')  # Your email
-            smtp_password = os.getenv('SMTP_PASSWORD', '')  # App password
-            
-            # If SMTP credentials are not configured, return error so frontend can use Gmail fallback
-            if not smtp_user or not smtp_password:
-                print(f"📧 Career Request (Email not configured):")
-                print(f"   To: {admin_email}")
-                print(f"   Subject: {subject}")
-                print(f"   Career: {career_title}")
-                print(f"   User: {user_email}")
-                print("\n⚠️ Configure SMTP_USER and SMTP_PASSWORD in .env to send emails")
-                return {
-                    "status": "email_not_configured",
-                    "message": "Email service not configured. Please use Gmail compose option.",
-                    "career_title": career_title,
-                    "career_slug": career_slug,
-                    "admin_email": admin_email,
-                    "note": "Request saved to database. Please use Gmail to notify admin."
-                }
-            
-            msg = MIMEMultipart()
-            msg['From'] = smtp_user
-            msg['To'] = admin_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(email_body, 'plain'))
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            text = msg.as_string()
-            server.sendmail(smtp_user, admin_email, text)
-            server.quit()
-            
-            print(f"✅ Email sent to admin for career request: {career_title}")
-            
+            aggregate = record_career_request(firebase_uid, career_title, user_email, user_name, user_message)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        print(f"✅ Career request recorded: {career_title} ({aggregate['requester_count']} users)")
+        
+        # If SMTP is not configured, tell the frontend so it can use the Gmail fallback
+        if not smtp_configured():
+            print("⚠️ Configure SMTP_USER and SMTP_PASSWORD in .env to send career request digests")
             return {
-                "status": "success",
-                "message": f"Career request sent to admin. '{career_title}' will be added soon!"
-            }
-        except Exception as email_error:
-            print(f"⚠️ Error sending email: {email_error}")
-            # Return error status so frontend can use Gmail fallback
-            return {
-                "status": "email_failed",
-                "message": "Email sending failed. Please use Gmail compose option.",
+                "status": "email_not_configured",
+                "message": "Email service not configured. Please use Gmail compose option.",
                 "career_title": career_title,
-                "career_slug": career_slug,
-                "admin_email": admin_email,
-                "error": str(email_error),
+                "career_slug": aggregate['slug'],
+                "admin_email": admin_email(),
+                "requester_count": aggregate['requester_count'],
                 "note": "Request saved to database. Please use Gmail to notify admin."
             }
         
+        return {
+            "status": "success",
+            "message": f"Career request sent to admin. '{career_title}' will be added soon!",
+            "career_slug": aggregate['slug'],
+            "requester_count": aggregate['requester_count']
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing career request: {str(e)}")
 
+@app.get("/api/career/requests/top")
+async def get_top_career_requests(limit: int = 20):
+    """Most-requested careers that are still missing from the catalog"""
+    try:
+        limit = max(1, min(limit, 100))
+        return {"status": "success", "careers": get_most_requested_careers(limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching career requests: {str(e)}")
+
+@app.get("/api/career/request/status")
+async def get_career_request_status():
+    """Career-request digest schedule and sender metrics"""
+    return {
+        "digest": get_digest_status(),
+        "sender": get_career_request_sender().status()
+    }
+
+def _roadmap_progress_items(roadmap, completed):
+    """Completed steps in the shape the Career Journey page keys on (`<stage>_step_<index>`)"""
+    return [{
+        "roadmap_stage": roadmap[index].get('stage', ''),
+        "roadmap_step_id": f"step_{index}",
+        "is_completed": True
+    } for index in completed if index < len(roadmap)]
+
+def _roadmap_step_index(change: Dict) -> int:
+    """Step index of a progress change given as step_index or roadmap_step_id ("step_<index>")"""
+    if change.get('step_index') is not None:
+        return int(change['step_index'])
+    match = re.fullmatch(r'step_(\d+)', str(change.get('roadmap_step_id', '')))
+    if not match:
+        raise ValueError(f"Unrecognized roadmap step: {change.get('roadmap_step_id')!r}")
+    return int(match.group(1))
+
+def _apply_roadmap_changes(data: Dict, changes: List[Dict]):
+    """Validate and apply a batch of roadmap step changes; shared by the single-step and batch routes"""
+    firebase_uid = data.get('firebase_uid')
+    career_slug = data.get('career_slug') or get_career_slug_by_id(data.get('career_id', ''))
+    if not firebase_uid or not career_slug:
+        raise HTTPException(status_code=400, detail="firebase_uid and career_slug (or career_id) are required")
+    if not changes:
+        raise HTTPException(status_code=400, detail="No roadmap changes given")
+
+    cached = career_cache.get_or_load(career_slug, lambda: _load_career_details(career_slug))
+    if not cached:
+        raise HTTPException(status_code=404, detail="Career not found")
+    roadmap = cached['roadmap']
+
+    expected_version = data.get('expected_version')
+    try:
+        updates = {_roadmap_step_index(change): bool(change['is_completed']) for change in changes}
+        result = apply_roadmap_progress(firebase_uid, career_slug, updates, len(roadmap),
+                                        int(expected_version) if expected_version is not None else None)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid roadmap change: {e}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    body = {
+        "status": "success" if result['applied'] else "conflict",
+        "career_slug": career_slug,
+        "roadmap_version": result['version'],
+        "roadmap_progress": _roadmap_progress_items(roadmap, result['completed'])
+    }
+    if not result['applied']:
+        body["message"] = "Roadmap progress changed since it was loaded; reapply the changes on this state"
+    return FastJSONResponse(body, status_code=200 if result['applied'] else 409)
+
 @app.get("/api/career-journey/{firebase_uid}")
 async def get_career_journey(firebase_uid: str):
     """Get user's selected career journey"""
@@ -921,19 +1070,22 @@ async def get_career_journey(firebase_uid: str):
             return {"status": "not_selected", "career": None, "roadmap_progress": []}
         
         # Get career details
-        career = get_career_by_slug(selected_career['career_slug'])
+        career = get_career_by_slug(selected_career['slug'])
         
         # Get roadmap progress
         roadmap_progress = []
-        if career and career.get('id'):
-            roadmap_progress = get_roadmap_progress(firebase_uid, career['id'])
-            print(f"✅ Loaded roadmap progress for career_id {career['id']}: {len(roadmap_progress)} steps")  # Debug
+        roadmap_version = 0
+        if career:
+            progress = get_roadmap_progress(firebase_uid, career['slug'])
+            roadmap_progress = _roadmap_progress_items(career.get('roadmap') or [], progress['completed'])
+            roadmap_version = progress['version']
         
         return {
             "status": "success",
             "career": career,
             "selected_career": selected_career,
-            "roadmap_progress": roadmap_progress or []
+            "roadmap_progress": roadmap_progress,
+            "roadmap_version": roadmap_version
         }
     except Exception as e:
         import traceback
@@ -942,52 +1094,82 @@ async def get_career_journey(firebase_uid: str):
 
 @app.post("/api/career-journey/roadmap/progress")
 async def update_roadmap_step(data: Dict):
-    """Update roadmap step completion status"""
+    """Update one roadmap step's completion status (a batch of one)"""
     try:
-        firebase_uid = data['firebase_uid']
-        career_id = data['career_id']
-        roadmap_stage = data['roadmap_stage']
-        roadmap_step_id = data['roadmap_step_id']
-        step_title = data.get('step_title', '')
-        is_completed = bool(data['is_completed'])  # Ensure boolean
-        notes = data.get('notes')
-        
-        update_roadmap_progress(firebase_uid, career_id, roadmap_stage, 
-                               roadmap_step_id, step_title, is_completed, notes)
-        
-        print(f"✅ API: Roadmap progress updated for {firebase_uid}, career {career_id}, step {roadmap_step_id}: {is_completed}")
-        
-        return {"status": "success", "message": "Roadmap progress updated"}
+        return _apply_roadmap_changes(data, [data])
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error updating roadmap progress: {str(e)}")
+
+@app.post("/api/career-journey/roadmap/progress/batch")
+async def update_roadmap_steps(data: Dict):
+    """
+    Apply many roadmap step changes in one atomic update.
+
+    Body: {"firebase_uid", "career_slug" (or "career_id"), "expected_version" (optional),
+           "changes": [{"roadmap_step_id": "step_<i>" or "step_index": i, "is_completed": bool}]}
+
+    With expected_version, the batch is rejected with 409 and the current
+    progress if another write got there first; without it, likewise if
+    concurrent writes keep landing first.
+    """
+    try:
+        return _apply_roadmap_changes(data, data.get('changes') or [])
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error updating roadmap progress: {str(e)}")
 
 @app.get("/api/jobs")
-async def get_jobs(career_id: Optional[int] = None, limit: int = 50):
-    """Get job listings, optionally filtered by career"""
+async def get_jobs(career_slug: Optional[str] = None, career_id: Optional[str] = None,
+                   location: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None):
+    """Get job listings from the local job index, optionally filtered by career and location.
+    Results are newest first; pass next_cursor back as cursor for the next page.
+    """
     try:
-        jobs = get_job_listings(career_id=career_id, limit=limit)
-        return {"status": "success", "jobs": jobs, "count": len(jobs)}
+        limit = max(1, min(limit, 100))
+        if not career_slug and career_id:
+            career_slug = get_career_slug_by_id(career_id)
+            if not career_slug:
+                return {"status": "success", "jobs": [], "count": 0, "next_cursor": None}
+        try:
+            jobs, next_cursor = get_job_listings(career_slug=career_slug, location=location,
+                                                 limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FastJSONResponse({"status": "success", "jobs": jobs, "count": len(jobs), "next_cursor": next_cursor})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching jobs: {str(e)}")
 
 @app.post("/api/jobs/apply")
-async def apply_job(data: Dict):
-    """Apply to a job"""
+async def apply_job(data: Dict, idempotency_key: Optional[str] = Header(default=None)):
+    """Apply to a job.
+
+    Idempotent: retries with the same Idempotency-Key header (or body
+    idempotency_key; by default derived from user + job) record one application.
+    The write is queued and acknowledged immediately; `duplicate` is true when
+    the key was already stored or is still queued.
+    """
     try:
         firebase_uid = data['firebase_uid']
-        job_listing_id = data.get('job_listing_id')
-        job_title = data.get('job_title')
-        company_name = data.get('company_name')
-        job_location = data.get('job_location')
-        salary_range = data.get('salary_range')
-        job_url = data.get('job_url')
-        notes = data.get('notes')
-        
-        apply_to_job(firebase_uid, job_listing_id, job_title, company_name,
-                    job_location, salary_range, job_url, notes)
-        return {"status": "success", "message": "Job application recorded"}
+        application = apply_to_job(firebase_uid, data,
+                                   idempotency_key=idempotency_key or data.get('idempotency_key'))
+        key = application['idempotency_key']
+        queued = (not await asyncio.to_thread(job_application_exists, key)
+                  and write_behind.enqueue("job_applications", application, key=key))
+        return {
+            "status": "success",
+            "message": "Job application recorded",
+            "application_id": application['idempotency_key'],
+            "duplicate": not queued
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error applying to job: {str(e)}")
 
@@ -996,10 +1178,26 @@ async def get_my_applications(firebase_uid: str):
     """Get user's job applications"""
     try:
         applications = get_user_job_applications(firebase_uid)
-        return {"status": "success", "applications": applications}
+        # Include applications still waiting in the write-behind queue
+        stored = {application['id'] for application in applications}
+        pending = [
+            format_job_application(application)
+            for application in write_behind.pending("job_applications", lambda doc: doc['firebase_uid'] == firebase_uid)
+            if application['idempotency_key'] not in stored
+        ]
+        return {"status": "success", "applications": list(reversed(pending)) + applications}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching applications: {str(e)}")
 
+@app.get("/api/jobs/refresh-status")
+async def get_job_refresh_status():
+    """Background job-refresh scheduler metrics (lag, queue depth, failures)"""
+    return {
+        "enabled": job_refresh_enabled(),
+        "scheduler": get_job_refresh_scheduler().status(),
+        "cache": job_search_cache.stats
+    }
+
 @app.get("/api/jobs/indeed-search")
 async def search_indeed_jobs_api(job_title: str, location: str = "India", limit: int = 10):
     """
@@ -1019,17 +1217,26 @@ async def search_indeed_jobs_api(job_title: str, location: str = "India", limit:
             raise HTTPException(status_code=400, detail="job_title parameter is required")
         
         # Limit the maximum number of results
-        limit = min(limit, 25)
+        limit = min(limit, INDEED_MAX_RESULTS)
         
-        # Search Indeed
-        print(f"Searching Indeed for: '{job_title}' in '{location}'")
-        jobs = search_indeed_jobs(
-            job_title=job_title.strip(),
-            location=location.strip() if location else "India",
-            limit=limit
-        )
+        job_title = job_title.strip()
+        location = location.strip() if location else "India"
+        
+        # Search Indeed through the stale-while-revalidate cache. Always fetch the
+        # maximum page so one cache entry serves every limit.
+        async def fetch_jobs():
+            print(f"Searching Indeed for: '{job_title}' in '{location}'")
+            fetched = await search_indeed_jobs_async(job_title=job_title, location=location,
+                                                     limit=INDEED_MAX_RESULTS)
+            # Feed the local job index (stored and matched to careers behind the response)
+            if fetched:
+                write_behind.defer(ingest_search_results, fetched, job_title)
+            return fetched
+        
+        jobs, cache_info = await job_search_cache.get_or_fetch(job_title, location, fetch_jobs)
+        jobs = jobs[:limit]
         
-        print(f"Found {len(jobs)} jobs from Indeed")
+        print(f"Found {len(jobs)} jobs from Indeed (cache: {cache_info['status']})")
         
         # Format jobs for API response
         formatted_jobs = format_indeed_jobs_for_api(jobs, career_title=None)
@@ -1041,7 +1248,8 @@ async def search_indeed_jobs_api(job_title: str, location: str = "India", limit:
                 "source": "Indeed",
                 "jobs": [],
                 "count": 0,
-                "message": f"Indeed job search is currently not implemented. To enable this feature, implement the Indeed scraper or integrate with Indeed API.\n\nRequested search: '{job_title}' in '{location}'",
+                "cache": cache_info,
+                "message": f"No jobs found on Indeed for '{job_title}' in '{location}'. Try a broader title or location.",
                 "search_params": {
                     "job_title": job_title,
                     "location": location,
@@ -1054,6 +1262,7 @@ async def search_indeed_jobs_api(job_title: str, location: str = "India", limit:
             "source": "Indeed",
             "jobs": formatted_jobs,
             "count": len(formatted_jobs),
+            "cache": cache_info,
             "search_params": {
                 "job_title": job_title,
                 "location": location,
@@ -0,0 +1,105 @@
+"""
+Cold-start profiler for the API (what a fresh serverless instance pays).
+
+1. Import-time report: runs `python -X importtime -c "import app"` and lists the
+   modules with the highest cumulative import time.
+2. Time-to-first-response: for each route, a fresh interpreter imports the app
+   and serves one request (in-process, via TestClient), measuring import time
+   and first-response time separately.
+
+Usage:
+    python profile_cold_start.py                 # both reports
+    python profile_cold_start.py --top 40        # longer import report
+    python profile_cold_start.py --routes /api/careers/software-engineer /
+
+Requires the same .env as the API (routes that hit MongoDB need it reachable)
+and httpx for TestClient.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_ROUTES = [
+    "/",
+    "/api/assessment/questions",
+    "/api/careers/explore",
+    "/api/careers/software-engineer",
+    "/api/jobs?limit=10",
+]
+
+_FIRST_RESPONSE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.app)
+ready = time.perf_counter()
+response = client.get(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({
+    "status": response.status_code,
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (done - ready) * 1000,
+    "total_ms": (imported - started + done - ready) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def import_time_report(top: int = 25):
+    """Parse -X importtime output into (cumulative_us, self_us, module), slowest first"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def first_response(route: str):
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_RESPONSE_SCRIPT, route],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"error": (result.stderr.strip().splitlines() or ["unknown error"])[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="modules to list in the import report")
+    parser.add_argument("--routes", nargs="*", default=DEFAULT_ROUTES, help="routes to cold-start")
+    args = parser.parse_args()
+
+    print(f"📦 Import time of 'app' (top {args.top} by cumulative time)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in import_time_report(args.top):
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    print("\n🚀 Cold start: time to first response per route")
+    print(f"{'status':>6} {'import ms':>10} {'response ms':>12} {'total ms':>9}  route")
+    for route in args.routes:
+        stats = first_response(route)
+        if "error" in stats:
+            print(f"{'ERR':>6} {'':>10} {'':>12} {'':>9}  {route}  ({stats['error']})")
+            continue
+        print(f"{stats['status']:>6} {stats['import_ms']:>10.1f} {stats['first_response_ms']:>12.1f} "
+              f"{stats['total_ms']:>9.1f}  {route}")
+
+
+if __name__ == "__main__":
+    main()
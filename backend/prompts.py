@@ -0,0 +1,233 @@
+"""
+Prompt templates for the assessment analysis and the AI mentor.
+
+The instruction text of each prompt is a module-level constant and is always
+sent as the first (system) message, byte for byte the same on every request,
+so the provider's prompt-prefix caching can reuse it. Everything that varies
+per request (answers, the career being viewed, assessment results, recent
+conversation) goes into the final human message.
+
+Variable context is assembled from PromptSections under an explicit token
+budget. Sections are filled in priority order and items within a section in
+the order given (most important first); the item that crosses the budget is
+trimmed at a word boundary, and anything after it is dropped. Token counts
+are estimated at four characters per token, which is close enough for
+budgeting and costs nothing to compute.
+
+Configuration (environment):
+    PROMPT_CHAT_CONTEXT_TOKENS         budget for the mentor's context block (default 1200)
+    PROMPT_ASSESSMENT_ANSWERS_TOKENS   budget for assessment answers (default 6000)
+"""
+
+import os
+from typing import Dict, List, Optional
+
+PROMPT_CHAT_CONTEXT_TOKENS = int(os.getenv('PROMPT_CHAT_CONTEXT_TOKENS', '1200'))
+PROMPT_ASSESSMENT_ANSWERS_TOKENS = int(os.getenv('PROMPT_ASSESSMENT_ANSWERS_TOKENS', '6000'))
+
+CHARS_PER_TOKEN = 4
+
+# Trimmed items shorter than this are dropped instead
+MIN_TRIMMED_TOKENS = 16
+
+ASSESSMENT_SYSTEM_PROMPT = """You are an expert career counselor specializing in guiding Indian students.
+Analyze the student's assessment responses and provide comprehensive career guidance.
+
+Your response must be in valid JSON format with the following structure:
+{
+    "career_paths": [
+        {
+            "title": "Career Title",
+            "description": "Detailed description",
+            "match_percentage": 85,
+            "required_education": "Educational requirements",
+            "salary_range": "Expected salary in INR",
+            "growth_prospects": "Career growth outlook"
+        }
+    ],
+    "skills_gap": [
+        {
+            "skill": "Skill name",
+            "current_level": "Beginner/Intermediate/Advanced",
+            "required_level": "Required proficiency",
+            "priority": "High/Medium/Low",
+            "learning_path": "How to acquire this skill"
+        }
+    ],
+    "learning_resources": [
+        {
+            "resource_name": "Course/Resource name",
+            "type": "Course/Book/Certification",
+            "provider": "Platform or institution",
+            "relevance": "Why this is recommended"
+        }
+    ],
+    "personalized_advice": "Detailed personalized career advice including next steps, entrance exams to consider, and strategic guidance for Indian students"
+}
+
+Provide at least 3-5 career paths, identify 5-7 key skills gaps, recommend 5-8 learning resources,
+and give comprehensive personalized advice tailored to the Indian education and job market."""
+
+ASSESSMENT_HUMAN_TEMPLATE = "Student Assessment Responses:\n\n{answers}\n\nProvide comprehensive career guidance in JSON format."
+
+MENTOR_SYSTEM_PROMPT = """You are Prism AI Mentor, a friendly and knowledgeable career guidance counselor
+specializing in helping Indian students make informed career decisions.
+
+The student's message may come with a CONTEXT block holding what we know about them: the career
+they are currently viewing, their career assessment results and recent conversation with you.
+Use it to personalize your advice. Reference their career matches, skills and previous
+conversations naturally, and when a current career of interest is given, the student is asking
+about THIS career, so address it directly.
+
+Provide conversational, empathetic, and practical career advice. Consider:
+- Indian education system (10th, 12th, graduation paths)
+- Entrance exams (JEE, NEET, CAT, UPSC, etc.)
+- Career opportunities in India and abroad
+- Current job market trends
+- Skill development and certifications
+
+Keep responses concise (2-4 paragraphs), friendly, and actionable. Reference their specific career matches
+and skills when relevant."""
+
+MENTOR_HUMAN_TEMPLATE = "CONTEXT:\n{context}\n\nSTUDENT'S MESSAGE:\n{message}"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to about `tokens` tokens at a word boundary, marking the cut"""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit - 1)]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "…"
+
+
+class PromptSection:
+    """A titled block of prompt items; lower priority numbers are filled first"""
+
+    def __init__(self, title: str, priority: int, items: List[str]):
+        self.title = title
+        self.priority = priority
+        self.items = [item for item in items if item]
+
+
+def fit_sections(sections: List[PromptSection], budget_tokens: int) -> Dict:
+    """
+    Render sections within budget_tokens.
+
+    Returns:
+        {"text": rendered block (sections in the order given), "tokens": estimated
+         size, "trimmed": number of items cut short or dropped}
+    """
+    remaining = budget_tokens
+    kept = {}
+    trimmed = 0
+    for section in sorted(sections, key=lambda s: s.priority):
+        items = []
+        title_cost = estimate_tokens(section.title) + 1
+        for index, item in enumerate(section.items):
+            cost = estimate_tokens(item) + 1 + (title_cost if not items else 0)
+            if cost <= remaining:
+                items.append(item)
+                remaining -= cost
+                continue
+            room = remaining - 1 - (title_cost if not items else 0)
+            if room >= MIN_TRIMMED_TOKENS:
+                items.append(trim_to_tokens(item, room))
+                remaining = 0
+            trimmed += len(section.items) - index
+            break
+        kept[id(section)] = items
+
+    blocks = []
+    for section in sections:
+        items = kept[id(section)]
+        if items:
+            blocks.append(section.title + "\n" + "\n".join(items))
+    text = "\n\n".join(blocks)
+    return {"text": text, "tokens": estimate_tokens(text), "trimmed": trimmed}
+
+
+def fit_items_evenly(items: List[str], budget_tokens: int) -> List[str]:
+    """Trim items so together they fit the budget, shortening the longest ones first"""
+    costs = [estimate_tokens(item) for item in items]
+    if sum(costs) <= budget_tokens:
+        return items
+    # Water-filling: every item gets up to an equal share; what short items
+    # don't use is redistributed to the longer ones
+    share_left, pending = budget_tokens, sorted(range(len(items)), key=lambda i: costs[i])
+    allowance = {}
+    while pending:
+        share = share_left // len(pending)
+        index = pending[0]
+        if costs[index] <= share:
+            allowance[index] = costs[index]
+            share_left -= costs[index]
+            pending.pop(0)
+        else:
+            for index in pending:
+                allowance[index] = share
+            break
+    return [item if allowance[i] >= costs[i] else trim_to_tokens(item, allowance[i]) for i, item in enumerate(items)]
+
+
+def build_assessment_messages(answers: List[Dict], budget_tokens: int = PROMPT_ASSESSMENT_ANSWERS_TOKENS):
+    """Messages for the assessment analysis; `answers` are {"question", "answer"} dicts"""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    items = fit_items_evenly([f"Q: {a['question']}\nA: {a['answer']}" for a in answers], budget_tokens)
+    return [
+        SystemMessage(content=ASSESSMENT_SYSTEM_PROMPT),
+        HumanMessage(content=ASSESSMENT_HUMAN_TEMPLATE.format(answers="\n".join(items))),
+    ]
+
+
+def _join(values, limit: int) -> str:
+    return ", ".join(str(value) for value in (values or [])[:limit] if value)
+
+
+def mentor_context_sections(career_context: Optional[Dict], user_context: Dict, history: List[Dict]):
+    """Context sections for a mentor chat turn, in the order they appear in the prompt"""
+    sections = []
+    if career_context and career_context.get('career_title'):
+        career_items = [f"- Career: {career_context['career_title']}"]
+        for label, key, limit in (("Description", "career_description", None), ("Average Salary", "avg_salary", None),
+                                  ("Entrance Exams", "popular_exams", 5), ("Required Skills", "skills_required", 5),
+                                  ("Job Roles", "job_roles", 3)):
+            value = career_context.get(key)
+            if value:
+                career_items.append(f"- {label}: {_join(value, limit) if limit else value}")
+        sections.append(PromptSection("CURRENT CAREER OF INTEREST (from the Explore/Detail page):", 1, career_items))
+
+    if user_context.get('assessment_completed'):
+        matches = _join([f"{c.get('title', 'Career')} ({c.get('match_percentage', 0)}% match)"
+                         for c in user_context.get('career_matches', [])], 3)
+        skills = _join([s.get('skill', 'Skill') for s in user_context.get('skills_to_develop', [])], 5)
+        selected = _join(user_context.get('selected_careers'), 5)
+        sections.append(PromptSection("ASSESSMENT RESULTS:", 2, [
+            f"- Career Matches: {matches}" if matches else "",
+            f"- Skills to Develop: {skills}" if skills else "",
+            f"- Selected Career Interests: {selected}" if selected else "",
+        ]))
+
+    if history:
+        # Newest exchange first, so the oldest is what gets trimmed
+        exchanges = [f"Student: {h['message']}\nMentor: {h['response']}" for h in reversed(history)]
+        sections.append(PromptSection("RECENT CONVERSATION (newest first):", 3, exchanges))
+    return sections
+
+
+def build_mentor_messages(message: str, career_context: Optional[Dict], user_context: Dict,
+                          history: List[Dict], budget_tokens: int = PROMPT_CHAT_CONTEXT_TOKENS):
+    """Messages for a mentor chat turn: the static system prompt, then context and message"""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    context = fit_sections(mentor_context_sections(career_context, user_context, history), budget_tokens)
+    content = MENTOR_HUMAN_TEMPLATE.format(context=context["text"] or "(none yet)", message=message)
+    return [SystemMessage(content=MENTOR_SYSTEM_PROMPT), HumanMessage(content=content)]
@@ -0,0 +1,205 @@
+"""
+On-demand profiling of individual requests.
+
+ProfilingMiddleware profiles a request when it carries
+`X-Profile: <PROFILE_TOKEN>` or is picked by PROFILE_SAMPLE_RATE, and writes
+one file per profiled request to PROFILE_DIR:
+
+- "sample" mode (default): a background thread samples the event loop
+  thread's stack every PROFILE_INTERVAL_MS and writes collapsed stacks
+  (`.folded`, one "frame;frame;frame count" line per stack), which
+  flamegraph.pl, inferno and speedscope load directly. The handlers here run
+  their MongoDB calls on the loop thread, so those show up too; idle time
+  shows up as the selector wait. Other requests served concurrently share
+  the loop and can appear in the same profile. Requests shorter than a few
+  intervals may get no samples; use cprofile mode for those.
+- "cprofile" mode: deterministic cProfile of the loop thread, saved as a
+  pstats `.prof` file (snakeviz, flameprof, `python -m pstats`).
+
+Only one request is profiled at a time. Profiles are written from a worker
+thread, not the event loop. After every write the oldest files are deleted until the directory is within PROFILE_MAX_FILES and
+PROFILE_MAX_BYTES. The middleware is only installed when a token or sample
+rate is configured (see `profiling_enabled`); installed but not triggered, it
+costs one header lookup per request.
+
+Configuration (environment):
+    PROFILE_TOKEN          value of X-Profile that triggers profiling (unset: header disabled)
+    PROFILE_SAMPLE_RATE    fraction of requests profiled at random (default 0)
+    PROFILE_PATHS          comma-separated path prefixes eligible for sampling (default: all)
+    PROFILE_MODE           "sample" (default) or "cprofile"
+    PROFILE_INTERVAL_MS    sampling interval (default 1)
+    PROFILE_DIR            output directory (default ./profiles)
+    PROFILE_MAX_FILES      profiles kept on disk (default 100)
+    PROFILE_MAX_BYTES      total size kept on disk (default 50 MB)
+"""
+
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_PATHS = tuple(p.strip() for p in os.getenv('PROFILE_PATHS', '').split(',') if p.strip())
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample').lower()
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '1'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(Path(__file__).parent / 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '100'))
+PROFILE_MAX_BYTES = int(os.getenv('PROFILE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})".replace(";", ",")
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        # The loop thread only yields the GIL every switch interval (5 ms by
+        # default); shorten it while sampling so samples land on time
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+
+
+class CProfileRecorder:
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path: Path):
+        self.profile.dump_stats(str(path))
+
+
+def _prune(directory: Path, max_files: int, max_bytes: int):
+    """Delete the oldest profiles until the directory is within its limits"""
+    files = sorted((p for p in directory.iterdir() if p.suffix in (".folded", ".prof")),
+                   key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    while files and (len(files) > max_files or total > max_bytes):
+        oldest = files.pop(0)
+        total -= oldest.stat().st_size
+        oldest.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests selected by token header or sample rate"""
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 paths=PROFILE_PATHS, mode: str = PROFILE_MODE, interval_ms: float = PROFILE_INTERVAL_MS,
+                 directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES,
+                 max_bytes: int = PROFILE_MAX_BYTES):
+        self.app = app
+        self.token = token.encode() if token else b""
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+        self.mode = mode
+        self.interval = interval_ms / 1000
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._busy = threading.Lock()
+        self.stats = {"profiled": 0, "skipped_busy": 0, "write_errors": 0}
+
+    def _selected(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, self.token)
+        if self.sample_rate and random.random() < self.sample_rate:
+            return not self.paths or scope["path"].startswith(self.paths)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            self.stats["skipped_busy"] += 1
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send):
+        if self.mode == "cprofile":
+            recorder, suffix = CProfileRecorder(), ".prof"
+        else:
+            recorder, suffix = StackSampler(threading.get_ident(), self.interval), ".folded"
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', scope["path"]).strip('-')[:80] or "root"
+        filename = f"{datetime.now().strftime('%Y%m%dT%H%M%S.%f')}_{scope['method']}_{slug}_{os.getpid()}"
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-File"] = filename + suffix
+            await send(message)
+
+        started = time.perf_counter()
+        recorder.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            recorder.stop()
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            # Writing and pruning touch the disk: keep them off the loop thread
+            await asyncio.to_thread(self._save, recorder, f"{filename}{suffix}", elapsed_ms)
+
+    def _save(self, recorder, name: str, elapsed_ms: int):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            recorder.write(self.directory / name)
+            _prune(self.directory, self.max_files, self.max_bytes)
+            self.stats["profiled"] += 1
+            print(f"✅ Profiled request in {elapsed_ms} ms -> {self.directory / name}")
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"⚠️ Could not write request profile {name}: {e}")
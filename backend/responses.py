@@ -0,0 +1,148 @@
+"""
+Fast JSON responses.
+
+FastJSONResponse renders with orjson when it's installed (falling back to the
+stdlib json module) and is the app's default response class. Handlers on hot
+paths return it directly, which also skips FastAPI's jsonable_encoder pass.
+
+PrecomputedJSON holds a static payload encoded once at startup, along with its
+gzip/brotli variants, and serves the stored bytes on every request with
+long-lived cache headers. Cached payloads use the same pair of helpers:
+encode_variants() serializes and compresses a body once when the cache is
+filled, and variant_response() serves the stored variant the client accepts
+(CompressionMiddleware passes responses that already carry a Content-Encoding
+through untouched).
+
+Conditional GET: routes derive a weak ETag from whatever versions their body
+(make_etag), check If-None-Match / If-Modified-Since with is_not_modified()
+before doing the expensive read, and answer 304 when the client is current.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+from compression import COMPRESSION_MIN_SIZE, choose_encoding, compress, supported_encodings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STATIC_MAX_AGE_SECONDS = 86400
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON (datetimes/ObjectIds become strings)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from version parts (weak because compression re-encodes the body)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """HTTP-date for a (naive local or aware) datetime"""
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None,
+                      cache_control: str = "no-cache") -> Dict[str, str]:
+    """ETag/Last-Modified headers; no-cache makes clients revalidate before reuse"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request_headers, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Whether the client's cached copy is current.
+
+    If-None-Match (weak comparison) takes precedence; If-Modified-Since is
+    only consulted when the client sent no ETag.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def encode_variants(content: Any, static: bool = False) -> Dict[str, bytes]:
+    """
+    JSON-encode content once, plus its compressed variants.
+
+    Returns:
+        {"identity": body, "br"/"gzip": compressed body} (only the plain body
+        below COMPRESSION_MIN_SIZE); plain bytes, so it can be stored in a cache
+    """
+    body = dumps(content)
+    variants = {"identity": body}
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        for encoding in supported_encodings():
+            variants[encoding] = compress(body, encoding, static=static)
+    return variants
+
+
+def variant_response(variants: Dict[str, bytes], accept_encoding: Optional[str] = None,
+                     headers: Optional[Dict[str, str]] = None, status_code: int = 200) -> Response:
+    """Serve the stored variant matching the client's Accept-Encoding"""
+    headers = dict(headers or {})
+    encoding = None
+    if len(variants) > 1:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = choose_encoding(accept_encoding)
+    if encoding not in variants:
+        return Response(content=variants["identity"], status_code=status_code,
+                        media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding], status_code=status_code,
+                    media_type="application/json", headers=headers)
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class PrecomputedJSON:
+    """A static JSON payload serialized (and compressed) once and served as bytes"""
+
+    def __init__(self, content: Any, max_age: int = STATIC_MAX_AGE_SECONDS):
+        self.variants = encode_variants(content, static=True)
+        self.body = self.variants["identity"]
+        self.etag = make_etag(hashlib.sha1(self.body).hexdigest())
+        self.headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": self.etag}
+
+    def response(self, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+        """Serve the stored variant matching the client's Accept-Encoding (304 if unchanged)"""
+        if if_none_match is not None and is_not_modified({"if-none-match": if_none_match}, self.etag):
+            return not_modified(dict(self.headers, Vary="Accept-Encoding"))
+        return variant_response(self.variants, accept_encoding, self.headers)
@@ -359,5 +359,19 @@ def seed_data():
             
     print(f"\nSummary: {success_count}/{len(careers)} careers inserted.")
 
+    # Precompute catalog facets and indexes used by /api/careers/explore
+    from database import ensure_career_indexes, rebuild_career_facets
+    ensure_career_indexes()
+    facets = rebuild_career_facets()
+    print(f"✅ Catalog facets rebuilt: {facets['total_careers']} careers, {len(facets['categories'])} categories")
+
+    # Drop cached copies (including cached 404s) held by running API workers
+    from shared_cache import career_cache
+    career_cache.invalidate(*[career['slug'] for career in careers])
+
+    from career_similarity import rebuild_related_careers
+    indexed = rebuild_related_careers()
+    print(f"✅ Related-careers index built for {indexed} careers")
+
 if __name__ == "__main__":
     seed_data()
@@ -0,0 +1,368 @@
+"""
+Two-tier cache shared between API workers.
+
+Each SharedCache keeps hot entries in an in-process LRU (L1) in front of a
+shared tier (L2) that every uvicorn/gunicorn worker reads, so a value loaded
+by one worker is warm in all of them. Writes and invalidations are fanned out
+over pub/sub: every worker drops the affected keys from its L1 and reloads
+them from L2 (or the database) on next use.
+
+The shared tier is chosen with SHARED_CACHE_URL:
+    (unset) / "local"   L1 only, no cross-worker sharing (single-process deployments)
+    redis://host:port   any Redis-protocol server (Redis, Valkey, a local stand-in);
+                        GET/SET EX for L2, PUBLISH/SUBSCRIBE for invalidations.
+                        Needs the optional `redis` package.
+    mongo               the app's MongoDB: `shared_cache` collection (TTL index)
+                        for L2, a capped `cache_invalidations` collection read
+                        with a tailable cursor for invalidations
+
+L1 entries live at most SHARED_CACHE_L1_TTL seconds, which bounds staleness if
+an invalidation message is ever missed.
+
+Configuration (environment):
+    SHARED_CACHE_URL       see above
+    SHARED_CACHE_L1_SIZE   entries per cache kept in each worker (default 1024)
+    SHARED_CACHE_L1_TTL    max age of an L1 entry in seconds (default 60)
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import bson
+from bson.codec_options import CodecOptions
+
+SHARED_CACHE_L1_SIZE = int(os.getenv('SHARED_CACHE_L1_SIZE', '1024'))
+SHARED_CACHE_L1_TTL = float(os.getenv('SHARED_CACHE_L1_TTL', '60'))
+
+INVALIDATION_CHANNEL = "prism:cache:invalidate"
+
+_INSTANCE_ID = uuid.uuid4().hex
+
+
+def process_id() -> str:
+    """Identifies this worker so it can ignore its own invalidation messages; the pid keeps
+    workers forked from one preloaded app apart"""
+    return f"{_INSTANCE_ID}:{os.getpid()}"
+
+# Stored for loaders that returned None, so "not found" is cached too
+_NONE = {"__none__": True}
+
+_MISSING = object()
+
+
+def _encode(value: Any) -> bytes:
+    return bson.encode({"v": value})
+
+
+# BSON keeps datetimes as UTC instants without a zone: decode them as aware UTC
+# (cache aware values, so L1 and L2 hand out the same thing)
+_CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+
+def _decode(data: bytes) -> Any:
+    return bson.decode(data, codec_options=_CODEC_OPTIONS)["v"]
+
+
+class CacheBackend:
+    """Shared tier: key/value storage plus invalidation fan-out"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def publish(self, namespace: str, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[str, list], None]):
+        """Call callback(namespace, keys) for invalidations published by other processes"""
+        raise NotImplementedError
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._subscriber = None
+
+    def get(self, key):
+        data = self.client.get(key)
+        return _decode(data) if data is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, _encode(value), ex=max(1, int(ttl)))
+
+    def delete(self, keys):
+        keys = list(keys)
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, namespace, keys):
+        self.client.publish(INVALIDATION_CHANNEL, json.dumps({"origin": process_id(), "ns": namespace, "keys": list(keys)}))
+
+    def subscribe(self, callback):
+        def handle(message):
+            payload = json.loads(message["data"])
+            if payload.get("origin") != process_id():
+                callback(payload["ns"], payload["keys"])
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: handle})
+        self._subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+
+class MongoCacheBackend(CacheBackend):
+    """Shared tier in the app's MongoDB; invalidations via a tailable cursor on a capped collection"""
+
+    INVALIDATION_COLLECTION_BYTES = 1 << 20
+
+    def __init__(self):
+        from database import get_db_connection
+
+        self.db = get_db_connection()
+        self.entries = self.db['shared_cache'].with_options(codec_options=_CODEC_OPTIONS)
+        self.entries.create_index("expires_at", expireAfterSeconds=0)
+        if 'cache_invalidations' not in self.db.list_collection_names():
+            try:
+                self.db.create_collection('cache_invalidations', capped=True,
+                                          size=self.INVALIDATION_COLLECTION_BYTES)
+            except Exception:
+                pass  # created concurrently by another worker
+        self.invalidations = self.db['cache_invalidations']
+
+    def get(self, key):
+        entry = self.entries.find_one({"_id": key})
+        # The TTL monitor only runs once a minute, so check expiry here too
+        if not entry or entry['expires_at'] <= datetime.now(timezone.utc):
+            return None
+        return entry['v']
+
+    def set(self, key, value, ttl):
+        self.entries.replace_one(
+            {"_id": key},
+            {"v": value, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+            upsert=True
+        )
+
+    def delete(self, keys):
+        keys = list(keys)
+        if keys:
+            self.entries.delete_many({"_id": {"$in": keys}})
+
+    def publish(self, namespace, keys):
+        self.invalidations.insert_one({"origin": process_id(), "ns": namespace, "keys": list(keys)})
+
+    def subscribe(self, callback):
+        from pymongo import CursorType
+
+        def tail():
+            # Start after the newest message; older ones predate this process
+            last = self.invalidations.find_one(sort=[("$natural", -1)])
+            if last is None:
+                self.invalidations.insert_one({"origin": process_id(), "ns": "", "keys": []})
+                last = self.invalidations.find_one(sort=[("$natural", -1)])
+            last_id = last['_id']
+            while True:
+                try:
+                    cursor = self.invalidations.find({"_id": {"$gt": last_id}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                    for message in cursor:
+                        last_id = message['_id']
+                        if message.get('origin') != process_id() and message.get('ns'):
+                            callback(message['ns'], message['keys'])
+                except Exception as e:
+                    print(f"⚠️ Cache invalidation listener error: {e}")
+                time.sleep(0.5)
+
+        threading.Thread(target=tail, name="cache-invalidations", daemon=True).start()
+
+
+_backend = _MISSING
+_backend_pid = None
+_backend_lock = threading.Lock()
+_caches: Dict[str, "SharedCache"] = {}
+
+
+def _dispatch_invalidation(namespace: str, keys: list):
+    cache = _caches.get(namespace)
+    if cache is not None:
+        cache._drop_local(keys)
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Process-wide shared tier from SHARED_CACHE_URL (None for L1-only caching)"""
+    global _backend, _backend_pid
+    # A backend created before a fork has no subscriber thread in the child: build a new one
+    if _backend is _MISSING or _backend_pid != os.getpid():
+        with _backend_lock:
+            if _backend is _MISSING or _backend_pid != os.getpid():
+                url = os.getenv('SHARED_CACHE_URL', 'local').strip()
+                backend = None
+                try:
+                    if url.startswith(('redis://', 'rediss://', 'unix://')):
+                        backend = RedisCacheBackend(url)
+                    elif url == 'mongo':
+                        backend = MongoCacheBackend()
+                    if backend is not None:
+                        backend.subscribe(_dispatch_invalidation)
+                except Exception as e:
+                    print(f"⚠️ Shared cache backend '{url}' unavailable, using in-process cache only: {e}")
+                    backend = None
+                _backend = backend
+                _backend_pid = os.getpid()
+    return _backend
+
+
+class SharedCache:
+    """A namespaced cache: in-process LRU (L1) in front of the shared tier (L2)"""
+
+    def __init__(self, namespace: str, ttl: float = 300, l1_size: int = SHARED_CACHE_L1_SIZE,
+                 l1_ttl: float = SHARED_CACHE_L1_TTL, backend: Any = _MISSING):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.l1_size = l1_size
+        self.l1_ttl = min(ttl, l1_ttl)
+        self._backend = backend
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations_received": 0, "l2_errors": 0}
+        _caches[namespace] = self
+
+    @property
+    def backend(self) -> Optional[CacheBackend]:
+        if self._backend is _MISSING:
+            return get_cache_backend()
+        return self._backend
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    # ----- L1 -----
+
+    def _l1_get(self, key: str):
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._l1[key]
+                return _MISSING
+            self._l1.move_to_end(key)
+            return value
+
+    def _l1_put(self, key: str, value: Any):
+        with self._lock:
+            self._l1[key] = (value, time.monotonic() + self.l1_ttl)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def _drop_local(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+            self.stats["invalidations_received"] += 1
+
+    # ----- public API -----
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cached value for key, calling loader() (and filling both tiers) on a miss"""
+        value = self._l1_get(key)
+        if value is not _MISSING:
+            self.stats["l1_hits"] += 1
+            return None if value is _NONE else value
+
+        backend = self.backend
+        if backend is not None:
+            try:
+                stored = backend.get(self._key(key))
+            except Exception as e:
+                self.stats["l2_errors"] += 1
+                print(f"⚠️ Shared cache read failed for '{self._key(key)}': {e}")
+                stored = None
+            if stored is not None:
+                self.stats["l2_hits"] += 1
+                value = None if stored == _NONE else stored
+                self._l1_put(key, _NONE if value is None else value)
+                return value
+
+        self.stats["misses"] += 1
+        value = loader()
+        self._store(key, value, publish=False)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Write a fresh value (e.g. right after persisting it); other workers drop their copy"""
+        self._store(key, value, publish=True)
+
+    def _store(self, key: str, value: Any, publish: bool):
+        stored = _NONE if value is None else value
+        self._l1_put(key, stored)
+        backend = self.backend
+        if backend is None:
+            return
+        try:
+            backend.set(self._key(key), stored, self.ttl)
+            if publish:
+                backend.publish(self.namespace, [key])
+        except Exception as e:
+            self.stats["l2_errors"] += 1
+            print(f"⚠️ Shared cache write failed for '{self._key(key)}': {e}")
+
+    def invalidate(self, *keys: str):
+        """Drop keys here, in the shared tier and (via pub/sub) in every other worker"""
+        if not keys:
+            return
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+        backend = self.backend
+        if backend is None:
+            return
+        try:
+            backend.delete(self._key(key) for key in keys)
+            backend.publish(self.namespace, keys)
+        except Exception as e:
+            self.stats["l2_errors"] += 1
+            print(f"⚠️ Shared cache invalidation failed for {self.namespace}: {e}")
+
+    def clear_local(self):
+        with self._lock:
+            self._l1.clear()
+
+    def l1_bytes(self) -> int:
+        """Approximate encoded size of the L1 entries"""
+        with self._lock:
+            values = [value for value, _ in self._l1.values()]
+        return sum(len(_encode(value)) for value in values)
+
+    def status(self) -> Dict:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return dict(self.stats, l1_entries=len(self._l1),
+                    hit_rate=round(hits / lookups, 4) if lookups else None)
+
+
+# Caches used by the API
+career_cache = SharedCache("career", ttl=3600)
+catalog_cache = SharedCache("catalog", ttl=3600)
+assessment_cache = SharedCache("assessment", ttl=1800)
+
+
+def get_cache_status() -> Dict:
+    backend = get_cache_backend()
+    return {
+        "backend": type(backend).__name__ if backend is not None else "local",
+        "caches": {name: cache.status() for name, cache in _caches.items()}
+    }
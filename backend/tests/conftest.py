@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INDEED_FIXTURES = Path(__file__).parent / "fixtures" / "indeed"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database behind database.get_db_connection() (needs mongomock)"""
+    mongomock = pytest.importorskip("mongomock")
+    import database
+    monkeypatch.setattr(database, "client", mongomock.MongoClient())
+    return database.get_db_connection()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Indeed search stand-in (GET /jobs?q=...&start=...) answering from the test
+    module's ROUTES: {(q, start): response}, with start None matching any page.
+    A response is (fixture file, content type) or an HTTP status code; a list of
+    responses is served in order, the last one repeating.
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        q, start = query.get("q", [""])[0], int(query.get("start", ["0"])[0])
+        self.server.requests.append((q, start))
+        routes = self.server.routes
+        response = routes.get((q, start), routes.get((q, None), 404)) if url.path == "/jobs" else 404
+        if isinstance(response, list):
+            response = response.pop(0) if len(response) > 1 else response[0]
+        if isinstance(response, int):
+            return self._reply(response, self.responses.get(response, ("Error",))[0].encode(), "text/plain")
+        name, content_type = response
+        self._reply(200, (INDEED_FIXTURES / name).read_bytes(), content_type)
+
+    def _reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stand_in(request):
+    """A local Indeed stand-in serving the requesting module's ROUTES"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.routes = request.module.ROUTES
+    server.requests = []
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,132 @@
+"""
+LLM admission control against a stand-in bucket backend: 429 + Retry-After for
+per-client and global rejections, queueing, refunds and failing open.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from admission import GLOBAL_KEY, AdmissionController, BucketBackend, MemoryBucketBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StandInBackend(BucketBackend):
+    """In-memory buckets on a manual clock that record which thread called them"""
+
+    def __init__(self):
+        self.clock = Clock()
+        self.buckets = MemoryBucketBackend(clock=self.clock)
+        self.calls = []
+        self.fail = False
+
+    def take(self, key, rate, capacity):
+        self.calls.append(("take", key, threading.current_thread()))
+        if self.fail:
+            raise ConnectionError("rate limit store unreachable")
+        return self.buckets.take(key, rate, capacity)
+
+    def refund(self, key, capacity):
+        self.calls.append(("refund", key, threading.current_thread()))
+        self.buckets.refund(key, capacity)
+
+
+def controller(backend, **kwargs):
+    # Per client: one call every 10s, burst 2. Global: one call every second, burst 3
+    settings = dict(user_rate_per_minute=6, user_burst=2, global_rate_per_minute=60, global_burst=3,
+                    max_queue=1, max_wait=0.5)
+    settings.update(kwargs)
+    return AdmissionController(backend=backend, **settings)
+
+
+def admit(admission, client_key):
+    asyncio.run(admission.admit(client_key))
+
+
+def test_client_over_its_burst_gets_429_with_retry_after():
+    backend = StandInBackend()
+    admission = controller(backend)
+    admit(admission, "ip:10.0.0.1")
+    admit(admission, "ip:10.0.0.1")
+
+    with pytest.raises(HTTPException) as rejected:
+        admit(admission, "ip:10.0.0.1")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "10"}
+    # Rejected before the global bucket is touched
+    assert [key for _, key, _ in backend.calls].count(GLOBAL_KEY) == 2
+
+    # Other clients are unaffected, and the client is let back in once its bucket refills
+    admit(admission, "ip:10.0.0.2")
+    backend.clock.now += 10
+    admit(admission, "ip:10.0.0.1")
+    assert admission.status()["rejected_user"] == 1 and admission.status()["admitted"] == 4
+
+
+def test_backend_runs_off_the_event_loop():
+    backend = StandInBackend()
+    admit(controller(backend), "ip:10.0.0.1")
+    assert backend.calls and all(thread is not threading.main_thread() for _, _, thread in backend.calls)
+
+
+def test_global_rejection_refunds_the_client_token():
+    backend = StandInBackend()
+    admission = controller(backend, global_burst=1, global_rate_per_minute=6)
+    admit(admission, "ip:10.0.0.1")
+
+    with pytest.raises(HTTPException) as rejected:
+        admit(admission, "ip:10.0.0.2")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {"Retry-After": "10"}
+    assert ("refund", "llm:user:ip:10.0.0.2") in [(kind, key) for kind, key, _ in backend.calls]
+
+    # The rejected call didn't cost the client anything
+    tokens, _ = backend.buckets._buckets["llm:user:ip:10.0.0.2"]
+    assert tokens == 2
+    status = admission.status()
+    assert (status["rejected_global"], status["rejected_user"], status["admitted"]) == (1, 0, 1)
+
+
+def test_short_global_wait_is_queued():
+    admission = controller(MemoryBucketBackend(), global_burst=1, global_rate_per_minute=600, max_wait=1)
+
+    async def burst():
+        await asyncio.gather(admission.admit("ip:10.0.0.1"), admission.admit("ip:10.0.0.2"))
+
+    asyncio.run(burst())
+    status = admission.status()
+    assert (status["admitted"], status["queued"], status["queue_depth"]) == (2, 1, 0)
+
+
+def test_backend_errors_fail_open():
+    backend = StandInBackend()
+    backend.fail = True
+    admission = controller(backend)
+    for _ in range(5):
+        admit(admission, "ip:10.0.0.1")
+    assert admission.status()["admitted"] == 5 and admission.status()["backend_errors"] == 10
+
+
+def test_chat_route_answers_429_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    backend = StandInBackend()
+    monkeypatch.setattr(main, "llm_admission", controller(backend, user_burst=0))
+
+    response = TestClient(main.app).post("/api/mentor/chat", json={"user_id": "u1", "message": "Hello"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert response.json()["detail"] == "Too many AI requests; please slow down"
+    assert backend.calls[0][1] == "llm:user:ip:testclient"
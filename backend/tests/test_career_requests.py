@@ -0,0 +1,238 @@
+"""
+Career request digests sent to a local SMTP stand-in (aiosmtpd on a thread),
+with the aggregate documents in an in-memory database (mongomock).
+"""
+
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email import message_from_bytes, policy
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+import career_requests  # noqa: E402
+from career_requests import (CareerRequestDigestSender, SMTPConnection, build_digest_email,  # noqa: E402
+                             record_career_request)
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content, policy=policy.default))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StandIn:
+    """An SMTP server that can be stopped and restarted on the same port"""
+
+    def __init__(self):
+        self.handler = RecordingHandler()
+        self.port = free_port()
+        self.controller = None
+
+    def start(self):
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=self.port)
+        self.controller.start()
+
+    def stop(self):
+        if self.controller is not None:
+            self.controller.stop()
+            self.controller = None
+
+    @property
+    def settings(self):
+        return {"host": "127.0.0.1", "port": self.port, "user": "", "password": "", "starttls": False}
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandIn()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def requests_db(db, monkeypatch):
+    monkeypatch.setattr(career_requests, "_indexes_ready", False)
+    monkeypatch.setenv("CAREER_REQUEST_ADMIN_EMAIL", "admin@prism.test")
+    return db
+
+
+def test_connection_is_reused(smtp_server):
+    connection = SMTPConnection(smtp_server.settings, idle_seconds=60)
+    for index in range(3):
+        connection.send(build_digest_email([], "prism@test", f"admin{index}@prism.test"))
+    connection.close()
+
+    assert connection.connects == 1
+    assert [message["To"] for message in smtp_server.handler.messages] == [
+        "admin0@prism.test", "admin1@prism.test", "admin2@prism.test"]
+
+
+def test_reconnects_after_server_drops_the_session(smtp_server):
+    connection = SMTPConnection(smtp_server.settings, idle_seconds=60)
+    connection.send(build_digest_email([], "prism@test", "first@prism.test"))
+
+    # Restarting the server closes the session the connection is holding
+    smtp_server.stop()
+    smtp_server.start()
+    connection.send(build_digest_email([], "prism@test", "second@prism.test"))
+    connection.close()
+
+    assert connection.connects == 2
+    assert [message["To"] for message in smtp_server.handler.messages] == ["first@prism.test", "second@prism.test"]
+
+
+def test_idle_connection_is_closed(smtp_server):
+    connection = SMTPConnection(smtp_server.settings, idle_seconds=0)
+    connection.send(build_digest_email([], "prism@test", "admin@prism.test"))
+    connection.close_if_idle()
+    assert connection._smtp is None
+
+    connection.send(build_digest_email([], "prism@test", "admin@prism.test"))
+    connection.close()
+    assert connection.connects == 2
+
+
+def test_digest_batches_requests_per_career(requests_db, smtp_server):
+    for uid in ("u1", "u2", "u3"):
+        record_career_request(uid, "Marine Biologist")
+    record_career_request("u1", "Marine Biologist")
+    record_career_request("u4", "Astronaut", user_name="Asha", user_email="asha@example.test",
+                          message="Please add space careers")
+
+    sender = CareerRequestDigestSender(interval=3600, connection=SMTPConnection(smtp_server.settings))
+    assert sender.send_digest() == 2
+    # Not due again until the interval has passed
+    assert sender.send_digest() == 0
+    sender.connection.close()
+
+    assert len(smtp_server.handler.messages) == 1
+    message = smtp_server.handler.messages[0]
+    assert message["To"] == "admin@prism.test"
+    assert message["Subject"] == "Career requests digest: 2 careers requested"
+    body = message.get_content()
+    assert "- Marine Biologist (slug: marine-biologist): 3 new / 3 users, 4 requests" in body
+    assert "Asha <asha@example.test>: Please add space careers" in body
+    # Most distinct requesters first
+    assert body.index("Marine Biologist") < body.index("Astronaut")
+
+    pending = {doc["_id"]: doc["pending_count"] for doc in requests_db["career_requests"].find()}
+    assert pending == {"marine-biologist": 0, "astronaut": 0}
+
+
+def test_requests_during_digest_carry_over(requests_db, smtp_server):
+    record_career_request("u1", "Astronaut")
+    sender = CareerRequestDigestSender(interval=3600, connection=SMTPConnection(smtp_server.settings))
+    careers = career_requests.get_pending_digest_careers(10)
+    # Arrives after the digest read its counts
+    record_career_request("u2", "Astronaut")
+    career_requests.mark_digested(careers)
+
+    assert requests_db["career_requests"].find_one({"_id": "astronaut"})["pending_count"] == 1
+    sender.connection.close()
+
+
+def test_failed_digest_keeps_pending_and_backs_off(requests_db, smtp_server):
+    record_career_request("u1", "Astronaut")
+    settings = dict(smtp_server.settings)
+    smtp_server.stop()
+
+    sender = CareerRequestDigestSender(interval=3600, connection=SMTPConnection(settings))
+    digests = requests_db["career_request_digest"]
+    for failures, delay in ((1, 300), (2, 600)):
+        started = datetime.now()
+        assert sender.send_digest() == 0
+        digest = digests.find_one({"_id": career_requests.DIGEST_ID})
+        assert digest["failures"] == failures
+        assert timedelta(seconds=delay - 5) <= digest["next_digest_at"] - started <= timedelta(seconds=delay + 5)
+        # Backing off: nothing is attempted before next_digest_at
+        assert sender.send_digest() == 0
+        assert sender.metrics["failed"] == failures
+        digests.update_one({"_id": career_requests.DIGEST_ID}, {"$set": {"next_digest_at": datetime.now()}})
+
+    assert requests_db["career_requests"].find_one({"_id": "astronaut"})["pending_count"] == 1
+
+    smtp_server.start()
+    assert sender.send_digest() == 1
+    sender.connection.close()
+    digest = digests.find_one({"_id": career_requests.DIGEST_ID})
+    assert digest["failures"] == 0 and digest["last_careers"] == 1
+    assert requests_db["career_requests"].find_one({"_id": "astronaut"})["pending_count"] == 0
+
+
+def test_distinct_requesters_are_counted_once(requests_db):
+    results = [record_career_request(uid, "Marine Biologist") for uid in ("u1", "u2", "u1")]
+
+    assert [result["new_requester"] for result in results] == [True, True, False]
+    assert results[-1] == {"slug": "marine-biologist", "request_count": 3, "requester_count": 2,
+                           "new_requester": False}
+    career = requests_db["career_requests"].find_one({"_id": "marine-biologist"})
+    assert career["pending_count"] == 2
+    # Requesters live outside the aggregate document
+    assert "requesters" not in career
+    assert requests_db["career_requesters"].count_documents({"slug": "marine-biologist"}) == 2
+
+
+def test_email_identifies_requesters_without_uid(requests_db):
+    record_career_request("", "Astronaut", user_email="asha@example.test")
+    result = record_career_request("", "Astronaut", user_email="asha@example.test")
+    assert (result["request_count"], result["requester_count"], result["new_requester"]) == (2, 1, False)
+
+
+def test_anonymous_requests_are_not_distinct_users(requests_db):
+    record_career_request("u1", "Astronaut")
+    for _ in range(2):
+        result = record_career_request("", "Astronaut")
+
+    assert (result["request_count"], result["requester_count"], result["new_requester"]) == (3, 1, False)
+    # Still reported to the admin
+    assert requests_db["career_requests"].find_one({"_id": "astronaut"})["pending_count"] == 3
+    assert career_requests.get_most_requested_careers()[0]["requester_count"] == 1
+
+
+def test_concurrent_requests_from_one_user(requests_db):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: record_career_request("u1", "Astronaut"), range(8)))
+
+    assert sum(result["new_requester"] for result in results) == 1
+    career = requests_db["career_requests"].find_one({"_id": "astronaut"})
+    assert (career["request_count"], career["requester_count"], career["pending_count"]) == (8, 1, 1)
+
+
+def test_requester_arrays_of_the_older_layout_are_migrated(requests_db):
+    requests_db["career_requests"].insert_one({
+        "_id": "astronaut", "title": "Astronaut", "status": "open", "request_count": 2,
+        "requester_count": 2, "pending_count": 2, "requesters": ["u1", "u2"],
+    })
+
+    result = record_career_request("u1", "Astronaut")
+    assert (result["requester_count"], result["new_requester"]) == (2, False)
+    assert "requesters" not in requests_db["career_requests"].find_one({"_id": "astronaut"})
+
+
+def test_creating_the_career_closes_its_requests(requests_db):
+    import database
+
+    record_career_request("u1", "Marine Biologist")
+    record_career_request("u2", "Astronaut")
+    database.upsert_careers_from_assessment([{
+        "title": "Marine Biologist", "description": "Studies ocean life.", "match_percentage": 70,
+        "required_education": "B.Sc", "salary_range": "4-10 LPA", "growth_prospects": "Medium",
+    }])
+
+    career = requests_db["career_requests"].find_one({"_id": "marine-biologist"})
+    assert (career["status"], career["pending_count"]) == ("added", 0)
+    assert [career["slug"] for career in career_requests.get_most_requested_careers()] == ["astronaut"]
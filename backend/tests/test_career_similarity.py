@@ -0,0 +1,67 @@
+"""
+Incremental updates of the related-careers index (mongomock), checked against
+a full rebuild of the same catalog.
+"""
+
+import pytest
+
+import career_similarity
+from career_similarity import rebuild_related_careers, update_related_careers
+
+
+def career(slug, *skills):
+    return {"slug": slug, "title": slug.title(), "skills_required": [{"skill_name": skill} for skill in skills]}
+
+
+CATALOG = [
+    career("analyst", "sql", "excel", "python", "statistics"),
+    career("scientist", "sql", "excel", "python", "statistics", "research"),
+    career("engineer", "sql", "excel", "python", "spark"),
+    career("accountant", "excel", "tax"),
+    career("teacher", "pedagogy"),
+]
+
+
+@pytest.fixture
+def index(db, monkeypatch):
+    monkeypatch.setattr(career_similarity, "_indexes_ready", False)
+    db["careers"].insert_many([dict(item) for item in CATALOG])
+    rebuild_related_careers(top_k=2)
+    return db
+
+
+def related(db):
+    return {entry["slug"]: [item["slug"] for item in entry["related"]] for entry in db["career_related"].find()}
+
+
+def test_edit_refills_neighbours_that_lose_the_career(index):
+    assert related(index)["analyst"] == ["scientist", "engineer"]
+
+    index["careers"].update_one({"slug": "scientist"}, {"$set": {"skills_required": [{"skill_name": "pedagogy"}]}})
+    update_related_careers("scientist", top_k=2)
+
+    incremental = related(index)
+    assert incremental["analyst"] == ["engineer", "accountant"]
+    rebuild_related_careers(top_k=2)
+    assert incremental == related(index)
+
+
+def test_removed_career_is_replaced_in_neighbour_lists(index):
+    index["careers"].delete_one({"slug": "scientist"})
+    update_related_careers("scientist", top_k=2)
+
+    incremental = related(index)
+    assert "scientist" not in incremental
+    assert incremental["engineer"] == ["analyst", "accountant"]
+    rebuild_related_careers(top_k=2)
+    assert incremental == related(index)
+
+
+def test_new_career_is_merged_into_neighbour_lists(index):
+    index["careers"].insert_one(career("tutor", "pedagogy", "excel"))
+    assert update_related_careers("tutor", top_k=2)[0]["slug"] == "teacher"
+
+    incremental = related(index)
+    assert incremental["teacher"] == ["tutor"]
+    rebuild_related_careers(top_k=2)
+    assert incremental == related(index)
@@ -0,0 +1,40 @@
+"""
+Catalog helpers in database.py against an in-memory database (mongomock).
+"""
+
+import pytest
+
+import database
+from shared_cache import catalog_cache
+
+
+@pytest.fixture
+def catalog(db):
+    catalog_cache.invalidate("facets")
+    db["careers"].insert_many([
+        {"slug": "art-director", "title": "Art Director", "category": "Arts & Media Inc.",
+         "popular_exams": ["NID DAT", "B.Des $ Entrance"]},
+        {"slug": "nurse", "title": "Nurse", "category": "Healthcare", "popular_exams": ["NEET"]},
+    ])
+    yield db
+    catalog_cache.invalidate("facets")
+
+
+def test_facet_names_round_trip(catalog):
+    facets = database.get_career_facets()
+
+    assert facets["categories"] == {"Arts & Media Inc.": 1, "Healthcare": 1}
+    assert facets["exams"] == {"NID DAT": 1, "B.Des $ Entrance": 1, "NEET": 1}
+    # Stored with field-name-safe keys
+    stored = catalog["catalog_facets"].find_one({"_id": database.FACETS_ID})
+    assert "Arts & Media Inc．" in stored["categories"]
+
+
+def test_incremental_facet_updates_keep_names(catalog):
+    database.get_career_facets()
+    database._update_career_facets(None, "Arts & Media Inc.", True)
+    database._update_career_facets("Healthcare", "Arts & Media Inc.", False)
+
+    facets = database.get_career_facets()
+    assert facets["categories"] == {"Arts & Media Inc.": 3, "Healthcare": 0}
+    assert facets["total_careers"] == 3
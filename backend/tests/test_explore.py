@@ -0,0 +1,57 @@
+"""
+Conditional GETs of /api/careers/explore (mongomock catalog).
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from shared_cache import catalog_cache
+from user_database import remember_latest_assessment
+
+FAR_FUTURE = "Fri, 01 Jan 2100 00:00:00 GMT"
+
+
+@pytest.fixture
+def client(db):
+    catalog_cache.invalidate("facets")
+    db["careers"].insert_many([
+        {"slug": "nurse", "title": "Nurse", "category": "Healthcare", "avg_salary_min": 300000, "avg_salary_max": 600000},
+        {"slug": "data-scientist", "title": "Data Scientist", "category": "Technology",
+         "avg_salary_min": 800000, "avg_salary_max": 2000000},
+    ])
+    yield TestClient(main.app)
+    catalog_cache.invalidate("facets")
+
+
+def assess(firebase_uid, titles):
+    remember_latest_assessment({"firebase_uid": firebase_uid, "created_at": datetime.now(timezone.utc),
+                                "results": {"careerPaths": [{"title": title, "match_percentage": 90}
+                                                            for title in titles]}})
+
+
+def test_anonymous_pages_honour_if_modified_since(client):
+    response = client.get("/api/careers/explore")
+    assert response.status_code == 200 and "last-modified" in response.headers
+
+    cached = client.get("/api/careers/explore", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert cached.status_code == 304
+
+
+def test_personalised_pages_are_validated_by_etag_only(client):
+    assess("explore-user", ["Nurse"])
+    response = client.get("/api/careers/explore", params={"user_id": "explore-user"})
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+
+    # A new assessment leaves the catalog untouched but changes the page
+    assess("explore-user", ["Data Scientist"])
+    response = client.get("/api/careers/explore", params={"user_id": "explore-user"},
+                          headers={"If-Modified-Since": FAR_FUTURE})
+    assert response.status_code == 200
+
+    etag = response.headers["etag"]
+    cached = client.get("/api/careers/explore", params={"user_id": "explore-user"}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
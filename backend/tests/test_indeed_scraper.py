@@ -0,0 +1,126 @@
+"""
+indeed_scraper against recorded search pages served by a local stand-in for Indeed.
+
+Stand-in routes (GET /jobs?q=...&start=...):
+    q=python   start=0 mosaic page, start=10 card-only page, start=20 JSON, beyond that 404
+    q=partial  start=0 mosaic page, anything else 503
+    q=broken   mosaic blob cut short, with job cards after it
+    q=malformed  start=0 mosaic page, start=10 truncated JSON, start=20 JSON of an unexpected shape
+    q=down     always 503
+"""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from indeed_scraper import JobFetchPool, SearchPageParser, fetch_indeed_jobs, get_ingestion_stats, parse_search_page
+
+FIXTURES = Path(__file__).parent / "fixtures" / "indeed"
+
+HTML = "text/html; charset=utf-8"
+JSON = "application/json"
+
+# Served by the stand_in fixture (conftest.py)
+ROUTES = {
+    ("python", 0): ("search_mosaic.html", HTML),
+    ("python", 10): ("search_cards.html", HTML),
+    ("python", 20): ("search_results.json", JSON),
+    ("partial", 0): ("search_mosaic.html", HTML),
+    ("partial", None): 503,
+    ("broken", 0): ("search_broken_mosaic.html", HTML),
+    ("malformed", 0): ("search_mosaic.html", HTML),
+    ("malformed", 10): ("search_truncated.json", JSON),
+    ("malformed", 20): ("search_unexpected_shape.json", JSON),
+    ("down", None): 503,
+}
+
+
+def run_fetch(server, query, limit, **kwargs):
+    base_url = server.base_url
+
+    async def run():
+        pool = JobFetchPool(per_host=2, timeout=5)
+        try:
+            return await fetch_indeed_jobs(query, limit=limit, pool=pool, base_url=base_url, **kwargs)
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(run())
+
+
+def test_paginates_across_mosaic_cards_and_json_pages(stand_in):
+    jobs = run_fetch(stand_in, "python", limit=30)
+
+    keys = [job["job_key"] for job in jobs]
+    # Page 1 repeats a007 and page 3 repeats b002; each job appears once
+    assert keys == [f"a{i:03d}" for i in range(8)] + ["b001", "b002", "d001", "d002"]
+    assert {start for q, start in stand_in.requests if q == "python"} == {0, 10, 20}
+
+    first = jobs[0]
+    assert first["title"] == "Python Developer 0"
+    assert first["summary"] == "Build data pipelines in Python"
+    assert first["salary_min"] == 600000
+    assert first["url"].endswith("/rc/clk?jk=a000")
+    assert first["posted_at"].startswith("2025-10-09")
+
+    backend = jobs[8]
+    assert backend["company"] == "Northwind Labs"
+    assert backend["salary_text"] == "₹10,00,000 - ₹14,00,000 a year"
+    assert backend["posted_text"] == "Posted 1 day ago"
+
+
+def test_limit_caps_pages_requested(stand_in):
+    stand_in.requests.clear()
+    jobs = run_fetch(stand_in, "python", limit=5)
+    assert len(jobs) == 5
+    assert stand_in.requests == [("python", 0)]
+
+
+def test_skips_malformed_cards():
+    html = (FIXTURES / "search_cards.html").read_text()
+    assert [job["job_key"] for job in parse_search_page(html, "https://in.indeed.com")] == ["a007", "b001", "b002"]
+
+    body = (FIXTURES / "search_results.json").read_text()
+    assert [job["job_key"] for job in parse_search_page(body, "https://in.indeed.com", JSON)] == ["d001", "b002", "d002"]
+
+
+def test_broken_mosaic_blob_falls_back_to_cards(stand_in):
+    jobs = run_fetch(stand_in, "broken", limit=10)
+    assert [(job["job_key"], job["title"]) for job in jobs] == [("c001", "Data Analyst"),
+                                                                ("c002", "Junior Data Analyst")]
+
+
+def test_malformed_pages_are_skipped(stand_in):
+    parse_errors = get_ingestion_stats()["parse_errors"]
+    jobs = run_fetch(stand_in, "malformed", limit=30, strict=True)
+    assert [job["job_key"] for job in jobs] == [f"a{i:03d}" for i in range(8)]
+    assert get_ingestion_stats()["parse_errors"] == parse_errors + 2
+
+
+def test_failed_pages_are_skipped(stand_in):
+    jobs = run_fetch(stand_in, "partial", limit=20)
+    assert [job["job_key"] for job in jobs] == [f"a{i:03d}" for i in range(8)]
+
+
+def test_all_pages_failing(stand_in):
+    assert run_fetch(stand_in, "down", limit=20) == []
+    with pytest.raises(httpx.HTTPStatusError):
+        run_fetch(stand_in, "down", limit=20, strict=True)
+
+
+def test_stream_parser_stops_after_mosaic_blob():
+    body = (FIXTURES / "search_mosaic.html").read_text()
+    parser = SearchPageParser("https://in.indeed.com")
+    fed = 0
+    # Small chunks split the marker and the closing tag across feeds
+    for start in range(0, len(body), 7):
+        parser.feed(body[start:start + 7])
+        fed = start + 7
+        if parser.done:
+            break
+
+    assert parser.done
+    assert fed < len(body) // 2
+    assert [job["job_key"] for job in parser.close()] == [f"a{i:03d}" for i in range(8)]
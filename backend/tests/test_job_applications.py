@@ -0,0 +1,40 @@
+"""
+/api/jobs/apply idempotency against an in-memory database (mongomock).
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import user_database
+import write_behind as write_behind_module
+
+APPLICATION = {"firebase_uid": "u1", "job_listing_id": "a000", "job_title": "Python Developer 0",
+               "company_name": "Contoso"}
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(user_database, "_application_indexes_ready", False)
+    # Not started: writes happen as soon as they are queued
+    monkeypatch.setattr(main, "write_behind", write_behind_module.WriteBehindQueue())
+    return TestClient(main.app)
+
+
+def test_retry_after_the_write_is_a_duplicate(client, db):
+    first = client.post("/api/jobs/apply", json=APPLICATION).json()
+    retry = client.post("/api/jobs/apply", json=APPLICATION).json()
+
+    assert (first["duplicate"], retry["duplicate"]) == (False, True)
+    assert retry["application_id"] == first["application_id"]
+    assert db["job_applications"].count_documents({}) == 1
+
+
+def test_idempotency_key_header_identifies_the_application(client, db):
+    headers = {"Idempotency-Key": "apply-123"}
+    first = client.post("/api/jobs/apply", json=APPLICATION, headers=headers).json()
+    retry = client.post("/api/jobs/apply", json=dict(APPLICATION, notes="sent twice"), headers=headers).json()
+    other = client.post("/api/jobs/apply", json=APPLICATION).json()
+
+    assert (first["duplicate"], retry["duplicate"], other["duplicate"]) == (False, True, False)
+    assert db["job_applications"].count_documents({}) == 2
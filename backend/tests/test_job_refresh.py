@@ -0,0 +1,147 @@
+"""
+JobRefreshScheduler against the local Indeed stand-in (conftest.py), with the
+catalog and job index in an in-memory database (mongomock).
+
+Stand-in routes (GET /jobs?q=...&start=...):
+    q=Python Developer  start=0 mosaic page (a000-a007), other pages 404
+    q=Data Analyst      start=0 429, then 503, then a page with c001/c002; other pages 404
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import job_refresh
+from indeed_scraper import JobFetchPool
+from job_refresh import JobRefreshScheduler, RateLimiter
+from user_database import get_job_listings
+
+HTML = "text/html; charset=utf-8"
+
+ROUTES = {
+    ("Python Developer", 0): ("search_mosaic.html", HTML),
+    ("Data Analyst", 0): [429, 503, ("search_broken_mosaic.html", HTML)],
+}
+
+CATALOG = [
+    {"slug": "python-developer", "title": "Python Developer",
+     "job_roles": [{"role_title": "Python Developer"}], "skills_required": [{"skill_name": "Python"}]},
+    {"slug": "data-analyst", "title": "Data Analyst",
+     "job_roles": [{"role_title": "Data Analyst"}], "skills_required": [{"skill_name": "SQL"}]},
+]
+
+
+@pytest.fixture
+def catalog(db):
+    db["careers"].insert_many([dict(career) for career in CATALOG])
+    return db
+
+
+def run_scheduler(stand_in, action, **kwargs):
+    """Run action(scheduler) on a fresh event loop with a scheduler pointed at the stand-in"""
+    settings = dict(jitter=0, rate_per_minute=6000, backoff_base=100)
+    settings.update(kwargs)
+
+    async def run():
+        pool = JobFetchPool(per_host=2, timeout=5)
+        scheduler = JobRefreshScheduler(pool=pool, base_url=stand_in.base_url, **settings)
+        try:
+            return scheduler, await action(scheduler)
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(run())
+
+
+async def drain(scheduler):
+    """Let one worker process everything queued"""
+    worker = asyncio.create_task(scheduler._worker())
+    await scheduler.queue.join()
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+
+def test_refresh_stores_and_matches_listings(catalog, stand_in):
+    _, count = run_scheduler(stand_in, lambda scheduler: scheduler.refresh_career("python-developer"))
+
+    assert count == 8
+    jobs = list(catalog["jobs"].find())
+    assert len(jobs) == 8
+    assert all(job["search_career_slugs"] == ["python-developer"] for job in jobs)
+    assert all(job["career_slugs"][0] == "python-developer" and job.get("match_version") for job in jobs)
+    listings, _ = get_job_listings(career_slug="python-developer", limit=20)
+    assert len(listings) == 8
+
+
+def test_new_round_rematches_stale_listings(catalog, stand_in, monkeypatch):
+    monkeypatch.setattr(job_refresh, "get_top_careers", lambda limit: ["python-developer"])
+
+    async def two_rounds(scheduler):
+        await scheduler.schedule_round()
+        await drain(scheduler)
+        assert not any("data-engineer" in job["career_slugs"] for job in catalog["jobs"].find())
+        # A career added between rounds: the next round's matcher links the stored listings to it
+        catalog["careers"].insert_one({"slug": "data-engineer", "title": "Data Engineer",
+                                       "job_roles": [{"role_title": "Data Pipeline Developer"}],
+                                       "skills_required": [{"skill_name": "Data Pipelines"}]})
+        await scheduler.schedule_round()
+        await drain(scheduler)
+
+    scheduler, _ = run_scheduler(stand_in, two_rounds)
+
+    assert scheduler.metrics["refreshed"] == 2
+    versions = {job["match_version"] for job in catalog["jobs"].find()}
+    assert len(versions) == 1
+    assert all("data-engineer" in job["career_slugs"] for job in catalog["jobs"].find())
+
+
+def test_failed_fetches_back_off_exponentially(catalog, stand_in, monkeypatch):
+    monkeypatch.setattr(job_refresh, "get_top_careers", lambda limit: ["data-analyst"])
+    delays = []
+
+    async def rounds(scheduler):
+        for _ in range(3):
+            await scheduler.schedule_round()
+            await drain(scheduler)
+            if "data-analyst" in scheduler._retry_at:
+                delays.append(scheduler._retry_at["data-analyst"] - time.monotonic())
+                # Still backing off: the next round skips the career
+                await scheduler.schedule_round()
+                assert scheduler.queue.empty()
+                scheduler._retry_at["data-analyst"] = 0
+
+    scheduler, _ = run_scheduler(stand_in, rounds)
+
+    # 429, then 503, then success
+    assert scheduler.metrics["failed"] == 2
+    assert scheduler.metrics["skipped_backoff"] == 2
+    assert 80 <= delays[0] <= 120 and 160 <= delays[1] <= 240
+    assert scheduler.metrics["refreshed"] == 1 and scheduler.metrics["jobs_ingested"] == 2
+    assert "data-analyst" not in scheduler._failures
+    assert catalog["jobs"].count_documents({}) == 2
+    assert stand_in.requests.count(("Data Analyst", 0)) == 3
+
+
+def test_jitter_precedes_each_fetch(catalog, stand_in, monkeypatch):
+    draws = []
+
+    def uniform(low, high):
+        draws.append((low, high))
+        return 0.01
+
+    monkeypatch.setattr(job_refresh.random, "uniform", uniform)
+    run_scheduler(stand_in, lambda scheduler: scheduler.refresh_career("python-developer"), jitter=2.5)
+    assert draws == [(0, 2.5)]
+
+
+def test_rate_limiter_spaces_fetches():
+    async def acquire_all():
+        limiter = RateLimiter(rate=600, burst=1)
+        started = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # 10 tokens per second and a burst of one: the last three acquisitions wait ~0.1s each
+    assert 0.25 <= asyncio.run(acquire_all()) < 1.0
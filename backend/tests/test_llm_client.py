@@ -0,0 +1,244 @@
+"""
+Resilience layer (circuit breaker, retry budget, deadlines) and tier routing
+around FakeChatModel, and the degraded answers the API serves when the model
+is unavailable.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+import llm_client
+from llm_client import CircuitBreaker, FakeChatModel, LLMRouter, LLMUnavailableError, ResilientLLM, RetryBudget
+
+MESSAGES = [HumanMessage(content="Which careers suit someone who likes biology?")]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingModel(FakeChatModel):
+    def __init__(self, latency: float = 0, error_rate: float = 0.0):
+        super().__init__(latency=latency, error_rate=error_rate)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return await super().ainvoke(messages)
+
+
+def resilient(model, **kwargs):
+    settings = dict(breaker=CircuitBreaker(min_calls=100), budget=RetryBudget(ratio=0.2), max_attempts=3,
+                    base_backoff=0, max_backoff=0)
+    settings.update(kwargs)
+    return ResilientLLM(lambda: model, **settings)
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window_seconds=60, open_seconds=30, clock=clock)
+    for succeeded in (True, False, True):
+        breaker.record(succeeded)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.retry_after() == 30
+
+    # After open_seconds a single probe goes out; a failed probe reopens the breaker
+    clock.now += 30
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and breaker.transitions == {"opened": 2, "closed": 0}
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.transitions == {"opened": 2, "closed": 1}
+    assert breaker.status()["window_calls"] == 0
+
+
+def test_failures_outside_the_window_are_forgotten():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window_seconds=60, open_seconds=30, clock=clock)
+    for _ in range(3):
+        breaker.record(False)
+    clock.now += 61
+    breaker.record(False)
+    assert breaker.state == "closed" and breaker.status()["window_calls"] == 1
+
+
+def test_open_breaker_short_circuits_until_a_probe_succeeds():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window_seconds=60, open_seconds=30, clock=clock)
+    model = CountingModel(error_rate=1.0)
+    llm = resilient(model, breaker=breaker, max_attempts=1)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(llm.ainvoke(MESSAGES, deadline=5))
+    assert breaker.state == "open"
+
+    with pytest.raises(LLMUnavailableError) as refused:
+        asyncio.run(llm.ainvoke(MESSAGES, deadline=5))
+    assert refused.value.reason == "circuit_open" and refused.value.retry_after == 30
+    assert model.calls == 2 and llm.metrics["short_circuited"] == 1
+
+    clock.now += 30
+    model.error_rate = 0.0
+    assert asyncio.run(llm.ainvoke(MESSAGES, deadline=5)).content
+    assert breaker.state == "closed" and model.calls == 3
+
+
+def test_transient_errors_are_retried():
+    model = CountingModel(error_rate=1.0)
+    llm = resilient(model, max_attempts=3)
+    with pytest.raises(LLMUnavailableError) as unavailable:
+        asyncio.run(llm.ainvoke(MESSAGES, deadline=5))
+    assert unavailable.value.reason == "error"
+    assert model.calls == 3 and llm.metrics["retries"] == 2
+
+
+def test_retry_budget_exhaustion_stops_retries():
+    model = CountingModel(error_rate=1.0)
+    llm = resilient(model, budget=RetryBudget(ratio=0, max_tokens=1), max_attempts=5)
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke(MESSAGES, deadline=5))
+    # One retry from the budget, then no tokens left
+    assert model.calls == 2
+    assert (llm.metrics["retries"], llm.metrics["retry_budget_exhausted"]) == (1, 1)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.ainvoke(MESSAGES, deadline=5))
+    assert model.calls == 3 and llm.metrics["retry_budget_exhausted"] == 2
+
+
+def test_deadline_expiry_raises_unavailable():
+    model = CountingModel(latency=1.0)
+    llm = resilient(model)
+    with pytest.raises(LLMUnavailableError) as unavailable:
+        asyncio.run(llm.ainvoke(MESSAGES, deadline=0.05))
+    assert unavailable.value.reason == "deadline_exceeded"
+    # No time left for another attempt
+    assert model.calls == 1 and llm.metrics["timeouts"] == 1
+
+
+@pytest.fixture
+def tier_models(monkeypatch):
+    models = {"fast": CountingModel(latency=0.01), "heavy": CountingModel(latency=0.03)}
+    monkeypatch.setattr(llm_client, "_llms", models)
+    return models
+
+
+def test_router_sends_each_call_site_to_its_tier(tier_models):
+    router = LLMRouter(routes={"chat": "fast", "assessment": "heavy"})
+    asyncio.run(router.ainvoke("chat", MESSAGES, deadline=5))
+    asyncio.run(router.ainvoke("assessment", MESSAGES, deadline=5))
+    # Unrouted call sites use the default tier
+    asyncio.run(router.ainvoke("summary", MESSAGES, deadline=5))
+
+    assert (tier_models["fast"].calls, tier_models["heavy"].calls) == (1, 2)
+    assert router.metrics["fast"].counts["calls"] == 1 and router.metrics["heavy"].counts["calls"] == 2
+
+
+def test_routes_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("LLM_ROUTES", "chat=heavy, assessment=fast, summary=unknown")
+    assert LLMRouter().routes == {"chat": "heavy", "assessment": "fast"}
+
+
+def test_long_prompts_are_promoted_to_the_heavy_tier(tier_models):
+    router = LLMRouter(routes={"chat": "fast"}, fast_max_prompt_chars=100)
+    short = [HumanMessage(content="x" * 100)]
+    long = [HumanMessage(content="x" * 101)]
+
+    assert router.choose("chat", short) == "fast"
+    asyncio.run(router.ainvoke("chat", long, deadline=5))
+
+    assert (tier_models["fast"].calls, tier_models["heavy"].calls) == (0, 1)
+    assert router.status()["tiers"]["heavy"]["promoted"] == 1
+
+
+def test_tier_metrics_count_tokens_and_latency(tier_models):
+    router = LLMRouter(routes={"chat": "fast"})
+    for _ in range(3):
+        response = asyncio.run(router.ainvoke("chat", MESSAGES, deadline=5))
+    usage = response.usage_metadata
+
+    fast = router.status()["tiers"]["fast"]
+    assert (fast["calls"], fast["succeeded"], fast["unavailable"]) == (3, 3, 0)
+    assert fast["input_tokens"] == 3 * usage["input_tokens"] and fast["output_tokens"] == 3 * usage["output_tokens"]
+    assert fast["avg_input_tokens"] == usage["input_tokens"]
+    assert 10 <= fast["latency_ms"]["p50"] <= fast["latency_ms"]["p99"] < 1000
+    assert router.status()["tiers"]["heavy"]["latency_ms"] == {"p50": None, "p95": None, "p99": None}
+
+
+def test_unavailable_calls_are_counted_without_latency(tier_models):
+    tier_models["fast"].error_rate = 1.0
+    router = LLMRouter(routes={"chat": "fast"})
+    router.resilience["fast"].max_attempts = 1
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(router.ainvoke("chat", MESSAGES, deadline=5))
+
+    fast = router.status()["tiers"]["fast"]
+    assert (fast["calls"], fast["unavailable"], fast["input_tokens"]) == (1, 1, 0)
+    assert fast["latency_ms"]["p50"] is None
+
+
+@pytest.fixture
+def app(db, monkeypatch):
+    import main
+
+    router = LLMRouter(routes={"chat": "fast", "assessment": "heavy"})
+    for llm in router.resilience.values():
+        llm.max_attempts = 1
+    monkeypatch.setattr(main, "llm_router", router)
+    monkeypatch.setattr(llm_client, "_llms", {name: FakeChatModel(latency=0, error_rate=1.0) for name in router.tiers})
+    return main
+
+
+def test_degraded_assessment_falls_back_to_popular_careers(app, db):
+    db["careers"].insert_many([{"slug": "data-scientist", "title": "Data Scientist"},
+                               {"slug": "nurse", "title": "Nurse"}])
+    db["career_stats"].insert_many([{"_id": "nurse", "popularity": 9}, {"_id": "data-scientist", "popularity": 4}])
+
+    response = app._degraded_assessment_response("degraded-new-user", LLMUnavailableError("circuit_open", 12.4))
+
+    assert response["status"] == "degraded"
+    assert response["degraded"] == {"reason": "circuit_open", "retry_after_seconds": 12, "source": "popular_careers"}
+    assert [career["title"] for career in response["recommendations"]["career_paths"]] == ["Nurse", "Data Scientist"]
+    assert app.llm_router.degraded == 1
+
+
+def test_degraded_assessment_reuses_previous_results(app, db):
+    from datetime import datetime
+
+    db["assessments"].insert_one({"firebase_uid": "degraded-returning-user", "created_at": datetime(2026, 1, 5),
+                                  "results": {"careerPaths": [{"title": "Nurse"}], "personalizedAdvice": "Keep going."}})
+
+    response = app._degraded_assessment_response("degraded-returning-user", LLMUnavailableError("error"))
+
+    assert response["degraded"] == {"reason": "error", "source": "previous_assessment"}
+    assert response["recommendations"]["career_paths"] == [{"title": "Nurse"}]
+    assert response["recommendations"]["personalized_advice"] == "Keep going."
+
+
+def test_chat_answers_in_degraded_mode(app, db):
+    from fastapi.testclient import TestClient
+
+    db["assessments"].insert_one({"firebase_uid": "degraded-chat-user", "created_at": None,
+                                  "results": {"careerPaths": [{"title": "Nurse"}, {"title": "Pharmacist"}]}})
+
+    response = TestClient(app.app).post("/api/mentor/chat", json={"user_id": "degraded-chat-user",
+                                                                  "message": "What should I learn next?"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "degraded" and body["degraded"] == {"reason": "error"}
+    assert "Nurse, Pharmacist" in body["response"]
+    assert db["chat_history"].count_documents({}) == 0
+    assert app.llm_router.metrics["fast"].counts["unavailable"] == 1
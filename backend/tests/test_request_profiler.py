@@ -0,0 +1,52 @@
+"""
+ProfilingMiddleware around a small FastAPI app, writing to a temporary directory.
+"""
+
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import request_profiler
+from request_profiler import ProfilingMiddleware
+
+
+def profiled_client(directory, loop_threads=None, **kwargs):
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        if loop_threads is not None:
+            loop_threads.append(threading.current_thread())
+        return {"status": "ok"}
+
+    app.add_middleware(ProfilingMiddleware, token="secret", directory=str(directory), **kwargs)
+    return TestClient(app)
+
+
+def test_profile_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    writers = []
+    write = request_profiler.StackSampler.write
+
+    def recording_write(self, path):
+        writers.append(threading.current_thread())
+        write(self, path)
+
+    monkeypatch.setattr(request_profiler.StackSampler, "write", recording_write)
+    loop_threads = []
+    client = profiled_client(tmp_path, loop_threads)
+
+    response = client.get("/api/ping", headers={"X-Profile": "secret"})
+    unprofiled = client.get("/api/ping")
+
+    assert response.status_code == 200
+    assert (tmp_path / response.headers["X-Profile-File"]).exists()
+    assert "X-Profile-File" not in unprofiled.headers
+    assert len(writers) == 1 and writers[0] is not loop_threads[0]
+
+
+def test_old_profiles_are_pruned(tmp_path):
+    client = profiled_client(tmp_path, mode="cprofile", max_files=2)
+    names = [client.get("/api/ping", headers={"X-Profile": "secret"}).headers["X-Profile-File"] for _ in range(3)]
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(names[1:])
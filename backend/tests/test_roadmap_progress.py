@@ -0,0 +1,85 @@
+"""
+Roadmap progress batches (/api/career-journey/roadmap/progress/batch) against
+an in-memory database (mongomock).
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import user_database
+from shared_cache import career_cache
+from user_database import encode_roadmap_bits
+
+
+class RacingUsers:
+    """The users collection, with another writer completing a step before each update lands"""
+
+    def __init__(self, users):
+        self.users = users
+        self.races = 0
+
+    def __getattr__(self, name):
+        return getattr(self.users, name)
+
+    def update_one(self, filter, update, **kwargs):
+        self.races += 1
+        self.users.update_one({"firebase_uid": "u1"}, {
+            "$set": {"roadmap_progress.nurse.bits": encode_roadmap_bits([3]),
+                     "roadmap_progress.nurse.version": 100 + self.races}})
+        return self.users.update_one(filter, update, **kwargs)
+
+
+class RacingDatabase:
+    def __init__(self, db):
+        self.db = db
+        self.users = RacingUsers(db["users"])
+
+    def __getitem__(self, name):
+        return self.users if name == "users" else self.db[name]
+
+
+@pytest.fixture
+def client(db):
+    career_cache.invalidate("nurse")
+    db["careers"].insert_one({"slug": "nurse", "title": "Nurse",
+                              "roadmap": [{"stage": "School", "title": f"Step {index}"} for index in range(5)]})
+    db["users"].insert_one({"firebase_uid": "u1"})
+    yield TestClient(main.app)
+    career_cache.invalidate("nurse")
+
+
+def batch(client, **body):
+    return client.post("/api/career-journey/roadmap/progress/batch",
+                       json=dict({"firebase_uid": "u1", "career_slug": "nurse"}, **body))
+
+
+def test_batch_is_applied_atomically(client):
+    response = batch(client, changes=[{"step_index": 0, "is_completed": True},
+                                      {"roadmap_step_id": "step_2", "is_completed": True}])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["roadmap_version"] == 1
+    assert [item["roadmap_step_id"] for item in body["roadmap_progress"]] == ["step_0", "step_2"]
+
+
+def test_stale_expected_version_is_a_conflict(client):
+    batch(client, changes=[{"step_index": 0, "is_completed": True}])
+    response = batch(client, expected_version=0, changes=[{"step_index": 1, "is_completed": True}])
+
+    assert response.status_code == 409
+    assert response.json()["roadmap_version"] == 1
+
+
+def test_losing_every_race_is_a_conflict_not_an_error(client, db, monkeypatch):
+    racing = RacingDatabase(db)
+    monkeypatch.setattr(user_database, "get_db_connection", lambda: racing)
+
+    response = batch(client, changes=[{"step_index": 0, "is_completed": True}])
+
+    assert response.status_code == 409
+    body = response.json()
+    assert body["status"] == "conflict"
+    assert body["roadmap_version"] == 100 + user_database.ROADMAP_WRITE_ATTEMPTS
+    assert [item["roadmap_step_id"] for item in body["roadmap_progress"]] == ["step_3"]
+    assert racing.users.races == user_database.ROADMAP_WRITE_ATTEMPTS
@@ -0,0 +1,68 @@
+"""
+Values read back from the shared tier (L2) must match what the worker that
+loaded them holds in L1, datetimes included.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import shared_cache
+from responses import http_date
+from shared_cache import CacheBackend, SharedCache
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class DictBackend(CacheBackend):
+    """L2 stand-in storing BSON-encoded values like the Redis backend"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        data = self.entries.get(key)
+        return shared_cache._decode(data) if data is not None else None
+
+    def set(self, key, value, ttl):
+        self.entries[key] = shared_cache._encode(value)
+
+    def delete(self, keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def publish(self, namespace, keys):
+        pass
+
+
+def read_through_both(backend, value):
+    """(value as the loading worker caches it, value another worker reads from L2)"""
+    loader_worker, other_worker = SharedCache("validators", backend=backend), SharedCache("validators", backend=backend)
+    local = loader_worker.get_or_load("career", lambda: {"updated_at": value})
+    shared = other_worker.get_or_load("career", lambda: pytest.fail("should come from L2"))
+    return local["updated_at"], shared["updated_at"]
+
+
+def test_aware_datetimes_come_back_aware_utc():
+    updated_at = datetime(2026, 10, 19, 9, 30, 15, 123000, tzinfo=IST)
+    local, shared = read_through_both(DictBackend(), updated_at)
+
+    assert shared == local and shared.tzinfo is not None
+    assert http_date(shared) == http_date(local) == "Mon, 19 Oct 2026 04:00:15 GMT"
+
+
+def test_mongo_backend_returns_aware_datetimes(db):
+    updated_at = datetime(2026, 10, 19, 4, 0, 15, tzinfo=timezone.utc)
+    local, shared = read_through_both(shared_cache.MongoCacheBackend(), updated_at)
+
+    assert shared == local and shared.tzinfo is not None
+    assert http_date(shared) == "Mon, 19 Oct 2026 04:00:15 GMT"
+
+
+def test_career_validators_are_utc(db):
+    import database
+
+    db["careers"].insert_one({"slug": "nurse", "title": "Nurse", "version": 2,
+                              "updated_at": datetime(2026, 10, 19, 4, 0, 15)})
+    version = database.get_career_version("nurse")
+    assert version["updated_at"] == datetime(2026, 10, 19, 4, 0, 15, tzinfo=timezone.utc)
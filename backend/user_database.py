@@ -1,13 +1,19 @@
 import os
-from datetime import datetime
-from database import get_db_connection
-from pymongo import DESCENDING
+import re
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from database import as_utc, get_db_connection
+from shared_cache import assessment_cache
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 
-def create_or_update_user_profile(firebase_uid, email, display_name=None):
-    """Create or update user profile in MongoDB"""
-    db = get_db_connection()
-    users = db['users']
-    
+def to_mongo_precision(value):
+    """Truncate a datetime to the milliseconds MongoDB stores"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+def user_profile_update(firebase_uid, email, display_name=None):
+    """Upsert operation for a user profile (run directly or via the write-behind queue)"""
     user_data = {
         "firebase_uid": firebase_uid,
         "email": email,
@@ -16,54 +22,143 @@ def create_or_update_user_profile(firebase_uid, email, display_name=None):
     
     if display_name:
         user_data["display_name"] = display_name
-        
-    users.update_one(
-        {"firebase_uid": firebase_uid},
-        {"$set": user_data},
-        upsert=True
-    )
-    return True
+    
+    return UpdateOne({"firebase_uid": firebase_uid}, {"$set": user_data}, upsert=True)
 
-def save_assessment_data(firebase_uid, answers, results):
-    """Save assessment results to MongoDB"""
+def create_or_update_user_profile(firebase_uid, email, display_name=None):
+    """Create or update user profile in MongoDB"""
     db = get_db_connection()
-    assessments = db['assessments']
-    
-    assessment_doc = {
+    db['users'].bulk_write([user_profile_update(firebase_uid, email, display_name)])
+    return True
+
+def assessment_document(firebase_uid, answers, results):
+    """Build an assessment document (persisted directly or via the write-behind queue)"""
+    return {
         "firebase_uid": firebase_uid,
         "answers": answers,
         "results": results,
-        "created_at": datetime.now()
+        "created_at": datetime.now(timezone.utc)
     }
-    
-    assessments.insert_one(assessment_doc)
-    
-    # Also update user profile with latest assessment summary if needed
-    return True
 
-def get_user_progress(firebase_uid):
-    """Get user progress stats"""
+def save_assessment_data(firebase_uid, answers, results):
+    """Save assessment results to MongoDB"""
     db = get_db_connection()
-    
-    # Count assessments
-    assessment_count = db['assessments'].count_documents({"firebase_uid": firebase_uid})
-    
-    # Get selected careers count
-    user = db['users'].find_one({"firebase_uid": firebase_uid})
-    saved_careers_count = len(user.get('selected_careers', [])) if user else 0
-    
-    # Calculate profile completion (mock logic)
-    profile_completion = 20
-    if assessment_count > 0: profile_completion += 40
-    if saved_careers_count > 0: profile_completion += 20
-    
+    assessment = assessment_document(firebase_uid, answers, results)
+    db['assessments'].insert_one(assessment)
+    db['users'].bulk_write([assessment_stats_update(firebase_uid)])
+    remember_latest_assessment(assessment)
+    return True
+
+# Dashboard counters are kept on the user document under "stats" and updated
+# with $inc/$set next to the write they count (in the same bulk batch when the
+# write goes through the write-behind queue), so the dashboard reads them with
+# one projected find_one. `check_user_stats` recounts them from the source
+# collections and can repair drift; run it once to backfill existing users.
+#
+#   stats.assessments_completed   assessments saved
+#   stats.careers_explored        careers in selected_careers (a proxy for exploration)
+#   stats.chats_sent              mentor chat messages saved
+#   stats.profile.<part>          true once that part of the profile is done
+
+PROFILE_COMPLETION_BASE = 20
+PROFILE_COMPLETION_WEIGHTS = {"assessment": 40, "careers": 20}
+
+def assessment_stats_update(firebase_uid):
+    """Counter update for a saved assessment (run directly or via the write-behind queue)"""
+    return UpdateOne(
+        {"firebase_uid": firebase_uid},
+        {"$inc": {"stats.assessments_completed": 1}, "$set": {"stats.profile.assessment": True}},
+        upsert=True
+    )
+
+def chat_stats_update(firebase_uid):
+    """Counter update for a saved chat message (run directly or via the write-behind queue)"""
+    return UpdateOne({"firebase_uid": firebase_uid}, {"$inc": {"stats.chats_sent": 1}}, upsert=True)
+
+def _selected_careers_stats(careers):
+    return {"stats.careers_explored": len(careers), "stats.profile.careers": bool(careers)}
+
+def _progress_from_stats(stats):
+    profile = stats.get('profile') or {}
     return {
-        "assessments_completed": assessment_count,
-        "careers_explored": saved_careers_count, # Using saved careers as proxy
-        "profile_completion": profile_completion,
+        "assessments_completed": stats.get('assessments_completed', 0),
+        "careers_explored": stats.get('careers_explored', 0),
+        "chats_sent": stats.get('chats_sent', 0),
+        "profile_completion": PROFILE_COMPLETION_BASE + sum(
+            weight for part, weight in PROFILE_COMPLETION_WEIGHTS.items() if profile.get(part)),
         "next_milestone": "Complete Career Roadmap"
     }
 
+def get_user_progress(firebase_uid):
+    """Get user progress stats (from the counters on the user document)"""
+    db = get_db_connection()
+    user = db['users'].find_one({"firebase_uid": firebase_uid}, {"_id": 0, "stats": 1})
+    return _progress_from_stats((user or {}).get('stats') or {})
+
+def _count_by_user(collection, firebase_uid=None):
+    pipeline = [{"$match": {"firebase_uid": firebase_uid}}] if firebase_uid else []
+    pipeline.append({"$group": {"_id": "$firebase_uid", "count": {"$sum": 1}}})
+    return {doc['_id']: doc['count'] for doc in collection.aggregate(pipeline, allowDiskUse=True)}
+
+def check_user_stats(firebase_uid=None, repair=False):
+    """
+    Recount every user's dashboard counters from assessments, chat_history and
+    selected_careers and compare them with the stored ones.
+
+    With repair, mismatched counters are overwritten with the recounted values.
+    Writes that land between the recount and the repair can be overwritten
+    too, so repair while traffic is quiet (or repair again afterwards).
+
+    Returns:
+        {"checked", "mismatched", "repaired", "examples": up to 20 mismatches
+         as {"firebase_uid", "field", "stored", "expected"}}
+    """
+    db = get_db_connection()
+    users = db['users']
+    assessments = _count_by_user(db['assessments'], firebase_uid)
+    chats = _count_by_user(db['chat_history'], firebase_uid)
+
+    query = {"firebase_uid": firebase_uid} if firebase_uid else {}
+    stored = {user['firebase_uid']: user for user in users.find(
+        query, {"_id": 0, "firebase_uid": 1, "stats": 1, "selected_careers": 1}) if user.get('firebase_uid')}
+
+    report = {"checked": 0, "mismatched": 0, "repaired": 0, "examples": []}
+    operations = []
+    for uid in set(stored) | set(assessments) | set(chats):
+        user = stored.get(uid, {})
+        careers = user.get('selected_careers') or []
+        expected = {
+            "stats.assessments_completed": assessments.get(uid, 0),
+            "stats.chats_sent": chats.get(uid, 0),
+            "stats.profile.assessment": uid in assessments,
+            **_selected_careers_stats(careers),
+        }
+        current = user.get('stats') or {}
+        actual = {
+            "stats.assessments_completed": current.get('assessments_completed', 0),
+            "stats.chats_sent": current.get('chats_sent', 0),
+            "stats.profile.assessment": bool((current.get('profile') or {}).get('assessment')),
+            "stats.careers_explored": current.get('careers_explored', 0),
+            "stats.profile.careers": bool((current.get('profile') or {}).get('careers')),
+        }
+        report["checked"] += 1
+        diff = {field: value for field, value in expected.items() if actual[field] != value}
+        if not diff:
+            continue
+        report["mismatched"] += 1
+        for field, value in diff.items():
+            if len(report["examples"]) < 20:
+                report["examples"].append({"firebase_uid": uid, "field": field,
+                                           "stored": actual[field], "expected": value})
+        operations.append(UpdateOne({"firebase_uid": uid}, {"$set": diff}, upsert=True))
+
+    if repair:
+        for start in range(0, len(operations), 1000):
+            batch = operations[start:start + 1000]
+            users.bulk_write(batch, ordered=False)
+            report["repaired"] += len(batch)
+    return report
+
 def get_user_recent_activity(firebase_uid, limit=5):
     """Get recent activity for dashboard"""
     db = get_db_connection()
@@ -85,54 +180,125 @@ def get_user_recent_activity(firebase_uid, limit=5):
         
     return activities[:limit]
 
-def save_chat_message(firebase_uid, message, response):
-    """Save chat history"""
-    db = get_db_connection()
-    chats = db['chat_history']
-    
-    chat_doc = {
+def chat_message_document(firebase_uid, message, response):
+    """Build a chat history document (persisted directly or via the write-behind queue)"""
+    return {
         "firebase_uid": firebase_uid,
         "message": message,
         "response": response,
-        "timestamp": datetime.now()
+        # The history ETag is built from the latest timestamp, so a queued message
+        # must carry the same value MongoDB will store for it
+        "timestamp": to_mongo_precision(datetime.now())
     }
-    
-    chats.insert_one(chat_doc)
+
+def save_chat_message(firebase_uid, message, response):
+    """Save chat history"""
+    db = get_db_connection()
+    db['chat_history'].insert_one(chat_message_document(firebase_uid, message, response))
+    db['users'].bulk_write([chat_stats_update(firebase_uid)])
     return True
 
+def format_chat_message(chat):
+    return {
+        "message": chat['message'],
+        "response": chat['response'],
+        "timestamp": chat['timestamp'].isoformat()
+    }
+
+_chat_index_ready = False
+
+def _chat_collection():
+    global _chat_index_ready
+    chats = get_db_connection()['chat_history']
+    if not _chat_index_ready:
+        chats.create_index([("firebase_uid", ASCENDING), ("timestamp", DESCENDING)])
+        _chat_index_ready = True
+    return chats
+
+def get_chat_history_version(firebase_uid):
+    """Timestamp of the user's latest chat message (None if no history) - an index-only read"""
+    latest = _chat_collection().find_one(
+        {"firebase_uid": firebase_uid},
+        {"_id": 0, "timestamp": 1},
+        sort=[("timestamp", DESCENDING)]
+    )
+    return latest['timestamp'] if latest else None
+
 def get_chat_history(firebase_uid, limit=20):
     """Get chat history"""
-    db = get_db_connection()
-    chats = db['chat_history'].find(
+    chats = _chat_collection().find(
         {"firebase_uid": firebase_uid}
     ).sort("timestamp", DESCENDING).limit(limit)
     
-    history = []
-    for chat in chats:
-        history.append({
-            "message": chat['message'],
-            "response": chat['response'],
-            "timestamp": chat['timestamp'].isoformat()
-        })
+    history = [format_chat_message(chat) for chat in chats]
     
     return list(reversed(history)) # Return in chronological order
 
+# Weight of a journey selection relative to a page view in career popularity
+SELECTION_POPULARITY_WEIGHT = 5
+
+_career_stats_index_ready = False
+
+def career_popularity_update(career_slug, field, weight):
+    """Upsert operation counting a view/selection in career_stats (run directly or via the write-behind queue)"""
+    return UpdateOne(
+        {"_id": career_slug},
+        {"$inc": {field: 1, "popularity": weight}, "$set": {"updated_at": datetime.now()}},
+        upsert=True
+    )
+
+def career_view_update(career_slug):
+    """career_stats operation for one view of a career"""
+    return career_popularity_update(career_slug, "views", 1)
+
+def _bump_career_popularity(career_slug, field, weight):
+    db = get_db_connection()
+    db['career_stats'].bulk_write([career_popularity_update(career_slug, field, weight)])
+
 def track_career_exploration(firebase_uid, career_slug):
     """Track that a user viewed a career"""
-    # In a real app, we might log this to an analytics collection
-    pass
+    get_db_connection()['career_stats'].bulk_write([career_view_update(career_slug)])
 
-def get_latest_assessment_results(firebase_uid):
-    """Get the most recent assessment result"""
+def get_top_careers(limit=20):
+    """Most viewed/selected career slugs, most popular first"""
+    global _career_stats_index_ready
+    db = get_db_connection()
+    stats = db['career_stats']
+    if not _career_stats_index_ready:
+        stats.create_index([("popularity", DESCENDING)])
+        _career_stats_index_ready = True
+    return [doc['_id'] for doc in stats.find({}, {"_id": 1}).sort("popularity", DESCENDING).limit(limit)]
+
+def _load_latest_assessment(firebase_uid):
     db = get_db_connection()
     assessment = db['assessments'].find_one(
         {"firebase_uid": firebase_uid},
+        {"_id": 0, "results": 1, "created_at": 1},
         sort=[("created_at", DESCENDING)]
     )
-    
-    if assessment and 'results' in assessment:
-        return assessment['results']
-    return None
+    if not assessment:
+        return None
+    return {"results": assessment.get('results'), "created_at": as_utc(assessment.get('created_at'))}
+
+def get_latest_assessment(firebase_uid):
+    """Most recent assessment as {"results", "created_at"} (shared cache), or None"""
+    return assessment_cache.get_or_load(firebase_uid, lambda: _load_latest_assessment(firebase_uid))
+
+def remember_latest_assessment(assessment):
+    """Publish a just-submitted assessment document to every worker's cache (it may still be queued for writing)"""
+    # Truncate to MongoDB's precision so ETags match whichever copy a worker reads
+    created_at = to_mongo_precision(assessment['created_at'])
+    assessment_cache.set(assessment['firebase_uid'], {"results": assessment['results'], "created_at": created_at})
+
+def get_latest_assessment_results(firebase_uid):
+    """Get the most recent assessment result"""
+    assessment = get_latest_assessment(firebase_uid)
+    return assessment['results'] if assessment else None
+
+def get_latest_assessment_version(firebase_uid):
+    """Creation time of the most recent assessment (None if the user has none)"""
+    assessment = get_latest_assessment(firebase_uid)
+    return assessment['created_at'] if assessment else None
 
 def get_user_context(firebase_uid):
     """Get context for AI mentor"""
@@ -157,6 +323,7 @@ def save_selected_career_journey(firebase_uid, career_slug, career_title):
     db = get_db_connection()
     users = db['users']
     
+    # Upsert: the selection must not be lost if the profile hasn't been written yet
     users.update_one(
         {"firebase_uid": firebase_uid},
         {"$set": {
@@ -165,8 +332,10 @@ def save_selected_career_journey(firebase_uid, career_slug, career_title):
                 "title": career_title,
                 "selected_at": datetime.now()
             }
-        }}
+        }},
+        upsert=True
     )
+    _bump_career_popularity(career_slug, "selections", SELECTION_POPULARITY_WEIGHT)
     return True
 
 def get_selected_career_journey(firebase_uid):
@@ -178,40 +347,343 @@ def get_selected_career_journey(firebase_uid):
         return user['current_journey']
     return None
 
-def update_roadmap_progress(firebase_uid, career_slug, step_id, status):
-    """Update progress on a roadmap step"""
-    db = get_db_connection()
-    users = db['users']
-    
-    # Store progress in a nested object: roadmap_progress.career_slug.step_id = status
-    key = f"roadmap_progress.{career_slug}.{step_id}"
-    
-    users.update_one(
-        {"firebase_uid": firebase_uid},
-        {"$set": {key: status}}
-    )
-    return True
+# Roadmap progress is stored per career as one subdocument,
+#   roadmap_progress.<career_slug> = {"bits": <bitset>, "version": n, "updated_at": ...}
+# where bit i of `bits` (little-endian bytes) is set when step i of the career's
+# roadmap is completed. A batch of step changes is one update_one guarded on
+# `version`, so concurrent writers never interleave half a batch.
+
+ROADMAP_WRITE_ATTEMPTS = 5
+
+def encode_roadmap_bits(completed) -> bytes:
+    """Pack completed step indexes into a little-endian bitset"""
+    value = 0
+    for index in completed:
+        value |= 1 << index
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+def decode_roadmap_bits(bits) -> list:
+    """Completed step indexes from a stored bitset, in order"""
+    value = int.from_bytes(bytes(bits or b''), 'little')
+    completed = []
+    index = 0
+    while value:
+        if value & 1:
+            completed.append(index)
+        value >>= 1
+        index += 1
+    return completed
+
+def _legacy_completed_steps(progress):
+    """Completed step indexes from the old one-key-per-step layout ({"<stage>_step_<i>": status})"""
+    completed = set()
+    for key, status in progress.items():
+        match = re.search(r'step_(\d+)$', key)
+        if match and status:
+            completed.add(int(match.group(1)))
+    return sorted(completed)
+
+def _read_roadmap_state(users, firebase_uid, career_slug):
+    field = f"roadmap_progress.{career_slug}"
+    user = users.find_one({"firebase_uid": firebase_uid}, {field: 1, "_id": 0})
+    if user is None:
+        return None
+    progress = (user.get('roadmap_progress') or {}).get(career_slug) or {}
+    if 'version' in progress:
+        return {"version": progress['version'], "completed": decode_roadmap_bits(progress.get('bits'))}
+    return {"version": 0, "completed": _legacy_completed_steps(progress)}
+
+def apply_roadmap_progress(firebase_uid, career_slug, changes, step_count, expected_version=None):
+    """
+    Apply a batch of roadmap step changes as one atomic update.
+
+    Args:
+        changes: {step_index: completed} for steps 0..step_count-1
+        expected_version: version the client last read; the batch is rejected
+            if the stored progress has moved on. None applies the batch on top
+            of whatever is stored, retrying if another write lands in between
+            (and rejecting it if every attempt lost the race).
+
+    Returns:
+        {"applied", "version", "completed": sorted step indexes} with the stored
+        state after the write, or the current state if the batch was rejected
+        (applied False). None if the user doesn't exist.
+    """
+    for index in changes:
+        if not 0 <= index < step_count:
+            raise ValueError(f"Step {index} is outside this roadmap (0-{step_count - 1})")
+
+    users = get_db_connection()['users']
+    field = f"roadmap_progress.{career_slug}"
+    for _ in range(ROADMAP_WRITE_ATTEMPTS):
+        state = _read_roadmap_state(users, firebase_uid, career_slug)
+        if state is None:
+            return None
+        if expected_version is not None and state['version'] != expected_version:
+            return {"applied": False, **state}
+
+        completed = set(state['completed'])
+        for index, done in changes.items():
+            if done:
+                completed.add(index)
+            else:
+                completed.discard(index)
+        completed = sorted(completed)
+        version = state['version'] + 1
+
+        # A missing version means no write under this layout yet (version 0)
+        guard = state['version'] if state['version'] else None
+        result = users.update_one(
+            {"firebase_uid": firebase_uid, f"{field}.version": guard},
+            {"$set": {field: {
+                "bits": encode_roadmap_bits(completed),
+                "version": version,
+                "updated_at": datetime.now()
+            }}}
+        )
+        if result.matched_count:
+            return {"applied": True, "version": version, "completed": completed}
+        if expected_version is not None:
+            break
+    state = _read_roadmap_state(users, firebase_uid, career_slug)
+    return {"applied": False, **state} if state is not None else None
 
 def get_roadmap_progress(firebase_uid, career_slug):
-    """Get progress for a specific career roadmap"""
-    db = get_db_connection()
-    user = db['users'].find_one({"firebase_uid": firebase_uid})
-    
-    if user and 'roadmap_progress' in user and career_slug in user['roadmap_progress']:
-        return user['roadmap_progress'][career_slug]
-    return {}
+    """
+    Progress for a career roadmap.
 
-def get_job_listings(career_slug):
-    """Mock job listings"""
-    return []
+    Returns:
+        {"version", "completed": sorted completed step indexes}; version 0 and
+        no steps if nothing was recorded yet.
+    """
+    users = get_db_connection()['users']
+    return _read_roadmap_state(users, firebase_uid, career_slug) or {"version": 0, "completed": []}
 
-def apply_to_job(firebase_uid, job_id, job_data):
-    """Mock job application"""
-    return {"status": "success"}
+# =====================================================
+# Local job index
+# =====================================================
 
-def get_user_job_applications(firebase_uid):
-    """Mock applications"""
-    return []
+JOB_UPSERT_BATCH_SIZE = 1000
+
+_job_indexes_ready = False
+
+def ensure_job_indexes():
+    """Create indexes backing job listing queries (idempotent)"""
+    global _job_indexes_ready
+    if _job_indexes_ready:
+        return
+    jobs = get_db_connection()['jobs']
+    jobs.create_index([("career_slugs", ASCENDING), ("posted_at", DESCENDING), ("_id", ASCENDING)])
+    jobs.create_index([("location_key", ASCENDING), ("posted_at", DESCENDING), ("_id", ASCENDING)])
+    jobs.create_index([("posted_at", DESCENDING), ("_id", ASCENDING)])
+    jobs.create_index([("match_version", ASCENDING)])
+    _job_indexes_ready = True
+
+def _normalize_field(value):
+    return re.sub(r'\s+', ' ', (value or '').strip().lower())
+
+def job_content_hash(company, title, location):
+    """Dedupe key: the same role at the same company and location is one listing"""
+    raw = "|".join(_normalize_field(v) for v in (company, title, location))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _parse_posted_at(value, default):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            pass
+    return default
+
+def upsert_job_listings(jobs, career_slug=None, batch_size=JOB_UPSERT_BATCH_SIZE):
+    """
+    Bulk upsert normalized job records (see indeed_scraper) into the jobs index.
+
+    Listings are deduplicated on a content hash of company, title and location,
+    which is used as the document _id. Re-ingesting a listing refreshes it and
+    adds career_slug to its career_slugs.
+
+    Returns:
+        {"inserted": n, "updated": n, "ids": _ids of the listings written}
+    """
+    ensure_job_indexes()
+    collection = get_db_connection()['jobs']
+    now = datetime.now()
+    inserted = updated = 0
+    ids = []
+
+    batch = []
+    def flush():
+        nonlocal inserted, updated
+        if batch:
+            result = collection.bulk_write(batch, ordered=False)
+            inserted += result.upserted_count
+            updated += result.matched_count
+            batch.clear()
+
+    for job in jobs:
+        title = job.get('title') or job.get('job_title')
+        company = job.get('company') or job.get('company_name') or ''
+        location = job.get('location') or job.get('job_location') or ''
+        if not title:
+            continue
+        content_hash = job_content_hash(company, title, location)
+        fields = {
+            "job_title": title,
+            "company_name": company,
+            "job_location": location,
+            "location_key": _normalize_field(location),
+            "salary_range": job.get('salary_text') or job.get('salary_range') or '',
+            "salary_min": job.get('salary_min'),
+            "salary_max": job.get('salary_max'),
+            "description": job.get('summary') or job.get('description') or '',
+            "job_url": job.get('url') or job.get('job_url'),
+            "source": job.get('source', 'Indeed'),
+            "source_job_key": job.get('job_key'),
+            "posted_at": _parse_posted_at(job.get('posted_at'), now),
+            "last_seen_at": now
+        }
+        update = {"$set": fields, "$setOnInsert": {"first_seen_at": now}}
+        if career_slug:
+            # search_career_slugs survives re-matching (job_matching rewrites career_slugs)
+            update["$addToSet"] = {"career_slugs": career_slug, "search_career_slugs": career_slug}
+        batch.append(UpdateOne({"_id": content_hash}, update, upsert=True))
+        ids.append(content_hash)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    return {"inserted": inserted, "updated": updated, "ids": ids}
+
+def _encode_job_cursor(posted_at, job_id):
+    raw = json.dumps([posted_at.isoformat(), job_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_job_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        posted_at, job_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(posted_at), str(job_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def get_job_listings(career_slug=None, location=None, limit=50, cursor=None):
+    """
+    Newest-first job listings from the local index, keyset-paginated on (posted_at, _id).
+
+    Returns:
+        (jobs, next_cursor) - next_cursor is None on the last page
+    """
+    ensure_job_indexes()
+    collection = get_db_connection()['jobs']
+
+    query = {}
+    if career_slug:
+        query["career_slugs"] = career_slug
+    if location:
+        query["location_key"] = _normalize_field(location)
+    if cursor:
+        posted_at, job_id = _decode_job_cursor(cursor)
+        query["$or"] = [
+            {"posted_at": {"$lt": posted_at}},
+            {"posted_at": posted_at, "_id": {"$gt": job_id}}
+        ]
+
+    documents = list(collection.find(query).sort([("posted_at", DESCENDING), ("_id", ASCENDING)]).limit(limit + 1))
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = _encode_job_cursor(documents[-1]['posted_at'], documents[-1]['_id'])
+
+    jobs = []
+    for doc in documents:
+        jobs.append({
+            "id": doc['_id'],
+            "job_title": doc.get('job_title'),
+            "company_name": doc.get('company_name'),
+            "job_location": doc.get('job_location'),
+            "salary_range": doc.get('salary_range'),
+            "description": doc.get('description'),
+            "job_url": doc.get('job_url'),
+            "source": doc.get('source'),
+            "career_slugs": doc.get('career_slugs', []),
+            "posted_at": doc['posted_at'].isoformat() if doc.get('posted_at') else None
+        })
+    return jobs, next_cursor
+
+# =====================================================
+# Job applications
+# =====================================================
+
+_application_indexes_ready = False
+
+def ensure_application_indexes(collection=None):
+    """Unique idempotency key plus the per-user listing index (idempotent)"""
+    global _application_indexes_ready
+    if _application_indexes_ready:
+        return
+    applications = collection if collection is not None else get_db_connection()['job_applications']
+    applications.create_index([("idempotency_key", ASCENDING)], unique=True)
+    applications.create_index([("firebase_uid", ASCENDING), ("applied_at", DESCENDING)])
+    _application_indexes_ready = True
+
+def job_application_key(firebase_uid, job_data):
+    """Default idempotency key: one application per user per job"""
+    job_ref = (job_data.get('job_listing_id') or job_data.get('job_url') or
+               f"{_normalize_field(job_data.get('company_name'))}|{_normalize_field(job_data.get('job_title'))}")
+    return hashlib.sha1(f"{firebase_uid}|{job_ref}".encode('utf-8')).hexdigest()
+
+def apply_to_job(firebase_uid, job_data, idempotency_key=None):
+    """
+    Build a job application document (persisted by the write-behind queue).
+
+    Returns:
+        The application document; idempotency_key defaults to job_application_key()
+    """
+    return {
+        "idempotency_key": idempotency_key or job_application_key(firebase_uid, job_data),
+        "firebase_uid": firebase_uid,
+        "job_listing_id": job_data.get('job_listing_id'),
+        "job_title": job_data.get('job_title'),
+        "company_name": job_data.get('company_name'),
+        "job_location": job_data.get('job_location'),
+        "salary_range": job_data.get('salary_range'),
+        "job_url": job_data.get('job_url'),
+        "notes": job_data.get('notes'),
+        "application_status": "applied",
+        "applied_at": datetime.now()
+    }
+
+def job_application_exists(idempotency_key):
+    """Whether an application with this idempotency key has been written"""
+    ensure_application_indexes()
+    return get_db_connection()['job_applications'].find_one(
+        {"idempotency_key": idempotency_key}, {"_id": 1}) is not None
+
+def format_job_application(application):
+    return {
+        "id": application['idempotency_key'],
+        "job_listing_id": application.get('job_listing_id'),
+        "job_title": application.get('job_title'),
+        "company_name": application.get('company_name'),
+        "job_location": application.get('job_location'),
+        "salary_range": application.get('salary_range'),
+        "job_url": application.get('job_url'),
+        "notes": application.get('notes'),
+        "application_status": application.get('application_status', 'applied'),
+        "applied_at": application['applied_at'].isoformat()
+    }
+
+def get_user_job_applications(firebase_uid, limit=100):
+    """User's job applications, newest first (served by the firebase_uid/applied_at index)"""
+    ensure_application_indexes()
+    applications = get_db_connection()['job_applications'].find(
+        {"firebase_uid": firebase_uid},
+        {"_id": 0}
+    ).sort("applied_at", DESCENDING).limit(limit)
+    return [format_job_application(application) for application in applications]
 
 def save_selected_careers(firebase_uid, careers):
     """Save list of selected careers"""
@@ -220,7 +692,7 @@ def save_selected_careers(firebase_uid, careers):
     
     users.update_one(
         {"firebase_uid": firebase_uid},
-        {"$set": {"selected_careers": careers}}
+        {"$set": {"selected_careers": careers, **_selected_careers_stats(careers)}}
     )
     return True
 
@@ -0,0 +1,244 @@
+"""
+In-process write-behind queue for MongoDB writes.
+
+Request handlers enqueue documents (inserts) or pymongo write operations
+(UpdateOne, ReplaceOne, ...) and return immediately; a background task flushes
+them with one unordered `bulk_write` per collection whenever the batch reaches
+WRITE_BEHIND_MAX_BATCH items or WRITE_BEHIND_FLUSH_INTERVAL seconds pass.
+Writes that need their own logic (e.g. career upserts with facet bookkeeping)
+are deferred as callables and run after the batch's bulk writes. Everything
+pending is drained on shutdown.
+
+Writes are unordered, so a duplicate-key error (e.g. a repeated idempotency
+key) only drops that document. Any other failed write (or deferred call) is
+queued again and retried on the following flushes, up to
+WRITE_BEHIND_MAX_ATTEMPTS attempts in all, before it is dropped and logged.
+When the worker isn't running (scripts, serverless invocations without
+lifespan) items are written synchronously, with the retries done in place.
+
+Configuration (environment):
+    WRITE_BEHIND_MAX_BATCH        items per flush (default 500)
+    WRITE_BEHIND_FLUSH_INTERVAL   seconds between flushes (default 0.5)
+    WRITE_BEHIND_MAX_ATTEMPTS     attempts per write before it is dropped (default 5)
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from database import get_db_connection
+
+WRITE_BEHIND_MAX_BATCH = int(os.getenv('WRITE_BEHIND_MAX_BATCH', '500'))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '0.5'))
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', '5'))
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class WriteBehindQueue:
+    """Batches writes per collection and flushes them off the request path"""
+
+    def __init__(self, max_batch: int = WRITE_BEHIND_MAX_BATCH,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+                 max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_attempts = max(1, max_attempts)
+        self._pending = []
+        # Batches handed to a writer thread; still served by pending() until written
+        self._in_flight = []
+        self._keys = set()
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+        self._before_flush = {}
+        self.metrics = {"enqueued": 0, "written": 0, "duplicates": 0, "failed": 0, "retried": 0,
+                        "dropped": 0, "deferred": 0, "flushes": 0, "last_flush_ms": 0.0}
+
+    # ----- producers -----
+
+    def enqueue(self, collection: str, document, key: Optional[str] = None) -> bool:
+        """
+        Queue a write.
+
+        Args:
+            document: A document to insert, or a pymongo write operation (UpdateOne, ...)
+            key: Optional idempotency key; a document whose key is already pending is dropped
+
+        Returns:
+            False if the document was dropped as a pending duplicate
+        """
+        if key is not None:
+            if (collection, key) in self._keys:
+                self.metrics["duplicates"] += 1
+                return False
+            self._keys.add((collection, key))
+        self.metrics["enqueued"] += 1
+        self._add((collection, document, key, 0))
+        return True
+
+    def defer(self, function: Callable, *args):
+        """Queue a call that performs its own writes; it runs in the flush after the bulk writes"""
+        self.metrics["deferred"] += 1
+        self._add((None, (function, args), None, 0))
+
+    def _add(self, item):
+        if self._task is None:
+            failed = [item]
+            while failed:
+                failed = self._retryable(self._write(failed))
+            return
+        self._pending.append(item)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def pending(self, collection: str, predicate: Callable[[Dict], bool]) -> List[Dict]:
+        """Queued or in-flight (not yet written) insert documents of a collection matching predicate"""
+        return [document for name, document, _, _ in self._in_flight + self._pending
+                if name == collection and isinstance(document, dict) and predicate(document)]
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    # ----- writing -----
+
+    def _write(self, items) -> List:
+        """Write a batch; returns the items whose write failed (other than as a duplicate)"""
+        started = time.perf_counter()
+        by_collection = {}
+        deferred = []
+        for item in items:
+            if item[0] is None:
+                deferred.append(item)
+            else:
+                by_collection.setdefault(item[0], []).append(item)
+
+        failed = []
+        db = get_db_connection() if by_collection else None
+        for collection, batch in by_collection.items():
+            operations = [InsertOne(document) if isinstance(document, dict) else document
+                          for _, document, _, _ in batch]
+            before_flush = self._before_flush.get(collection)
+            try:
+                if before_flush:
+                    before_flush(db[collection])
+                result = db[collection].bulk_write(operations, ordered=False)
+                self.metrics["written"] += result.inserted_count + result.upserted_count + result.matched_count
+            except BulkWriteError as e:
+                errors = e.details.get('writeErrors', [])
+                duplicates = sum(1 for error in errors if error.get('code') == DUPLICATE_KEY_ERROR)
+                self.metrics["written"] += (e.details.get('nInserted', 0) + e.details.get('nUpserted', 0)
+                                            + e.details.get('nMatched', 0))
+                self.metrics["duplicates"] += duplicates
+                self.metrics["failed"] += len(errors) - duplicates
+                failed += [batch[error['index']] for error in errors if error.get('code') != DUPLICATE_KEY_ERROR]
+                if len(errors) > duplicates:
+                    print(f"⚠️ Write-behind: {len(errors) - duplicates} writes to '{collection}' failed: {errors[0].get('errmsg')}")
+            except Exception as e:
+                self.metrics["failed"] += len(operations)
+                failed += batch
+                print(f"⚠️ Write-behind: bulk write to '{collection}' failed: {e}")
+
+        for item in deferred:
+            function, args = item[1]
+            try:
+                function(*args)
+            except Exception as e:
+                self.metrics["failed"] += 1
+                failed.append(item)
+                print(f"⚠️ Write-behind: deferred {getattr(function, '__name__', function)} failed: {e}")
+
+        retrying = {id(item) for item in failed}
+        for item in items:
+            collection, key = item[0], item[2]
+            if key is not None and id(item) not in retrying:
+                self._keys.discard((collection, key))
+        self.metrics["flushes"] += 1
+        self.metrics["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return failed
+
+    def _retryable(self, failed) -> List:
+        """Failed items with attempts left (attempt count bumped); the rest are dropped"""
+        retry = []
+        for collection, document, key, attempts in failed:
+            if attempts + 1 < self.max_attempts:
+                retry.append((collection, document, key, attempts + 1))
+                continue
+            self.metrics["dropped"] += 1
+            if key is not None:
+                self._keys.discard((collection, key))
+            target = collection or getattr(document[0], '__name__', document[0])
+            print(f"⚠️ Write-behind: dropped a write to '{target}' after {self.max_attempts} attempts")
+        self.metrics["retried"] += len(retry)
+        return retry
+
+    async def flush(self):
+        """Write everything queued; failed writes go back on the queue for the next flush"""
+        retry = []
+        try:
+            while self._pending:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._in_flight = batch
+                try:
+                    failed = await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    print(f"⚠️ Write-behind flush failed: {e}")
+                    failed = batch
+                finally:
+                    self._in_flight = []
+                retry += self._retryable(failed)
+        finally:
+            # Ahead of anything queued meanwhile, so writes keep their order
+            self._pending[:0] = retry
+
+    def on_flush(self, collection: str, callback: Callable):
+        """Run callback(collection) before each bulk write to it (e.g. to ensure indexes)"""
+        self._before_flush[collection] = callback
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Write-behind flush failed: {e}")
+
+    # ----- lifecycle -----
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and drain everything still queued (retrying failed writes)"""
+        if self._task is not None:
+            # Let the worker finish its current flush rather than cancelling it
+            # mid-write: the thread would keep running and its batch be lost
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        while self._pending:
+            # Only retries are left; each has a bounded number of attempts
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def status(self) -> Dict:
+        return dict(self.metrics, running=self._task is not None, queue_depth=self.depth,
+                    in_flight=len(self._in_flight))
+
+
+write_behind = WriteBehindQueue()
@@ -40,6 +40,7 @@ const CareerJourney = () => {
   const [searchJobTitle, setSearchJobTitle] = useState('');
   const [searchLocation, setSearchLocation] = useState('India');
   const [showIndeedResults, setShowIndeedResults] = useState(false);
+  const [indeedCache, setIndeedCache] = useState(null);
   const API_URL = import.meta.env.VITE_API_URL || (import.meta.env.PROD ? '/' : 'http://localhost:8000');
   const heroRef = useScrollAnimation();
 
@@ -125,9 +126,8 @@ const CareerJourney = () => {
   const fetchJobs = async () => {
     setLoadingJobs(true);
     try {
-      const careerId = career?.id;
       const response = await axios.get(`${API_URL}/api/jobs`, {
-        params: { career_id: careerId, limit: 50 }
+        params: { career_slug: career?.slug, limit: 50 }
       });
       setJobs(response.data.jobs || []);
     } catch (error) {
@@ -182,6 +182,7 @@ const CareerJourney = () => {
     try {
       const response = await jobsAPI.searchIndeed(searchJobTitle, searchLocation, 15);
       setIndeedJobs(response.jobs || []);
+      setIndeedCache(response.cache || null);
 
       // Show helpful message if no jobs found
       if (response.jobs && response.jobs.length === 0 && response.message) {
@@ -597,6 +598,11 @@ const CareerJourney = () => {
                         {indeedJobs.length} jobs found
                       </span>
                     </div>
+                    {!loadingIndeed && indeedCache && indeedCache.age_seconds >= 60 && (
+                      <p className="text-xs text-gray-500 dark:text-gray-400 -mt-2 mb-4">
+                        Updated {Math.round(indeedCache.age_seconds / 60)} min ago{indeedCache.status === 'stale' ? ' · refreshing in the background' : ''}
+                      </p>
+                    )}
                     {loadingIndeed ? (
                       <div className="text-center py-8">
                         <Loader className="h-8 w-8 text-prism-violet dark:text-prism-cyan animate-spin mx-auto mb-2" />
@@ -56,9 +56,10 @@ export const mentorAPI = {
 
 // Jobs API
 export const jobsAPI = {
-  getJobs: async (careerId = null, limit = 50) => {
+  getJobs: async (careerSlug = null, limit = 50, cursor = null) => {
     const params = {};
-    if (careerId) params.career_id = careerId;
+    if (careerSlug) params.career_slug = careerSlug;
+    if (cursor) params.cursor = cursor;
     params.limit = limit;
     const response = await api.get('/api/jobs', { params });
     return response.data;